@@ -0,0 +1,568 @@
+"""In-memory columnar copy of ``master_index`` for the common filter queries.
+
+Most questions filter ``master_index`` on company name, form type, filing
+date or CIK, and SQLite evaluates those filters row by row. This module keeps
+the table in NumPy arrays instead: CIKs as int64, form types and company
+names dictionary-encoded as integer codes, filing dates as ``YYYYMMDD``
+integers, and the distinct names and the filenames in contiguous byte
+buffers with offsets. Filters become array comparisons. A name substring is
+found by searching the buffer of distinct names once and selecting the rows
+whose name code matched. Statements with a LIMIT and no ORDER BY are
+evaluated in blocks of rows and stop once enough rows have matched.
+
+Only statements of this shape are answered here:
+
+    SELECT * | <columns> FROM master_index [alias]
+    [WHERE <predicate> AND ...] [ORDER BY cik | date_filed [ASC|DESC]] [LIMIT n]
+
+The predicates understood are:
+- ``=``, ``IN``, ``BETWEEN`` and ``<``, ``<=``, ``>``, ``>=`` on ``cik`` and
+  ``date_filed``
+- ``=`` and ``IN`` on ``form_type``
+- ``LIKE`` on ``company_name`` or ``UPPER(company_name)`` with a pattern
+  that is plain text, ``text%``, ``%text`` or ``%text%``
+
+Everything else returns None and runs on SQLite. So do CIK lookups and
+statements that neither filter on ``company_name`` or ``date_filed`` nor
+sort by ``date_filed``: SQLite answers those from its cik and form_type
+indexes, stopping at the LIMIT, faster than a full pass over the arrays.
+Results match SQLite, including ASCII-only case-insensitive LIKE and NULLs
+sorting first. Rows that tie on the ORDER BY key come back in rowid order.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .query_guard import strip_sql
+from .sql_templates import _TOKEN_PATTERN
+
+TABLE = "master_index"
+COLUMNS = ("cik", "company_name", "form_type", "date_filed", "filename")
+LOAD_CHUNK_ROWS = 200_000
+# Unordered statements with a LIMIT are scanned in blocks and stop early
+SCAN_BLOCK_ROWS = 65_536
+_DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_GUARD_WRAPPER = re.compile(
+    r"^SELECT\s+\*\s+FROM\s+\((?P<inner>.*)\)\s+LIMIT\s+(?P<limit>\d+)$",
+    re.IGNORECASE | re.DOTALL,
+)
+_COMPARISONS = {"=", "<", "<=", ">", ">=", "IN", "BETWEEN", "LIKE"}
+# Operators each column can be filtered with
+_SUPPORTED_OPERATORS = {
+    "cik": {"=", "<", "<=", ">", ">=", "IN", "BETWEEN"},
+    "date_filed": {"=", "<", "<=", ">", ">=", "IN", "BETWEEN"},
+    "form_type": {"=", "IN"},
+    "company_name": {"LIKE"},
+}
+_SORTABLE = {"cik", "date_filed"}
+_OPERATIONS = {
+    "=": np.equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+}
+_CLAUSE_WORDS = {"where", "order", "limit"}
+
+
+@dataclass
+class ScanQuery:
+    columns: List[str]
+    predicates: List[Tuple[str, str, Any]] = field(default_factory=list)
+    order: Optional[Tuple[str, bool]] = None
+    limit: Optional[int] = None
+
+
+class _Unsupported(Exception):
+    pass
+
+
+class _StringColumn:
+    """Strings in one byte buffer, each followed by a newline separator."""
+
+    def __init__(self, chunks: List[pd.Series]):
+        buffers = []
+        lengths = []
+        nulls = []
+        for values in chunks:
+            nulls.append(values.isna().to_numpy())
+            encoded = [value.encode("utf-8") for value in values.fillna("").astype(str)]
+            lengths.append(np.fromiter(map(len, encoded), np.int64, len(encoded)))
+            buffers.append(b"\n".join(encoded) + (b"\n" if encoded else b""))
+        self.buffer = b"".join(buffers)
+        sizes = np.concatenate(lengths) + 1 if lengths else np.zeros(0, np.int64)
+        self.offsets = np.concatenate(([0], np.cumsum(sizes))).astype(np.int64)
+        self.nulls = np.concatenate(nulls) if nulls else np.zeros(0, bool)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.buffer) + self.offsets.nbytes + self.nulls.nbytes
+
+    def values(self, rows) -> List[Optional[str]]:
+        buffer, offsets, nulls = self.buffer, self.offsets, self.nulls
+        return [
+            None
+            if nulls[row]
+            else buffer[offsets[row] : offsets[row + 1] - 1].decode("utf-8")
+            for row in rows
+        ]
+
+    def matching_rows(self, needle: bytes, buffer=None):
+        """Positions of ``needle`` in the buffer and the row of each."""
+        buffer = self.buffer if buffer is None else buffer
+        find = buffer.find
+        positions = []
+        position = find(needle)
+        while position != -1:
+            positions.append(position)
+            position = find(needle, position + 1)
+        hits = np.asarray(positions, np.int64)
+        rows = np.searchsorted(self.offsets, hits, side="right") - 1
+        return hits, rows
+
+
+class ColumnarMasterIndex:
+    """NumPy columns of ``master_index`` and a vectorized executor for them."""
+
+    name = "columnar"
+
+    def __init__(
+        self, cik, cik_nulls, form_codes, forms, dates, name_codes, names, filenames
+    ):
+        self.cik = cik
+        self.cik_nulls = cik_nulls
+        self.form_codes = form_codes
+        self.forms = forms
+        self.form_lookup = {form: code for code, form in enumerate(forms)}
+        self.dates = dates
+        self.name_codes = name_codes
+        self.names = names
+        # LIKE ignores ASCII case, which bytes.upper() folds the same way
+        self.upper_names = names.buffer.upper()
+        self.filenames = filenames
+
+    @classmethod
+    def load(cls, conn, chunk_rows=LOAD_CHUNK_ROWS) -> "ColumnarMasterIndex":
+        """Read ``master_index`` in rowid order; raises ValueError if unusable."""
+        cursor = conn.execute(f"SELECT * FROM {TABLE} ORDER BY rowid")
+        columns = [description[0] for description in cursor.description]
+        if tuple(columns) != COLUMNS:
+            raise ValueError(f"Unexpected {TABLE} columns: {', '.join(columns)}")
+        ciks, cik_nulls, dates, filenames = [], [], [], []
+        form_codes, name_codes = [], []
+        forms: Dict[str, int] = {}
+        names: Dict[str, int] = {}
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            chunk = pd.DataFrame.from_records(rows, columns=columns)
+            cik = pd.to_numeric(chunk["cik"], errors="coerce")
+            cik_nulls.append(cik.isna().to_numpy())
+            ciks.append(cik.fillna(-1).to_numpy(np.int64))
+
+            form_codes.append(_encode(chunk["form_type"], forms))
+            name_codes.append(_encode(chunk["company_name"], names))
+
+            filed = chunk["date_filed"]
+            valid = filed.isna() | filed.astype(str).str.match(_DATE_PATTERN)
+            if not valid.all():
+                raise ValueError("date_filed values are not all YYYY-MM-DD")
+            dates.append(
+                pd.to_numeric(filed.str.replace("-", "", regex=False))
+                .fillna(0)
+                .to_numpy(np.int32)
+            )
+            filenames.append(chunk["filename"])
+        return cls(
+            cik=_concatenate(ciks, np.int64),
+            cik_nulls=_concatenate(cik_nulls, bool),
+            form_codes=_concatenate(form_codes, np.int32),
+            forms=list(forms),
+            dates=_concatenate(dates, np.int32),
+            name_codes=_concatenate(name_codes, np.int32),
+            names=_StringColumn([pd.Series(list(names), dtype=object)]),
+            filenames=_StringColumn(filenames),
+        )
+
+    def __len__(self):
+        return len(self.cik)
+
+    @property
+    def memory_bytes(self) -> int:
+        return (
+            self.cik.nbytes
+            + self.cik_nulls.nbytes
+            + self.form_codes.nbytes
+            + self.dates.nbytes
+            + self.name_codes.nbytes
+            + self.names.nbytes
+            + len(self.upper_names)
+            + self.filenames.nbytes
+            + sum(len(form) for form in self.forms)
+        )
+
+    def execute(self, sql_query, params=()) -> Optional[pd.DataFrame]:
+        """The result of a supported statement, or None to run it on SQLite."""
+        query = parse_scan_query(sql_query, params)
+        if query is None or not _needs_scan(query):
+            return None
+        try:
+            filters = [self._filter(*predicate) for predicate in query.predicates]
+        except _Unsupported:
+            return None
+        if query.order is None and query.limit is not None:
+            rows = self._first_matches(filters, query.limit)
+        else:
+            rows = self._ordered(
+                self._matches(filters, slice(None)), query.order, query.limit
+            )
+        return pd.DataFrame(
+            {column: self._values(column, rows) for column in query.columns},
+            columns=query.columns,
+        )
+
+    def _matches(self, filters, block: slice) -> np.ndarray:
+        mask = np.ones(len(self.cik[block]), bool)
+        for matches in filters:
+            mask &= matches(block)
+        return np.flatnonzero(mask) + (block.start or 0)
+
+    def _first_matches(self, filters, limit) -> np.ndarray:
+        """The first ``limit`` matching rows, stopping once they are found."""
+        found = []
+        count = 0
+        for start in range(0, len(self), SCAN_BLOCK_ROWS):
+            if count >= limit:
+                break
+            rows = self._matches(filters, slice(start, start + SCAN_BLOCK_ROWS))
+            found.append(rows[: limit - count])
+            count += len(found[-1])
+        return _concatenate(found, np.int64)
+
+    def _filter(self, column, operator, value) -> Callable[[slice], np.ndarray]:
+        """A function giving the rows of a block that pass one predicate."""
+        if column == "company_name":
+            matched = self._matching_names(value)
+            return lambda block: matched[self.name_codes[block]]
+        if column == "form_type":
+            values = value if operator == "IN" else [value]
+            if not all(isinstance(v, str) for v in values):
+                raise _Unsupported
+            # One extra False slot, which NULL's code -1 selects
+            selected = np.zeros(len(self.forms) + 1, bool)
+            codes = [self.form_lookup[v] for v in values if v in self.form_lookup]
+            selected[codes] = True
+            return lambda block: selected[self.form_codes[block]]
+
+        if column == "cik":
+            data, nulls, convert = self.cik, self.cik_nulls, _as_cik
+        else:
+            data, nulls, convert = self.dates, None, _as_date
+        if operator == "IN":
+            targets = [convert(v) for v in value]
+
+            def compare(values):
+                return np.isin(values, targets)
+
+        elif operator == "BETWEEN":
+            low, high = convert(value[0]), convert(value[1])
+
+            def compare(values):
+                return (values >= low) & (values <= high)
+
+        else:
+            target = convert(value)
+            operation = _OPERATIONS[operator]
+
+            def compare(values):
+                return operation(values, target)
+
+        def matches(block):
+            values = data[block]
+            valid = values > 0 if nulls is None else ~nulls[block]
+            return valid & compare(values)
+
+        return matches
+
+    def _matching_names(self, pattern) -> np.ndarray:
+        """Which distinct names match a LIKE pattern, indexed by name code."""
+        if not isinstance(pattern, str) or "_" in pattern:
+            raise _Unsupported
+        text = pattern.strip("%")
+        if "%" in text or "\n" in text:
+            raise _Unsupported
+        # One extra False slot, which NULL's code -1 selects
+        matched = np.zeros(len(self.names) + 1, bool)
+        if not text:
+            matched[:-1] = True
+            return matched
+        needle = text.encode("utf-8").upper()
+        hits, codes = self.names.matching_rows(needle, self.upper_names)
+        offsets = self.names.offsets
+        keep = np.ones(len(hits), bool)
+        if not pattern.startswith("%"):
+            keep &= hits == offsets[codes]
+        if not pattern.endswith("%"):
+            keep &= hits + len(needle) == offsets[codes + 1] - 1
+        matched[codes[keep]] = True
+        return matched
+
+    def _ordered(self, rows, order, limit) -> np.ndarray:
+        if order is None:
+            return rows
+        column, descending = order
+        # NULLs are stored as -1 and 0, so they sort first ascending as in SQLite
+        keys = (self.cik if column == "cik" else self.dates)[rows].astype(np.int64)
+        if descending:
+            keys = -keys
+        if limit is not None and limit < len(rows):
+            if limit <= 0:
+                return rows[:0]
+            # Exact top-N: everything below the N-th key, then ties by rowid
+            kth = np.partition(keys, limit - 1)[limit - 1]
+            below = keys < kth
+            ties = np.flatnonzero(keys == kth)[: limit - int(below.sum())]
+            chosen = np.concatenate((np.flatnonzero(below), ties))
+            rows, keys = rows[chosen], keys[chosen]
+        return rows[np.lexsort((rows, keys))]
+
+    def _values(self, column, rows):
+        if column == "cik":
+            values = pd.array(self.cik[rows], dtype="Int64")
+            values[self.cik_nulls[rows]] = pd.NA
+            return values
+        if column == "form_type":
+            return [
+                None if code < 0 else self.forms[code] for code in self.form_codes[rows]
+            ]
+        if column == "date_filed":
+            return [
+                None
+                if date == 0
+                else f"{date // 10000:04d}-{date // 100 % 100:02d}-{date % 100:02d}"
+                for date in self.dates[rows].tolist()
+            ]
+        if column == "company_name":
+            codes = self.name_codes[rows]
+            names = self.names.values(np.maximum(codes, 0))
+            return [None if code < 0 else name for code, name in zip(codes, names)]
+        return self.filenames.values(rows)
+
+
+def _needs_scan(query: ScanQuery) -> bool:
+    """Whether SQLite would have to scan the table, having no usable index."""
+    if any(
+        column == "cik" and operator in ("=", "IN")
+        for column, operator, _ in query.predicates
+    ):
+        return False
+    return (query.order is not None and query.order[0] == "date_filed") or any(
+        column in ("company_name", "date_filed") for column, _, _ in query.predicates
+    )
+
+
+def _encode(values: pd.Series, lookup: Dict[str, int]) -> np.ndarray:
+    """Codes of ``values`` in ``lookup``, adding new values; NULL is -1."""
+    local_codes, uniques = pd.factorize(values)
+    mapping = np.array(
+        [lookup.setdefault(value, len(lookup)) for value in uniques] + [-1], np.int32
+    )
+    # factorize marks NULL as -1, which indexes the trailing -1
+    return mapping[local_codes]
+
+
+def _concatenate(parts, dtype) -> np.ndarray:
+    return np.concatenate(parts).astype(dtype) if parts else np.zeros(0, dtype)
+
+
+def _as_cik(value) -> int:
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise _Unsupported
+    if isinstance(value, str) and not value.strip().isdigit():
+        raise _Unsupported
+    return int(value)
+
+
+def _as_date(value) -> int:
+    if not isinstance(value, str) or not _DATE_PATTERN.match(value):
+        raise _Unsupported
+    return int(value.replace("-", ""))
+
+
+def parse_scan_query(sql_query, params=()) -> Optional[ScanQuery]:
+    """Describe a statement the columnar index can answer, or None."""
+    sql = strip_sql(sql_query)
+    limit = None
+    wrapper = _GUARD_WRAPPER.match(sql)
+    if wrapper:
+        # The cost guard caps statements without a LIMIT of their own
+        sql, limit = wrapper.group("inner").strip(), int(wrapper.group("limit"))
+    tokens = _tokens(sql, params)
+    if tokens is None:
+        return None
+    try:
+        query = _Parser(tokens).parse()
+    except (_Unsupported, IndexError):
+        return None
+    if limit is not None:
+        query.limit = limit if query.limit is None else min(limit, query.limit)
+    return query
+
+
+def _tokens(sql, params) -> Optional[List[Tuple[str, Any]]]:
+    """Significant tokens as (kind, value), with parameters bound as values."""
+    values = iter(params)
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(sql):
+        kind, text = match.lastgroup, match.group()
+        if kind == "comment" or text.isspace():
+            continue
+        if kind == "string":
+            tokens.append(("value", text[1:-1].replace("''", "'")))
+        elif kind == "number":
+            tokens.append(("value", float(text) if "." in text else int(text)))
+        elif kind == "identifier":
+            tokens.append(("word", text[1:-1].lower()))
+        elif kind == "word":
+            tokens.append(("word", text.lower()))
+        elif text == "?":
+            try:
+                tokens.append(("value", next(values)))
+            except StopIteration:
+                return None
+        elif text == "=" and tokens and tokens[-1] in (("op", "<"), ("op", ">")):
+            tokens[-1] = ("op", tokens[-1][1] + "=")
+        elif (
+            text in "=>"
+            and tokens
+            and tokens[-1] in (("op", "="), ("op", "!"), ("op", "<"))
+        ):
+            # ==, !=, <> and friends are left to SQLite
+            return None
+        else:
+            tokens.append(("op", text))
+    if next(values, None) is not None:
+        return None
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return (None, None)
+
+    def take(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def expect(self, kind, value=None):
+        token_kind, token_value = self.take()
+        if token_kind != kind or (value is not None and token_value != value):
+            raise _Unsupported
+        return token_value
+
+    def accept(self, kind, value):
+        if self.peek() == (kind, value):
+            self.position += 1
+            return True
+        return False
+
+    def parse(self) -> ScanQuery:
+        self.expect("word", "select")
+        selected = []
+        if self.accept("op", "*"):
+            selected = None
+        else:
+            selected.append(self.column_reference())
+            while self.accept("op", ","):
+                selected.append(self.column_reference())
+        self.expect("word", "from")
+        if self.expect("word") != TABLE:
+            raise _Unsupported
+        names = {TABLE}
+        if self.accept("word", "as"):
+            names.add(self.expect("word"))
+        elif self.peek()[0] == "word" and self.peek()[1] not in _CLAUSE_WORDS:
+            names.add(self.expect("word"))
+
+        query = ScanQuery(columns=list(COLUMNS))
+        if selected is not None:
+            query.columns = [self.resolve(reference, names) for reference in selected]
+            if len(set(query.columns)) != len(query.columns):
+                raise _Unsupported
+        if self.accept("word", "where"):
+            query.predicates.append(self.predicate(names))
+            while self.accept("word", "and"):
+                query.predicates.append(self.predicate(names))
+        if self.accept("word", "order"):
+            self.expect("word", "by")
+            column = self.resolve(self.column_reference(), names)
+            if column not in _SORTABLE:
+                raise _Unsupported
+            descending = self.accept("word", "desc")
+            if not descending:
+                self.accept("word", "asc")
+            query.order = (column, descending)
+        if self.accept("word", "limit"):
+            limit = self.expect("value")
+            if isinstance(limit, bool) or not isinstance(limit, int) or limit < 0:
+                raise _Unsupported
+            query.limit = limit
+        if self.peek() != (None, None):
+            raise _Unsupported
+        return query
+
+    def column_reference(self):
+        name = self.expect("word")
+        if self.accept("op", "."):
+            return name, self.expect("word")
+        return None, name
+
+    @staticmethod
+    def resolve(reference, names) -> str:
+        qualifier, column = reference
+        if (qualifier is not None and qualifier not in names) or column not in COLUMNS:
+            raise _Unsupported
+        return column
+
+    def predicate(self, names):
+        if self.accept("word", "upper"):
+            self.expect("op", "(")
+            column = self.resolve(self.column_reference(), names)
+            self.expect("op", ")")
+            if column != "company_name":
+                raise _Unsupported
+        else:
+            column = self.resolve(self.column_reference(), names)
+        kind, operator = self.take()
+        operator = operator.upper() if isinstance(operator, str) else operator
+        if kind not in ("op", "word") or operator not in _COMPARISONS:
+            raise _Unsupported
+        if operator not in _SUPPORTED_OPERATORS.get(column, ()):
+            raise _Unsupported
+        if operator == "IN":
+            self.expect("op", "(")
+            values = [self.expect("value")]
+            while self.accept("op", ","):
+                values.append(self.expect("value"))
+            self.expect("op", ")")
+            return column, operator, values
+        if operator == "BETWEEN":
+            low = self.expect("value")
+            self.expect("word", "and")
+            return column, operator, (low, self.expect("value"))
+        return column, operator, self.expect("value")
@@ -1,16 +1,39 @@
+import re
 import sqlite3
 from pathlib import Path
 
 import pandas as pd
 
+from ..config import env_str
+from ..observability import current_span, span
+from .load_report import LoadReport
+from .parquet_mirror import (
+    UNKNOWN_PARTITION,
+    ParquetMirror,
+    filing_quarter,
+    summarize_manifest,
+)
+
+INDEX_NAME = re.compile(r"INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)", re.IGNORECASE)
+
+
+def split_sql_statements(script):
+    """Split a schema script into statements, dropping ``--`` comment lines."""
+    lines = [line for line in script.splitlines() if not line.strip().startswith("--")]
+    return [
+        statement.strip()
+        for statement in "\n".join(lines).split(";")
+        if statement.strip()
+    ]
+
 
 class DataLoaderAgent:
-    def __init__(self, db_path=None, data_folder=None):
+    def __init__(self, db_path=None, data_folder=None, parquet_dir=None):
         # Get project root directory (go up from edgar/services/)
         project_root = Path(__file__).parent.parent.parent
 
-        self.db_path = project_root / "data" / "edgar_filings.db"
-        self.data_folder = project_root / "data" / "edgar_data"
+        self.db_path = Path(db_path or project_root / "data" / "edgar_filings.db")
+        self.data_folder = Path(data_folder or project_root / "data" / "edgar_data")
 
         self.schema_table_file_path = (
             project_root / "data" / "schema" / "schema_table.sql"
@@ -25,13 +48,20 @@ class DataLoaderAgent:
         self.sub_file = self.data_folder / "sub.txt"
         self.pre_file = self.data_folder / "pre.txt"
 
+        # Optional partitioned Parquet copy of every loaded table
+        self.parquet_dir = parquet_dir or env_str("EDGAR_PARQUET_DIR")
+        self.parquet_mirror = None
+        self._submission_quarters = None
+        self._submission_forms = None
+
         self.conn = None
+        self.load_report = None
 
         # Create data folder if it doesn't exist
         self.data_folder.mkdir(parents=True, exist_ok=True)
 
     def init_db(self):
-        # Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
 
         if self.db_path.exists():
             print(f"Database already exists at {self.db_path}.")
@@ -39,6 +69,8 @@ class DataLoaderAgent:
             return self.conn
 
         self.conn = sqlite3.connect(self.db_path)
+        self.load_report = LoadReport()
+        self.parquet_mirror = self._open_mirror()
 
         with open(self.schema_table_file_path, "r") as schema_file:  # noqa: UP015
             schema_sql = schema_file.read()
@@ -46,17 +78,104 @@ class DataLoaderAgent:
             self.conn.commit()
             print("Created database schema from schema_table.sql")
 
-        self.load_master_data()
-        self.load_sub_data()
-        self.load_pre_data()
+        loaders = (
+            ("master_index", self.load_master_data),
+            ("submissions", self.load_sub_data),
+            ("presentation_of_statement", self.load_pre_data),
+        )
+        for table, load in loaders:
+            with span("data_loader.load", table=table):
+                load()
+
+        self.create_indexes()
+        self.load_report.save(self.conn)
+        print(self.load_report.summary())
+        if self.parquet_mirror is not None:
+            print(summarize_manifest(self.parquet_mirror.manifest()))
+        return self.conn
+
+    def mirror_to_parquet(self):
+        """Write the tables of an existing database to the Parquet mirror."""
+        self.parquet_mirror = self._open_mirror()
+        if self.parquet_mirror is None:
+            return None
+        conn = self.connect_read_only()
+        try:
+            for table in ("master_index", "submissions", "presentation_of_statement"):
+                df = pd.read_sql_query(f'SELECT * FROM "{table}"', conn)
+                self._mirror(table, df)
+        finally:
+            conn.close()
+        manifest = self.parquet_mirror.manifest()
+        print(summarize_manifest(manifest))
+        return manifest
+
+    def _open_mirror(self):
+        if not self.parquet_dir:
+            return None
+        try:
+            return ParquetMirror(self.parquet_dir)
+        except RuntimeError as e:
+            print(f"Skipping the Parquet mirror: {e}")
+            return None
+
+    def _mirror(self, table, df, source_bytes=None):
+        if self.parquet_mirror is None:
+            return
+        quarters = None
+        forms = None
+        if table == "submissions" and {"adsh", "filed"} <= set(df.columns):
+            # pre.txt has no dates or forms, so its rows take their submission's values
+            self._submission_quarters = pd.Series(
+                filing_quarter(df["filed"]).to_numpy(), index=df["adsh"]
+            )
+            if "form" in df.columns:
+                self._submission_forms = pd.Series(
+                    df["form"].to_numpy(), index=df["adsh"]
+                )
+        elif table == "presentation_of_statement" and "adsh" in df.columns:
+            if self._submission_quarters is not None:
+                quarters = (
+                    df["adsh"]
+                    .map(self._submission_quarters)
+                    .fillna(UNKNOWN_PARTITION)
+                    .astype(object)
+                )
+            if self._submission_forms is not None:
+                forms = df["adsh"].map(self._submission_forms)
+        with self._measure(table, "mirror", rows=len(df)):
+            self.parquet_mirror.write(
+                table, df, quarters, forms=forms, source_bytes=source_bytes
+            )
 
+    def create_indexes(self):
+        """Create the indexes from schema_index.sql, timing each one."""
         with open(self.schema_index_file_path, "r") as schema_file:  # noqa: UP015
-            schema_sql = schema_file.read()
-            self.conn.executescript(schema_sql)
-            self.conn.commit()
-            print("Created database schema from schema_index.sql")
+            statements = split_sql_statements(schema_file.read())
+        for statement in statements:
+            match = INDEX_NAME.search(statement)
+            target = match.group(1) if match else statement[:40]
+            with self._measure(target, "index"):
+                self.conn.execute(statement)
+        self.conn.commit()
+        print("Created database schema from schema_index.sql")
 
-        return self.conn
+    def _measure(self, target, stage, rows=None, bytes_read=None):
+        if self.load_report is None:
+            self.load_report = LoadReport()
+        return self.load_report.measure(target, stage, rows, bytes_read)
+
+    def connect_read_only(self):
+        """Open a separate read-only connection for executing generated SQL.
+
+        Each connection is used by one thread, but the executor that opened
+        it may close it from another.
+        """
+        return sqlite3.connect(
+            f"{self.db_path.resolve().as_uri()}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+        )
 
     def load_master_data(self) -> bool:
         if not self.master_idx_file.exists():
@@ -65,26 +184,36 @@ class DataLoaderAgent:
             )
 
         print("Loading master index into database...")
-        df = pd.read_csv(
-            self.master_idx_file,
-            sep="|",
-            encoding="latin-1",
-            skiprows=10,
-            names=["cik", "company_name", "form_type", "date_filed", "filename"],
-            dtype={
-                "cik": str,
-                "company_name": str,
-                "form_type": str,
-                "date_filed": str,
-                "filename": str,
-            },
-            low_memory=False,
-        )
+        with self._measure(
+            "master.idx", "parse", bytes_read=self.master_idx_file.stat().st_size
+        ) as stage:
+            df = pd.read_csv(
+                self.master_idx_file,
+                sep="|",
+                encoding="latin-1",
+                skiprows=10,
+                names=["cik", "company_name", "form_type", "date_filed", "filename"],
+                dtype={
+                    "cik": str,
+                    "company_name": str,
+                    "form_type": str,
+                    "date_filed": str,
+                    "filename": str,
+                },
+                low_memory=False,
+            )
+            stage.rows = len(df)
 
         # Convert CIK from string to integer, removing leading zeros
-        df["cik"] = pd.to_numeric(df["cik"], errors="coerce").astype("Int64")
+        with self._measure("master.idx", "convert", rows=len(df)):
+            df["cik"] = pd.to_numeric(df["cik"], errors="coerce").astype("Int64")
 
-        df.to_sql("master_index", self.conn, if_exists="replace", index=False)
+        current_span().set_attribute("rows", len(df))
+        with self._measure("master_index", "insert", rows=len(df)):
+            df.to_sql("master_index", self.conn, if_exists="replace", index=False)
+        self._mirror(
+            "master_index", df, source_bytes=self.master_idx_file.stat().st_size
+        )
         print("Master index loaded into database.")
         return True
 
@@ -94,10 +223,22 @@ class DataLoaderAgent:
         if not pre_file.exists():
             raise FileNotFoundError(f"Pre file not found: {pre_file}")
 
-        df = pd.read_csv(pre_file, sep="\t", dtype=str, low_memory=False)
+        with self._measure(
+            "pre.txt", "parse", bytes_read=pre_file.stat().st_size
+        ) as stage:
+            df = pd.read_csv(pre_file, sep="\t", dtype=str, low_memory=False)
+            stage.rows = len(df)
 
-        df.to_sql(
-            "presentation_of_statement", self.conn, if_exists="replace", index=False
+        current_span().set_attribute("rows", len(df))
+        with self._measure("presentation_of_statement", "insert", rows=len(df)):
+            df.to_sql(
+                "presentation_of_statement",
+                self.conn,
+                if_exists="replace",
+                index=False,
+            )
+        self._mirror(
+            "presentation_of_statement", df, source_bytes=pre_file.stat().st_size
         )
         print("Presentation of statement data loaded into database.")
         return True
@@ -109,12 +250,20 @@ class DataLoaderAgent:
         if not sub_file.exists():
             raise FileNotFoundError(f"Sub file not found: {sub_file}")
 
-        df = pd.read_csv(sub_file, sep="\t", dtype=str, low_memory=False)
+        with self._measure(
+            "sub.txt", "parse", bytes_read=sub_file.stat().st_size
+        ) as stage:
+            df = pd.read_csv(sub_file, sep="\t", dtype=str, low_memory=False)
+            stage.rows = len(df)
 
         # Convert CIK from string to integer, removing leading zeros
         if "cik" in df.columns:
-            df["cik"] = pd.to_numeric(df["cik"], errors="coerce").astype("Int64")
+            with self._measure("sub.txt", "convert", rows=len(df)):
+                df["cik"] = pd.to_numeric(df["cik"], errors="coerce").astype("Int64")
 
-        df.to_sql("submissions", self.conn, if_exists="replace", index=False)
+        current_span().set_attribute("rows", len(df))
+        with self._measure("submissions", "insert", rows=len(df)):
+            df.to_sql("submissions", self.conn, if_exists="replace", index=False)
+        self._mirror("submissions", df, source_bytes=sub_file.stat().st_size)
         print("Submission data loaded into database.")
         return True
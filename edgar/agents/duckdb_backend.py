@@ -0,0 +1,326 @@
+"""DuckDB as an analytical backend next to SQLite.
+
+DuckDB reads the same tables, either by attaching the SQLite database
+read-only or from a directory of Parquet files. BackendRouter sends
+aggregates over large tables and full scans of them to DuckDB and leaves
+point lookups on SQLite, which answers those from its indexes faster than
+a column store can.
+
+Generated SQL is written for SQLite, and every statement is still checked
+by the read-only authorizer and cost guard on SQLite before it is routed.
+translate_sql rewrites the dialect differences that would change an answer
+and raises DialectError for SQL it cannot translate, which then runs on
+SQLite.
+
+DuckDB is an optional dependency (``uv sync --extra duckdb``).
+"""
+
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Set
+
+import pandas as pd
+
+from ..config import env_str
+from .parquet_mirror import PARTITION_KEYS
+from .query_guard import GuardDecision, strip_sql, table_aliases
+from .sql_templates import _TOKEN_PATTERN
+
+try:
+    import duckdb
+except ImportError:  # Optional: only needed for the analytical backend
+    duckdb = None
+
+ROUTING_MODES = ("auto", "always")
+_ROWID_NAMES = {"ROWID", "OID", "_ROWID_"}
+# SQLite functions DuckDB lacks or answers differently
+_UNSUPPORTED_FUNCTIONS = {
+    "CHANGES",
+    "CHAR",
+    "DATE",
+    "DATETIME",
+    "FORMAT",
+    "GLOB",
+    "HEX",
+    "IIF",
+    "JULIANDAY",
+    "LAST_INSERT_ROWID",
+    "LIKELIHOOD",
+    "LIKELY",
+    "PRINTF",
+    "QUOTE",
+    "RANDOMBLOB",
+    "SOUNDEX",
+    "TIME",
+    "TIMEDIFF",
+    "TOTAL",
+    "TYPEOF",
+    "UNHEX",
+    "UNICODE",
+    "UNIXEPOCH",
+    "UNLIKELY",
+    "ZEROBLOB",
+}
+# SQLite's INTEGER is 64-bit and its REAL is a double; DuckDB's are narrower
+_CAST_TYPES = {"INT": "BIGINT", "INTEGER": "BIGINT", "REAL": "DOUBLE"}
+_STRFTIME_FORMAT = re.compile(r"^'(?:[^%']|%[YmdHMS%])*'$")
+_AGGREGATE_PATTERN = re.compile(
+    r"\b(?:COUNT|SUM|AVG|MIN|MAX|TOTAL|GROUP_CONCAT)\s*\(|\bGROUP\s+BY\b",
+    re.IGNORECASE,
+)
+
+
+class DialectError(ValueError):
+    pass
+
+
+@dataclass
+class Route:
+    backend: str
+    sql_query: str
+    reason: str
+
+
+def translate_sql(sql_query: str) -> str:
+    """Rewrite SQLite SQL for DuckDB; raises DialectError when it cannot.
+
+    LIKE becomes ILIKE (SQLite's LIKE ignores ASCII case), ``IS <value>``
+    becomes ``IS NOT DISTINCT FROM``, bracketed and backquoted identifiers
+    are double-quoted, casts keep SQLite's 64-bit integers and doubles, and
+    ``strftime(format, value)`` swaps its arguments. Scalar ``min(a, b)``
+    and ``max(a, b)`` are refused. The backend enables DuckDB's integer
+    division and SQLite's NULL ordering, so ``/`` and ``ORDER BY`` behave as
+    they do in SQLite.
+    """
+    tokens = [
+        (match.lastgroup, match.group())
+        for match in _TOKEN_PATTERN.finditer(strip_sql(sql_query))
+    ]
+    significant = [
+        index
+        for index, (kind, text) in enumerate(tokens)
+        if kind != "comment" and not text.isspace()
+    ]
+
+    def after(index, steps=1):
+        position = significant.index(index) + steps
+        if position < len(significant):
+            return tokens[significant[position]][1].upper()
+        return ""
+
+    def before(index):
+        position = significant.index(index) - 1
+        return tokens[significant[position]][1].upper() if position >= 0 else ""
+
+    parts: List[str] = []
+    skip_to = -1
+    for index, (kind, text) in enumerate(tokens):
+        if index <= skip_to:
+            continue
+        upper = text.upper()
+        if kind == "identifier" and text[0] in "[`":
+            parts.append('"' + text[1:-1].replace('"', '""') + '"')
+        elif kind != "word":
+            parts.append(text)
+        elif upper in _ROWID_NAMES:
+            raise DialectError("rowid is not available in DuckDB")
+        elif after(index) == "(" and upper in _UNSUPPORTED_FUNCTIONS:
+            raise DialectError(f"{text}() has no DuckDB equivalent")
+        elif after(index) == "(" and upper == "STRFTIME":
+            text, skip_to = _strftime(tokens, significant, index)
+            parts.append(text)
+        elif (
+            after(index) == "("
+            and upper in ("MIN", "MAX")
+            and len(_arguments(tokens, significant, index)[0]) > 1
+        ):
+            # min(a, b) is a scalar in SQLite but an aggregate (arg_min) in DuckDB
+            raise DialectError(f"Scalar {text}() has no DuckDB equivalent")
+        elif upper == "LIKE":
+            parts.append("ILIKE")
+        elif upper in _CAST_TYPES and before(index) == "AS":
+            parts.append(_CAST_TYPES[upper])
+        elif upper == "IS" and after(index) not in ("NULL", "NOT", "TRUE", "FALSE"):
+            parts.append("IS NOT DISTINCT FROM")
+        elif (
+            upper == "IS"
+            and after(index) == "NOT"
+            and after(index, 2) not in ("NULL", "TRUE", "FALSE")
+        ):
+            parts.append("IS DISTINCT FROM")
+            skip_to = significant[significant.index(index) + 1]
+        else:
+            parts.append(text)
+    return "".join(parts)
+
+
+def _arguments(tokens, significant, index):
+    """Token indexes of each argument of the call at ``index``, and its ``)``."""
+    position = significant.index(index) + 2
+    depth = 0
+    arguments = [[]]
+    for token_index in significant[position:]:
+        text = tokens[token_index][1]
+        if text == "(":
+            depth += 1
+        elif text == ")" and depth == 0:
+            break
+        elif text == ")":
+            depth -= 1
+        if text == "," and depth == 0:
+            arguments.append([])
+        else:
+            arguments[-1].append(token_index)
+    else:
+        raise DialectError(f"Unbalanced {tokens[index][1]}() call")
+    return arguments, token_index
+
+
+def _strftime(tokens, significant, index):
+    """Translate ``strftime('<format>', <value>)`` starting at ``index``."""
+    arguments, end = _arguments(tokens, significant, index)
+    if len(arguments) != 2 or len(arguments[0]) != 1 or not arguments[1]:
+        raise DialectError("strftime() with modifiers has no DuckDB equivalent")
+    fmt = tokens[arguments[0][0]][1]
+    if not _STRFTIME_FORMAT.match(fmt):
+        raise DialectError(f"strftime() format {fmt} has no DuckDB equivalent")
+    value_tokens = range(arguments[1][0], arguments[1][-1] + 1)
+    value = translate_sql("".join(tokens[i][1] for i in value_tokens))
+    return f"strftime(CAST({value} AS TIMESTAMP), {fmt})", end
+
+
+class DuckDBBackend:
+    """Runs SQL on DuckDB over the SQLite database or a Parquet directory.
+
+    A Parquet directory holds ``<table>.parquet`` files or ``<table>/``
+    directories of (possibly hive-partitioned) Parquet files, one per table.
+    Each thread uses its own cursor on one shared in-memory database.
+    """
+
+    name = "duckdb"
+
+    def __init__(self, db_path=None, parquet_dir=None, threads=None):
+        if duckdb is None:
+            raise RuntimeError(
+                "The DuckDB backend requires the optional duckdb package"
+            )
+        if db_path is None and parquet_dir is None:
+            raise ValueError("Either db_path or parquet_dir is required")
+        self.conn = duckdb.connect(":memory:")
+        if threads:
+            self.conn.execute(f"SET threads = {int(threads)}")
+        # Match SQLite: integer / integer truncates, and NULLs sort first
+        # ascending and last descending (DuckDB puts them last by default)
+        self.conn.execute("SET integer_division = true")
+        self.conn.execute("SET default_null_order = 'nulls_first_on_asc_last_on_desc'")
+        if parquet_dir is not None:
+            self._register_parquet(Path(parquet_dir))
+        else:
+            self.conn.execute(
+                f"ATTACH {_quote(str(db_path))} AS edgar (TYPE sqlite, READ_ONLY)"
+            )
+            self.conn.execute("USE edgar")
+        self.tables: Set[str] = {
+            row[0].lower() for row in self.conn.execute("SHOW TABLES").fetchall()
+        }
+        self._local = threading.local()
+
+    def _register_parquet(self, folder: Path):
+        for path in sorted(folder.iterdir()):
+            if path.is_dir():
+                source = (
+                    f"read_parquet({_quote(str(path / '**' / '*.parquet'))}, "
+                    "hive_partitioning = true)"
+                )
+                # Derived partition keys of a ParquetMirror are not table columns
+                keys = [key for key in PARTITION_KEYS if any(path.glob(f"**/{key}=*"))]
+                if keys:
+                    source = f"(SELECT * EXCLUDE ({', '.join(keys)}) FROM {source})"
+            elif path.suffix == ".parquet":
+                source = f"read_parquet({_quote(str(path))})"
+            else:
+                continue
+            table = path.name.split(".", 1)[0]
+            self.conn.execute(f'CREATE VIEW "{table}" AS SELECT * FROM {source}')
+
+    def cursor(self):
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            cursor = self._local.cursor = self.conn.cursor()
+        return cursor
+
+    def read(self, sql_query, params=(), timeout_seconds=None) -> pd.DataFrame:
+        """Run translated SQL; raises TimeoutError past ``timeout_seconds``."""
+        cursor = self.cursor()
+        timer = None
+        if timeout_seconds:
+            timer = threading.Timer(timeout_seconds, cursor.interrupt)
+            timer.daemon = True
+            timer.start()
+        try:
+            return cursor.execute(sql_query, list(params)).df()
+        except duckdb.InterruptException as e:
+            raise TimeoutError("interrupted") from e
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+    def close(self):
+        self.conn.close()
+
+
+class BackendRouter:
+    """Chooses SQLite or the analytical backend for each reviewed statement.
+
+    In ``auto`` mode, statements that aggregate over a large table or scan
+    one in full go to the analytical backend and everything else stays on
+    SQLite. ``always`` sends every statement the backend can run, which the
+    benchmarks use to compare the two.
+    """
+
+    def __init__(self, backend, mode=None):
+        self.backend = backend
+        self.mode = mode or env_str("EDGAR_BACKEND_ROUTING", "auto")
+        if self.mode not in ROUTING_MODES:
+            raise ValueError(
+                f"Unknown backend routing mode {self.mode!r}; "
+                f"expected one of {', '.join(ROUTING_MODES)}"
+            )
+
+    def route(self, decision: GuardDecision, large_tables: List[str]) -> Route:
+        sql = decision.sql_query
+        if self.mode == "auto":
+            reason = self._analytical_reason(decision, large_tables)
+            if reason is None:
+                return Route("sqlite", sql, "point lookup")
+        else:
+            reason = "routing mode is always"
+        missing = {
+            table.lower() for table in table_aliases(sql).values()
+        } - self.backend.tables
+        if missing:
+            return Route(
+                "sqlite",
+                sql,
+                f"{', '.join(sorted(missing))} not in {self.backend.name}",
+            )
+        try:
+            return Route(self.backend.name, translate_sql(sql), reason)
+        except DialectError as e:
+            return Route("sqlite", sql, str(e))
+
+    @staticmethod
+    def _analytical_reason(decision, large_tables) -> Optional[str]:
+        if not large_tables:
+            return None
+        if any(note.startswith("Full scan of large table") for note in decision.notes):
+            return "full scan of a large table"
+        if _AGGREGATE_PATTERN.search(decision.sql_query):
+            return f"aggregate over {', '.join(large_tables)}"
+        return None
+
+
+def _quote(text: str) -> str:
+    return "'" + text.replace("'", "''") + "'"
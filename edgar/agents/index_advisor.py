@@ -0,0 +1,192 @@
+import re
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from .query_guard import table_aliases
+
+_SCAN_PATTERN = re.compile(r"^SCAN (?:TABLE )?(?P<name>\w+)(?: AS (?P<alias>\w+))?$")
+_AUTOMATIC_INDEX_PATTERN = re.compile(
+    r"^SEARCH (?:TABLE )?(?P<name>\w+)(?: AS (?P<alias>\w+))? USING AUTOMATIC "
+    r"(?:PARTIAL )?(?:COVERING )?INDEX \((?P<columns>[^)]*)\)"
+)
+_EQUALITY_PATTERN = re.compile(
+    r"(?:\b(?P<qualifier>\w+)\.)?\b(?P<column>\w+)\s*(?:==?|\bIN\b)", re.IGNORECASE
+)
+_RANGE_PATTERN = re.compile(
+    r"(?:\b(?P<qualifier>\w+)\.)?\b(?P<column>\w+)\s*(?:<=|>=|<|>|\bBETWEEN\b)",
+    re.IGNORECASE,
+)
+_ORDER_BY_PATTERN = re.compile(
+    r"\bORDER\s+BY\s+(?:(?P<qualifier>\w+)\.)?(?P<column>\w+)", re.IGNORECASE
+)
+_SELECT_LIST_PATTERN = re.compile(
+    r"^\s*SELECT\s+(?:DISTINCT\s+)?(?P<columns>.*?)\s+FROM\b", re.IGNORECASE | re.DOTALL
+)
+MAX_COVERING_COLUMNS = 4
+MEASURE_RUNS = 3
+
+
+@dataclass
+class IndexRecommendation:
+    table: str
+    columns: Tuple[str, ...]
+    occurrences: int = 0
+    total_ms: float = 0.0
+    example_queries: List[Tuple[str, Tuple]] = field(default_factory=list)
+    before_ms: Optional[float] = None
+    after_ms: Optional[float] = None
+
+    @property
+    def name(self) -> str:
+        return f"idx_advisor_{self.table}_{'_'.join(self.columns)}".lower()
+
+    @property
+    def statement(self) -> str:
+        return (
+            f"CREATE INDEX IF NOT EXISTS {self.name} "
+            f"ON {self.table}({', '.join(self.columns)})"
+        )
+
+
+class IndexAdvisorAgent:
+    """Proposes indexes for the full-scan patterns recorded in the slow-query log."""
+
+    def __init__(self, conn, slow_query_log):
+        self.conn = conn
+        self.slow_query_log = slow_query_log
+        self._columns: Dict[str, List[str]] = {}
+
+    def table_columns(self, table: str) -> List[str]:
+        if table not in self._columns:
+            rows = self.conn.execute(f'PRAGMA table_info("{table}")').fetchall()
+            self._columns[table] = [row[1] for row in rows]
+        return self._columns[table]
+
+    def indexed_prefixes(self, table: str) -> List[Tuple[str, ...]]:
+        prefixes = []
+        for index in self.conn.execute(f'PRAGMA index_list("{table}")').fetchall():
+            columns = self.conn.execute(f'PRAGMA index_info("{index[1]}")').fetchall()
+            prefixes.append(tuple(column[2].lower() for column in columns))
+        return prefixes
+
+    def recommend(self, top=5, since=None) -> List[IndexRecommendation]:
+        candidates: Dict[Tuple[str, Tuple[str, ...]], IndexRecommendation] = {}
+        for entry in self.slow_query_log.entries(since=since):
+            for table, columns in self.candidate_indexes(
+                entry.sql_query, entry.query_plan
+            ):
+                key = (table, columns)
+                recommendation = candidates.setdefault(
+                    key, IndexRecommendation(table=table, columns=columns)
+                )
+                recommendation.occurrences += 1
+                recommendation.total_ms += entry.elapsed_ms
+                example = (entry.sql_query, entry.params)
+                if example not in recommendation.example_queries:
+                    recommendation.example_queries.append(example)
+
+        ranked = sorted(
+            candidates.values(),
+            key=lambda rec: (rec.occurrences, rec.total_ms),
+            reverse=True,
+        )
+        return [rec for rec in ranked if not self.is_already_indexed(rec)][:top]
+
+    def is_already_indexed(self, recommendation: IndexRecommendation) -> bool:
+        wanted = tuple(column.lower() for column in recommendation.columns)
+        return any(
+            prefix[: len(wanted)] == wanted
+            for prefix in self.indexed_prefixes(recommendation.table)
+        )
+
+    def candidate_indexes(
+        self, sql_query, query_plan
+    ) -> List[Tuple[str, Tuple[str, ...]]]:
+        aliases = table_aliases(sql_query)
+        candidates = []
+        for line in query_plan:
+            detail = line.strip()
+            automatic = _AUTOMATIC_INDEX_PATTERN.match(detail)
+            if automatic:
+                table = self._resolve(automatic, aliases)
+                columns = tuple(
+                    part.split("=")[0].strip()
+                    for part in automatic.group("columns").split(" AND ")
+                )
+                candidates.append((table, columns))
+                continue
+
+            scan = _SCAN_PATTERN.match(detail)
+            if not scan:
+                continue
+            table = self._resolve(scan, aliases)
+            columns = self.predicate_columns(sql_query, table, aliases)
+            if columns:
+                candidates.append((table, columns))
+        return candidates
+
+    def predicate_columns(self, sql_query, table, aliases) -> Tuple[str, ...]:
+        """Equality columns first, then one range or sort column, then covering columns."""
+        known = {column.lower(): column for column in self.table_columns(table)}
+
+        def columns_for(pattern):
+            found = []
+            for match in pattern.finditer(sql_query):
+                qualifier = match.group("qualifier")
+                if (
+                    qualifier
+                    and aliases.get(qualifier.lower(), "").lower() != table.lower()
+                ):
+                    continue
+                column = known.get(match.group("column").lower())
+                if column and column not in found:
+                    found.append(column)
+            return found
+
+        columns = columns_for(_EQUALITY_PATTERN)
+        for column in columns_for(_RANGE_PATTERN) + columns_for(_ORDER_BY_PATTERN):
+            if column not in columns:
+                columns.append(column)
+                break
+        if not columns:
+            return ()
+
+        selected = self.selected_columns(sql_query, known)
+        if selected and len(set(columns) | set(selected)) <= MAX_COVERING_COLUMNS:
+            columns.extend(column for column in selected if column not in columns)
+        return tuple(columns)
+
+    def selected_columns(self, sql_query, known) -> List[str]:
+        match = _SELECT_LIST_PATTERN.match(sql_query)
+        if not match or "*" in match.group("columns"):
+            return []
+        names = re.findall(r"\b\w+\b", match.group("columns"))
+        return [known[name.lower()] for name in names if name.lower() in known]
+
+    def apply(self, recommendation: IndexRecommendation, measure=True):
+        """Create the index and, optionally, time its example queries before and after."""
+        if measure:
+            recommendation.before_ms = self.measure(recommendation.example_queries)
+        self.conn.execute(recommendation.statement)
+        self.conn.execute(f"ANALYZE {recommendation.table}")
+        self.conn.commit()
+        if measure:
+            recommendation.after_ms = self.measure(recommendation.example_queries)
+        return recommendation
+
+    def measure(self, queries) -> float:
+        """Median wall time in milliseconds to run all given queries once."""
+        timings = []
+        for _ in range(MEASURE_RUNS):
+            started = time.perf_counter()
+            for sql_query, params in queries:
+                self.conn.execute(sql_query, params).fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    @staticmethod
+    def _resolve(match, aliases) -> str:
+        name = match.group("alias") or match.group("name")
+        return aliases.get(name.lower(), match.group("name"))
@@ -0,0 +1,218 @@
+import os
+import random
+import threading
+import time
+
+import openai
+from openai import OpenAI
+
+from ..config import env_float, env_int, env_str
+from ..observability import record_llm_usage
+
+DEFAULT_MODEL = "gpt-4o-mini"
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.InternalServerError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+)
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_CAP_SECONDS = 20.0
+
+
+class LLMUnavailableError(Exception):
+    """The LLM could not be reached within the retry and breaker policy."""
+
+
+class CircuitOpenError(LLMUnavailableError):
+    """Calls are short-circuited while the provider is known to be failing."""
+
+
+class TokenBucket:
+    """Blocking token bucket refilled continuously at ``rate`` tokens per second."""
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("Token bucket rate must be positive")
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures and lets one probe through after a cool-down."""
+
+    def __init__(self, failure_threshold, reset_seconds):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            # Open, or half open with a probe in flight: one new probe per cool-down
+            if time.monotonic() - self._opened_at < self.reset_seconds:
+                return False
+            self.state = "half_open"
+            self._opened_at = time.monotonic()
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+
+class LLMClient:
+    """Chat-completions client shared by the agents.
+
+    Bounds concurrency with a semaphore, paces calls with a token bucket,
+    retries 429/5xx/timeouts with jittered exponential backoff and stops
+    calling a failing provider through a circuit breaker.
+    """
+
+    def __init__(
+        self,
+        api_key=None,
+        base_url=None,
+        model=None,
+        max_concurrency=None,
+        requests_per_second=None,
+        max_retries=None,
+        timeout_seconds=None,
+        breaker_failures=None,
+        breaker_reset_seconds=None,
+        client=None,
+    ):
+        self.base_url = base_url or env_str("EDGAR_LLM_BASE_URL")
+        # Local OpenAI-compatible servers usually accept any key
+        api_key = (
+            api_key
+            or os.getenv("OPENAI_API_KEY")
+            or ("local" if self.base_url else None)
+        )
+        self.model = model or env_str("EDGAR_LLM_MODEL", DEFAULT_MODEL)
+        self.max_retries = (
+            max_retries
+            if max_retries is not None
+            else env_int("EDGAR_LLM_MAX_RETRIES", 3)
+        )
+        self.timeout_seconds = timeout_seconds or env_float(
+            "EDGAR_LLM_TIMEOUT_SECONDS", 30.0
+        )
+        self._semaphore = threading.BoundedSemaphore(
+            max_concurrency or env_int("EDGAR_LLM_MAX_CONCURRENCY", 4)
+        )
+        self._bucket = TokenBucket(
+            requests_per_second or env_float("EDGAR_LLM_REQUESTS_PER_SECOND", 5.0)
+        )
+        self.breaker = CircuitBreaker(
+            breaker_failures or env_int("EDGAR_LLM_BREAKER_FAILURES", 5),
+            breaker_reset_seconds or env_float("EDGAR_LLM_BREAKER_RESET_SECONDS", 30.0),
+        )
+        self.client = client
+        if self.client is None and api_key:
+            # Retries are handled here so the SDK must not retry on its own
+            self.client = OpenAI(
+                api_key=api_key,
+                base_url=self.base_url,
+                max_retries=0,
+                timeout=self.timeout_seconds,
+            )
+
+    @property
+    def available(self) -> bool:
+        return self.client is not None
+
+    def chat(self, messages, max_tokens, temperature=None):
+        """Return the chat completion response or raise LLMUnavailableError."""
+        if not self.available:
+            raise LLMUnavailableError("No LLM configured")
+        if not self.breaker.allow():
+            raise CircuitOpenError("LLM circuit breaker is open")
+
+        options = {} if temperature is None else {"temperature": temperature}
+        attempt = 0
+        while True:
+            try:
+                with self._semaphore:
+                    self._bucket.acquire()
+                    response = self.client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        max_tokens=max_tokens,
+                        timeout=self.timeout_seconds,
+                        **options,
+                    )
+            except RETRYABLE_ERRORS as e:
+                if attempt >= self.max_retries:
+                    self.breaker.record_failure()
+                    raise LLMUnavailableError(
+                        f"LLM call failed after {attempt + 1} attempts: {e}"
+                    ) from e
+                time.sleep(self.backoff_seconds(attempt, e))
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            record_llm_usage(getattr(response, "usage", None))
+            return response
+
+    @staticmethod
+    def backoff_seconds(attempt, error=None) -> float:
+        """Full-jitter exponential backoff, honouring Retry-After when present."""
+        retry_after = _retry_after_seconds(error)
+        if retry_after is not None:
+            return min(retry_after, BACKOFF_CAP_SECONDS)
+        return random.uniform(
+            0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2**attempt)
+        )
+
+
+def _retry_after_seconds(error):
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def default_llm_client() -> LLMClient:
+    """Process-wide client so all agents share one concurrency and rate budget."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = LLMClient()
+        return _default_client
@@ -0,0 +1,230 @@
+"""Per-stage timings, throughput and memory of a database build."""
+
+import sqlite3
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import pandas as pd
+
+from ..config import env_bool
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+REPORT_TABLE = "build_report"
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process so far."""
+    peak = _linux_peak_rss()
+    if peak is not None or resource is None:
+        return peak
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _linux_peak_rss() -> Optional[int]:
+    """VmHWM from /proc, where available.
+
+    Linux keeps ru_maxrss across fork and exec, so a new process started by
+    a large one would report its parent's peak; VmHWM starts again with the
+    new program.
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+@dataclass
+class LoadStage:
+    target: str
+    stage: str
+    seconds: float = 0.0
+    rows: Optional[int] = None
+    bytes_read: Optional[int] = None
+    peak_memory_bytes: Optional[int] = None
+    # The whole process's peak RSS when the stage ended, not the stage's own
+    process_peak_rss_bytes: Optional[int] = None
+
+    @property
+    def rows_per_second(self) -> Optional[float]:
+        if self.rows is None or self.seconds <= 0:
+            return None
+        return self.rows / self.seconds
+
+
+@dataclass
+class LoadReport:
+    """Collects one LoadStage per measured step of a build.
+
+    Python-level peak memory per stage comes from tracemalloc, which slows
+    parsing noticeably, so it is only traced when ``trace_memory`` is set
+    (default from EDGAR_LOAD_TRACE_MEMORY). The process's peak RSS so far is
+    always recorded after each stage; it is a running maximum over the build,
+    so every stage after the largest one shows that same peak.
+    """
+
+    build_id: str = field(
+        default_factory=lambda: datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    )
+    trace_memory: Optional[bool] = None
+    stages: List[LoadStage] = field(default_factory=list)
+
+    def __post_init__(self):
+        if self.trace_memory is None:
+            self.trace_memory = env_bool("EDGAR_LOAD_TRACE_MEMORY")
+
+    @contextmanager
+    def measure(self, target, stage, rows=None, bytes_read=None):
+        """Time the enclosed block; set ``rows`` on the yielded stage if known later."""
+        record = LoadStage(target, stage, rows=rows, bytes_read=bytes_read)
+        started_tracing = False
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            elif hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+            # Before Python 3.9 the peak of a stage nested in another one
+            # includes the enclosing stage's peak so far
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.seconds = time.perf_counter() - started
+            if self.trace_memory:
+                record.peak_memory_bytes = tracemalloc.get_traced_memory()[1]
+                if started_tracing:
+                    tracemalloc.stop()
+            record.process_peak_rss_bytes = peak_rss_bytes()
+            self.stages.append(record)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(stage.seconds for stage in self.stages)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            [
+                {
+                    "target": stage.target,
+                    "stage": stage.stage,
+                    "seconds": stage.seconds,
+                    "rows": stage.rows,
+                    "rows_per_second": stage.rows_per_second,
+                    "bytes_read": stage.bytes_read,
+                    "peak_memory_bytes": stage.peak_memory_bytes,
+                    "process_peak_rss_bytes": stage.process_peak_rss_bytes,
+                }
+                for stage in self.stages
+            ]
+        )
+
+    def save(self, conn: sqlite3.Connection):
+        """Append this build's stages to the build report table."""
+        conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {REPORT_TABLE} (
+                build_id TEXT NOT NULL,
+                target TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                seconds REAL NOT NULL,
+                rows INTEGER,
+                rows_per_second REAL,
+                bytes_read INTEGER,
+                peak_memory_bytes INTEGER,
+                process_peak_rss_bytes INTEGER
+            )
+            """
+        )
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({REPORT_TABLE})")}
+        if "peak_rss_bytes" in columns:
+            # Reports saved before the column said it was the process-wide peak
+            conn.execute(
+                f"ALTER TABLE {REPORT_TABLE} "
+                "RENAME COLUMN peak_rss_bytes TO process_peak_rss_bytes"
+            )
+        conn.executemany(
+            f"INSERT INTO {REPORT_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    self.build_id,
+                    stage.target,
+                    stage.stage,
+                    stage.seconds,
+                    stage.rows,
+                    stage.rows_per_second,
+                    stage.bytes_read,
+                    stage.peak_memory_bytes,
+                    stage.process_peak_rss_bytes,
+                )
+                for stage in self.stages
+            ],
+        )
+        conn.commit()
+
+    @classmethod
+    def latest(cls, conn: sqlite3.Connection) -> Optional["LoadReport"]:
+        """The most recent build recorded in the database, if any."""
+        try:
+            rows = conn.execute(
+                f"SELECT build_id, target, stage, seconds, rows, bytes_read, "
+                f"peak_memory_bytes, process_peak_rss_bytes FROM {REPORT_TABLE} "
+                f"WHERE build_id = (SELECT MAX(build_id) FROM {REPORT_TABLE}) "
+                "ORDER BY rowid"
+            ).fetchall()
+        except sqlite3.OperationalError:
+            return None
+        if not rows:
+            return None
+        report = cls(build_id=rows[0][0], trace_memory=False)
+        report.stages = [LoadStage(*row[1:]) for row in rows]
+        return report
+
+    def summary(self) -> str:
+        """Human-readable table of the stages, slowest first."""
+        if not self.stages:
+            return "No load stages recorded"
+        frame = self.to_frame().sort_values("seconds", ascending=False)
+        table = pd.DataFrame(
+            {
+                "target": frame["target"],
+                "stage": frame["stage"],
+                "seconds": frame["seconds"].map("{:.2f}".format),
+                "rows": frame["rows"].map(_count),
+                "rows/s": frame["rows_per_second"].map(_count),
+                "read": frame["bytes_read"].map(_size),
+                "peak mem": frame["peak_memory_bytes"].map(_size),
+                "process peak rss so far": frame["process_peak_rss_bytes"].map(_size),
+            }
+        )
+        return (
+            f"Build {self.build_id}: {len(self.stages)} stages in "
+            f"{self.total_seconds:.1f}s\n{table.to_string(index=False)}"
+        )
+
+
+def _count(value) -> str:
+    return "-" if pd.isna(value) else f"{value:,.0f}"
+
+
+def _size(value) -> str:
+    if pd.isna(value):
+        return "-"
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024 or unit == "GB":
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
@@ -1,25 +1,41 @@
-import os
+from ..observability import current_span, span
+from .llm_client import LLMUnavailableError, default_llm_client
+from .result_summarizer import ResultSummarizer
 
-from openai import OpenAI
+LOCAL_TABLE_ROWS = 20
+
+
+def render_local_markdown(df):
+    """Answer without the LLM: row count plus the leading rows as a table."""
+    if df.empty:
+        return (
+            "**Answer:** No results found.\n\nThe query returned no matching records."
+        )
+    shown = df.head(LOCAL_TABLE_ROWS)
+    note = "" if len(df) <= LOCAL_TABLE_ROWS else f" (showing first {len(shown)})"
+    return (
+        f"**Answer:** The query returned {len(df)} rows{note}.\n\n"
+        f"{shown.to_markdown(index=False)}"
+    )
 
 
 class MarkdownResponderAgent:
-    def __init__(self):
-        self.openai_client = None
-        api_key = os.getenv("OPENAI_API_KEY")
-        if api_key:
-            self.openai_client = OpenAI(api_key=api_key)
+    def __init__(self, llm_client=None, summarizer=None):
+        self.llm_client = llm_client or default_llm_client()
+        self.summarizer = summarizer or ResultSummarizer()
 
     def generate_markdown_response(self, user_query, sql_query, df):
-        if not self.openai_client:
-            return "", "No LLM configured - using fallback response"
+        with span("markdown_responder.generate", row_count=len(df)):
+            return self._generate(user_query, sql_query, df)
+
+    def _generate(self, user_query, sql_query, df):
+        if not self.llm_client.available:
+            fallback_prompt = "No LLM configured - using fallback response"
+            return render_local_markdown(df), fallback_prompt
 
-        if df.empty:
-            data_summary = "No results found"
-        elif len(df) <= 20:  # Increased from 5 to 20 to give LLM full data to work with
-            data_summary = f"Full data:\n{df.to_string(index=False)}"
-        else:
-            data_summary = f"Found {len(df)} rows. Sample data:\n{df.head(5).to_string(index=False)}"
+        summary = self.summarizer.summarize(user_query, df)
+        current_span().set_attribute("summary_tokens", summary.tokens)
+        data_summary = summary.text
 
         prompt = f"""
         You are an expert SEC filing analyst. Given the user's question, SQL query, and data results, provide a crisp, direct answer and a brief explanation.
@@ -35,8 +51,7 @@ class MarkdownResponderAgent:
         4. If there are no results, state so clearly in the Answer section.
         """
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o-mini",
+            response = self.llm_client.chat(
                 messages=[
                     {
                         "role": "system",
@@ -50,7 +65,9 @@ class MarkdownResponderAgent:
 
             markdown_response = response.choices[0].message.content
             return markdown_response, prompt
+        except LLMUnavailableError as e:
+            print(f"LLM unavailable, rendering answer locally: {e}")
+            return render_local_markdown(df), prompt
         except Exception as e:
             print(f"Error generating markdown response: {e}")
-            fallback_response = "**Answer:** No results found.\n\n**Explanation:**\nThere were no matching records for your query."
-            return fallback_response, prompt
+            return render_local_markdown(df), prompt
@@ -0,0 +1,392 @@
+"""Keyset pagination over the SQL that answered a question.
+
+A single-table SELECT is rewritten to order by its own ORDER BY columns plus
+the rowid, and each follow-up page asks for the rows after the last key seen
+instead of using OFFSET. The rows after a key are split into ranges an index
+can seek to, so a deep page costs the same as the first one.
+The query and the last key travel in a signed, opaque cursor, so fetching
+the next page never involves the LLM.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import re
+import secrets
+import zlib
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from ..config import env_int, env_str
+from .query_guard import DEFAULT_ROW_LIMIT, strip_sql
+from .sql_templates import _TOKEN_PATTERN
+
+KEY_PREFIX = "_edgar_key"
+
+_UNPAGEABLE_CLAUSES = {"GROUP", "HAVING", "WINDOW", "UNION", "EXCEPT", "INTERSECT"}
+_CLAUSES = _UNPAGEABLE_CLAUSES | {"SELECT", "FROM", "WHERE", "ORDER", "LIMIT"}
+_SOURCE_PATTERN = re.compile(
+    r"^(?P<table>\w+)(?:\s+(?:AS\s+)?(?P<alias>\w+))?$", re.IGNORECASE
+)
+_ORDER_TERM_PATTERN = re.compile(
+    r"^(?:(?P<qualifier>[A-Za-z_]\w*)\.)?(?P<column>[A-Za-z_]\w*)"
+    r"(?:\s+(?P<direction>ASC|DESC))?$",
+    re.IGNORECASE,
+)
+_ROWID_NAMES = {"rowid", "oid", "_rowid_"}
+_LIMIT_PATTERN = re.compile(r"^LIMIT\s+(?P<count>\d+|\?)$", re.IGNORECASE)
+_AGGREGATE_PATTERN = re.compile(
+    r"\b(?:COUNT|SUM|AVG|MIN|MAX|TOTAL|GROUP_CONCAT)\s*\(", re.IGNORECASE
+)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class KeysetQuery:
+    select_list: str
+    source: str
+    where: Optional[str]
+    keys: Tuple[Tuple[str, bool], ...]
+    params: Tuple = ()
+    # Rows the query's own LIMIT allows, unless the caller asked to lift it
+    limit: Optional[int] = None
+
+    def page_sql(self, after, size) -> Tuple[str, Tuple]:
+        """SQL and parameters for ``size`` rows after the key ``after``.
+
+        One extra row is requested so the caller can tell whether another
+        page exists without a COUNT. When the rows after the key span more
+        than one range, each range is read on its own and the results are
+        merged back into key order.
+        """
+        key_columns = ", ".join(
+            f"{expression} AS {KEY_PREFIX}{index}"
+            for index, (expression, _) in enumerate(self.keys)
+        )
+        order = ", ".join(
+            f"{expression} {'DESC' if descending else 'ASC'}"
+            for expression, descending in self.keys
+        )
+        limit = f"LIMIT {int(size) + 1}"
+        ranges = [(None, [])] if after is None else keyset_ranges(self.keys, after)
+        statements = []
+        params = []
+        for condition, values in ranges or [("0", [])]:
+            conditions = [f"({self.where})"] if self.where else []
+            if condition:
+                conditions.append(condition)
+            sql = f"SELECT {self.select_list}, {key_columns} FROM {self.source}"
+            if conditions:
+                sql += " WHERE " + " AND ".join(conditions)
+            statements.append(f"{sql} ORDER BY {order} {limit}")
+            params.extend(self.params)
+            params.extend(values)
+        if len(statements) == 1:
+            return statements[0], tuple(params)
+        merged_order = ", ".join(
+            f"{KEY_PREFIX}{index} {'DESC' if descending else 'ASC'}"
+            for index, (_, descending) in enumerate(self.keys)
+        )
+        union = " UNION ALL ".join(f"SELECT * FROM ({sql})" for sql in statements)
+        return f"{union} ORDER BY {merged_order} {limit}", tuple(params)
+
+
+@dataclass
+class Page:
+    columns: List[str] = field(default_factory=list)
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    error: Optional[str] = None
+
+
+def keyset_ranges(keys, values) -> List[Tuple[str, List]]:
+    """WHERE conditions that together select the rows sorting after ``values``.
+
+    SQLite sorts NULL first, so NULLs come before every value ascending and
+    after every value descending. Each condition is a conjunction SQLite can
+    answer with a seek on an index over the key columns; an OR of them would
+    be planned as a scan of the whole index instead. When every key runs in
+    the same direction and no value is NULL the non-NULL rows are a single
+    row-value comparison, and descending keys add one range per NULL tail.
+    """
+    expressions = [expression for expression, _ in keys]
+    directions = {descending for _, descending in keys}
+    if all(value is not None for value in values) and len(directions) == 1:
+        descending = directions.pop()
+        operator = "<" if descending else ">"
+        if len(keys) == 1:
+            ranges = [(f"{expressions[0]} {operator} ?", list(values))]
+        else:
+            placeholders = ", ".join("?" for _ in values)
+            ranges = [
+                (
+                    f"({', '.join(expressions)}) {operator} ({placeholders})",
+                    list(values),
+                )
+            ]
+        if descending:
+            for index, expression in enumerate(expressions[:-1]):
+                ties = [f"{earlier} = ?" for earlier in expressions[:index]]
+                ranges.append(
+                    (
+                        " AND ".join(ties + [f"{expression} IS NULL"]),
+                        list(values[:index]),
+                    )
+                )
+        return ranges
+
+    ranges = []
+    for index, ((expression, descending), value) in enumerate(zip(keys, values)):
+        ties = []
+        tie_params = []
+        for earlier, earlier_value in zip(expressions[:index], values[:index]):
+            if earlier_value is None:
+                ties.append(f"{earlier} IS NULL")
+            else:
+                ties.append(f"{earlier} = ?")
+                tie_params.append(earlier_value)
+        if value is None:
+            after = [] if descending else [(f"{expression} IS NOT NULL", [])]
+        elif descending:
+            after = [(f"{expression} < ?", [value]), (f"{expression} IS NULL", [])]
+        else:
+            after = [(f"{expression} > ?", [value])]
+        for condition, condition_params in after:
+            ranges.append(
+                (" AND ".join(ties + [condition]), tie_params + condition_params)
+            )
+    return ranges
+
+
+def parse_keyset_query(
+    sql_query, params=(), columns=None, full_result=False
+) -> Optional[KeysetQuery]:
+    """Describe a single-table SELECT for keyset pagination, or None.
+
+    Joins, grouping, aggregates, DISTINCT, compound selects, OFFSET and
+    ORDER BY terms other than plain columns are not paged. When ``columns``
+    is given, every ORDER BY term must name one of them or the rowid, which
+    rules out select-list positions and aliases. The query's LIMIT bounds
+    the pages unless ``full_result`` asks for every matching row.
+    """
+    sql = strip_sql(sql_query)
+    clauses = []
+    placeholders = 0
+    depth = 0
+    for match in _TOKEN_PATTERN.finditer(sql):
+        text = match.group()
+        kind = match.lastgroup
+        if kind == "other":
+            if text == "(":
+                depth += 1
+            elif text == ")":
+                depth -= 1
+            elif text == "?":
+                placeholders += 1
+        elif kind == "word" and depth == 0 and text.upper() in _CLAUSES:
+            clauses.append((text.upper(), match.start(), match.end()))
+    names = [name for name, _, _ in clauses]
+    if (
+        not names
+        or names[0] != "SELECT"
+        or names.count("SELECT") > 1
+        or "FROM" not in names
+        or _UNPAGEABLE_CLAUSES & set(names)
+        or len(names) != len(set(names))
+    ):
+        return None
+
+    bounds = {
+        name: (end, clauses[index + 1][1] if index + 1 < len(clauses) else len(sql))
+        for index, (name, _, end) in enumerate(clauses)
+    }
+
+    def text_of(name):
+        start, end = bounds[name]
+        return sql[start:end].strip()
+
+    select_list = text_of("SELECT")
+    if (
+        re.match(r"(?:DISTINCT|ALL)\b", select_list, re.IGNORECASE)
+        or _AGGREGATE_PATTERN.search(select_list)
+        or placeholders != len(params)
+    ):
+        return None
+
+    source = _SOURCE_PATTERN.match(text_of("FROM"))
+    if not source or (source.group("alias") or "").upper() in _CLAUSES:
+        return None
+    qualifier = source.group("alias") or source.group("table")
+
+    qualifiers = {qualifier.lower(), source.group("table").lower()}
+    known = None if columns is None else {column.lower() for column in columns}
+    keys = []
+    if "ORDER" in bounds:
+        order = re.sub(r"^BY\b", "", text_of("ORDER"), flags=re.IGNORECASE)
+        for term in order.split(","):
+            match = _ORDER_TERM_PATTERN.match(term.strip())
+            if not match or (match.group("qualifier") or qualifier).lower() not in (
+                qualifiers
+            ):
+                return None
+            column = match.group("column")
+            if known is not None and column.lower() not in known | _ROWID_NAMES:
+                return None
+            if match.group("qualifier"):
+                column = f"{match.group('qualifier')}.{column}"
+            descending = (match.group("direction") or "").upper() == "DESC"
+            keys.append((column, descending))
+    if not any(
+        expression.split(".")[-1].lower() in _ROWID_NAMES for expression, _ in keys
+    ):
+        # Break ties in the direction of the last key so one index can serve both
+        keys.append((f"{qualifier}.rowid", keys[-1][1] if keys else False))
+
+    params = tuple(params)
+    limit = None
+    if "LIMIT" in bounds:
+        match = _LIMIT_PATTERN.match(f"LIMIT {text_of('LIMIT')}")
+        if not match:
+            return None
+        if match.group("count") == "?":
+            count, params = params[-1], params[:-1]
+        else:
+            count = int(match.group("count"))
+        if not full_result:
+            limit = int(count)
+
+    return KeysetQuery(
+        select_list=select_list,
+        source=text_of("FROM"),
+        where=text_of("WHERE") if "WHERE" in bounds else None,
+        keys=tuple(keys),
+        params=params,
+        limit=limit,
+    )
+
+
+def frame_rows(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Rows as JSON-ready dicts with missing values as None."""
+    return [
+        {column: _plain(value) for column, value in row.items()}
+        for row in df.to_dict("records")
+    ]
+
+
+def _plain(value):
+    if value is None or value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, float) and value != value:
+        return None
+    if hasattr(value, "item"):
+        return _plain(value.item())
+    return value
+
+
+class Paginator:
+    """Fetches pages through a SQLExecutorAgent and signs the cursors it hands out.
+
+    Cursors are signed with ``EDGAR_CURSOR_SECRET``; without it a random key
+    is used, so cursors stop working when the process restarts.
+    """
+
+    def __init__(self, secret=None, max_page_size=None):
+        secret = secret or env_str("EDGAR_CURSOR_SECRET") or secrets.token_hex(32)
+        self.secret = secret.encode("utf-8")
+        self.max_page_size = max_page_size or env_int(
+            "EDGAR_MAX_RESULT_ROWS", DEFAULT_ROW_LIMIT
+        )
+
+    def first_page(
+        self, executor, sql_query, params, page_size, full_result=False
+    ) -> Optional[Page]:
+        """The first page of a query, or None when it cannot be keyset paged.
+
+        With ``full_result`` the pages run past the query's own LIMIT.
+        """
+        query = parse_keyset_query(
+            sql_query, params, executor.declared_types(sql_query), full_result
+        )
+        if query is None:
+            return None
+        return self._fetch(executor, query, None, self.clamp_page_size(page_size))
+
+    def next_page(self, executor, cursor) -> Page:
+        query, after, size = self.decode(cursor)
+        return self._fetch(executor, query, after, size)
+
+    def clamp_page_size(self, page_size) -> int:
+        return max(1, min(int(page_size), self.max_page_size))
+
+    def _fetch(self, executor, query: KeysetQuery, after, size) -> Page:
+        take = size if query.limit is None else min(size, query.limit)
+        sql_query, params = query.page_sql(after, take)
+        execution = executor.execute(sql_query, params)
+        if execution.error:
+            return Page(error=execution.error)
+        df = execution.df
+        keys = [column for column in df.columns if column.startswith(KEY_PREFIX)]
+        page = Page(
+            columns=[column for column in df.columns if column not in keys],
+            rows=frame_rows(df.iloc[:take].drop(columns=keys)),
+        )
+        if len(df) > take:
+            remaining = None if query.limit is None else query.limit - take
+            if remaining is None or remaining > 0:
+                last = [_plain(value) for value in df.iloc[take - 1][keys]]
+                following = query
+                if remaining is not None:
+                    following = replace(query, limit=remaining)
+                page.next_cursor = self.encode(following, last, size)
+        return page
+
+    def encode(self, query: KeysetQuery, after, size) -> str:
+        payload = {
+            "select": query.select_list,
+            "source": query.source,
+            "where": query.where,
+            "keys": [list(key) for key in query.keys],
+            "params": list(query.params),
+            "limit": query.limit,
+            "after": list(after),
+            "size": size,
+        }
+        body = zlib.compress(json.dumps(payload, separators=(",", ":")).encode())
+        signature = hmac.new(self.secret, body, hashlib.sha256).digest()[:16]
+        return f"{_b64encode(body)}.{_b64encode(signature)}"
+
+    def decode(self, cursor) -> Tuple[KeysetQuery, List, int]:
+        try:
+            body_text, signature_text = cursor.split(".")
+            body, signature = _b64decode(body_text), _b64decode(signature_text)
+        except (ValueError, AttributeError) as e:
+            raise InvalidCursor("Malformed cursor") from e
+        expected = hmac.new(self.secret, body, hashlib.sha256).digest()[:16]
+        if not hmac.compare_digest(signature, expected):
+            raise InvalidCursor("Cursor is invalid or has expired")
+        payload = json.loads(zlib.decompress(body))
+        query = KeysetQuery(
+            select_list=payload["select"],
+            source=payload["source"],
+            where=payload["where"],
+            keys=tuple(
+                (expression, descending) for expression, descending in payload["keys"]
+            ),
+            params=tuple(payload["params"]),
+            limit=payload["limit"],
+        )
+        return query, payload["after"], self.clamp_page_size(payload["size"])
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
@@ -0,0 +1,202 @@
+"""Partitioned Parquet copies of the loaded tables.
+
+Each table is written under ``<root>/<table>/`` as zstd-compressed Parquet,
+hive-partitioned by filing quarter and form (``quarter=2024Q1/form_key=10-K``),
+so a columnar reader such as DuckDB only opens the columns and partitions a
+query needs. The partition keys are derived columns: the original
+``date_filed``, ``form_type`` and ``form`` values stay in the files
+unchanged. ``manifest.json`` records, per table, the row count, the
+min/max/null count of every column, and each file with its partition and
+size.
+
+Needs the optional ``pyarrow`` package.
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:  # Optional: only needed for the Parquet mirror
+    pa = None
+    ds = None
+
+MANIFEST_FILE = "manifest.json"
+PARTITION_KEYS = ("quarter", "form_key")
+UNKNOWN_PARTITION = "unknown"
+# Date and form columns each table is partitioned on
+PARTITION_SOURCES = {
+    "master_index": ("date_filed", "form_type"),
+    "submissions": ("filed", "form"),
+    "presentation_of_statement": (None, None),
+}
+MAX_PARTITIONS = 100_000
+
+
+def filing_quarter(dates: pd.Series) -> pd.Series:
+    """``YYYYQn`` for ISO (``2024-02-15``) or compact (``20240215``) dates."""
+    digits = dates.astype("string").str.replace("-", "", regex=False)
+    year = digits.str.slice(0, 4)
+    month = pd.to_numeric(digits.str.slice(4, 6), errors="coerce")
+    quarter = year + "Q" + ((month - 1) // 3 + 1).astype("Int64").astype("string")
+    valid = year.str.fullmatch(r"\d{4}") & month.between(1, 12)
+    return quarter.where(valid.fillna(False), UNKNOWN_PARTITION).astype(object)
+
+
+def form_key(forms: pd.Series) -> pd.Series:
+    """Form values safe to use as a directory name."""
+    return (
+        forms.astype("string")
+        .str.strip()
+        .str.replace(r"[^\w.-]", "_", regex=True)
+        .fillna(UNKNOWN_PARTITION)
+        .replace("", UNKNOWN_PARTITION)
+        .astype(object)
+    )
+
+
+def column_stats(series: pd.Series) -> Dict:
+    values = series.dropna()
+    stats = {"nulls": int(series.isna().sum()), "min": None, "max": None}
+    if not values.empty:
+        stats["min"] = _plain(values.min())
+        stats["max"] = _plain(values.max())
+    return stats
+
+
+def _plain(value):
+    return value.item() if hasattr(value, "item") else value
+
+
+class ParquetMirror:
+    """Writes tables as partitioned Parquet under ``root`` and keeps the manifest."""
+
+    def __init__(self, root, compression="zstd"):
+        if pa is None:
+            raise RuntimeError(
+                "The Parquet mirror requires the optional pyarrow package"
+            )
+        self.root = Path(root)
+        self.compression = compression
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.root / MANIFEST_FILE
+
+    def manifest(self) -> Dict:
+        if not self.manifest_path.exists():
+            return {"tables": {}}
+        return json.loads(self.manifest_path.read_text(encoding="utf-8"))
+
+    def write(
+        self,
+        table: str,
+        df: pd.DataFrame,
+        quarters: Optional[pd.Series] = None,
+        forms: Optional[pd.Series] = None,
+        source_bytes: Optional[int] = None,
+    ) -> Dict:
+        """Replace ``table``'s files with ``df`` and return its manifest entry.
+
+        ``quarters`` and ``forms`` supply the quarter and form of each row
+        for tables without a date or form column of their own.
+        """
+        date_column, form_column = PARTITION_SOURCES.get(table, (None, None))
+        if quarters is None:
+            quarters = (
+                filing_quarter(df[date_column])
+                if date_column in df.columns
+                else pd.Series(UNKNOWN_PARTITION, index=df.index, dtype=object)
+            )
+        if forms is None:
+            forms = (
+                df[form_column]
+                if form_column in df.columns
+                else pd.Series(None, index=df.index, dtype=object)
+            )
+        forms = form_key(forms)
+        data = pa.Table.from_pandas(
+            df.assign(quarter=quarters.to_numpy(), form_key=forms.to_numpy()),
+            preserve_index=False,
+        )
+
+        folder = self.root / table
+        shutil.rmtree(folder, ignore_errors=True)
+        files = []
+
+        def visit(written):
+            path = Path(written.path)
+            partition = dict(
+                part.split("=", 1)
+                for part in path.relative_to(folder).parts[:-1]
+                if "=" in part
+            )
+            files.append(
+                {
+                    "path": path.relative_to(self.root).as_posix(),
+                    "rows": written.metadata.num_rows,
+                    "bytes": os.path.getsize(path),
+                    "partition": partition,
+                }
+            )
+
+        ds.write_dataset(
+            data,
+            folder,
+            format="parquet",
+            partitioning=ds.partitioning(
+                pa.schema([(key, pa.string()) for key in PARTITION_KEYS]),
+                flavor="hive",
+            ),
+            file_options=ds.ParquetFileFormat().make_write_options(
+                compression=self.compression
+            ),
+            file_visitor=visit,
+            max_partitions=MAX_PARTITIONS,
+            existing_data_behavior="delete_matching",
+        )
+
+        entry = {
+            "rows": len(df),
+            "partitioning": list(PARTITION_KEYS),
+            "compression": self.compression,
+            "bytes": sum(file["bytes"] for file in files),
+            "source_bytes": source_bytes,
+            "columns": {str(column): column_stats(df[column]) for column in df.columns},
+            "files": sorted(files, key=lambda file: file["path"]),
+        }
+        manifest = self.manifest()
+        manifest["created_at"] = datetime.now(timezone.utc).isoformat()
+        manifest["tables"][table] = entry
+        self._write_manifest(manifest)
+        return entry
+
+    def _write_manifest(self, manifest):
+        self.root.mkdir(parents=True, exist_ok=True)
+        partial = self.manifest_path.with_suffix(".tmp")
+        partial.write_text(
+            json.dumps(manifest, indent=2, default=str), encoding="utf-8"
+        )
+        partial.replace(self.manifest_path)
+
+
+def summarize_manifest(manifest: Dict) -> str:
+    lines = []
+    for table, entry in manifest.get("tables", {}).items():
+        line = (
+            f"{table}: {entry['rows']:,} rows in {len(entry['files'])} files, "
+            f"{entry['bytes'] / 1e6:.1f} MB"
+        )
+        if entry.get("source_bytes"):
+            line += (
+                f" ({entry['bytes'] / entry['source_bytes']:.0%} of the source text)"
+            )
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,229 @@
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Tuple
+
+from ..config import env_int
+
+DEFAULT_LARGE_TABLE_ROWS = 100_000
+DEFAULT_ROW_LIMIT = 1000
+DEFAULT_DECISION_CACHE_SIZE = 512
+
+_SCAN_PATTERN = re.compile(
+    r"^SCAN (?:TABLE )?(?P<name>\w+)(?: AS (?P<alias>\w+))?(?P<index> USING (?:COVERING )?INDEX\b.*)?$"
+)
+_FROM_PATTERN = re.compile(r"\bFROM\b", re.IGNORECASE)
+_FROM_CLAUSE_END_PATTERN = re.compile(
+    r"\b(?:WHERE|GROUP|ORDER|LIMIT|HAVING|UNION|EXCEPT|INTERSECT|WINDOW)\b|[()]",
+    re.IGNORECASE,
+)
+_JOIN_SEPARATOR_PATTERN = re.compile(
+    r",|\b(?:NATURAL\s+)?(?:(?:LEFT|RIGHT|FULL)\s+)?(?:INNER\s+|OUTER\s+|CROSS\s+)?JOIN\b",
+    re.IGNORECASE,
+)
+_TABLE_REFERENCE_PATTERN = re.compile(
+    r"^[\"`\[]?(?P<table>\w+)[\"`\]]?(?:\s+(?:AS\s+)?(?P<alias>\w+))?",
+    re.IGNORECASE,
+)
+_JOIN_CONSTRAINT_PATTERN = re.compile(r"\b(?:ON|USING)\b.*", re.IGNORECASE | re.DOTALL)
+_INJECTED_LIMIT = re.compile(
+    r"^SELECT\s+\*\s+FROM\s+\((?P<inner>.*)\)\s+LIMIT\s+(?P<limit>\d+)$",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+@dataclass
+class GuardDecision:
+    sql_query: str
+    query_plan: List[str] = field(default_factory=list)
+    notes: List[str] = field(default_factory=list)
+    rejected_reason: Optional[str] = None
+
+    @property
+    def rejected(self) -> bool:
+        return self.rejected_reason is not None
+
+
+def strip_sql(sql_query: str) -> str:
+    return sql_query.strip().rstrip(";").strip()
+
+
+def top_level_sql(sql_query: str) -> str:
+    """Return the query text outside string literals and parentheses."""
+    kept = []
+    depth = 0
+    quote = None
+    for char in sql_query:
+        if quote:
+            if char == quote:
+                quote = None
+            continue
+        if char in ("'", '"'):
+            quote = char
+            continue
+        if char == "(":
+            depth += 1
+            continue
+        if char == ")":
+            depth = max(depth - 1, 0)
+            continue
+        if depth == 0:
+            kept.append(char)
+    return "".join(kept)
+
+
+def without_injected_limit(sql_query: str, row_limit: int) -> str:
+    """The statement without the ``LIMIT row_limit`` wrapper review() adds."""
+    sql = strip_sql(sql_query)
+    wrapper = _INJECTED_LIMIT.match(sql)
+    if wrapper and int(wrapper.group("limit")) == row_limit:
+        return wrapper.group("inner").strip()
+    return sql
+
+
+def has_top_level_limit(sql_query: str) -> bool:
+    return re.search(r"\bLIMIT\b", top_level_sql(sql_query), re.IGNORECASE) is not None
+
+
+def table_aliases(sql_query: str) -> Dict[str, str]:
+    """Map every table name and alias referenced in FROM clauses to its table."""
+    aliases = {}
+    for from_match in _FROM_PATTERN.finditer(sql_query):
+        clause = sql_query[from_match.end() :]
+        end = _FROM_CLAUSE_END_PATTERN.search(clause)
+        if end:
+            clause = clause[: end.start()]
+        for reference in _JOIN_SEPARATOR_PATTERN.split(clause):
+            reference = _JOIN_CONSTRAINT_PATTERN.sub("", reference).strip()
+            match = _TABLE_REFERENCE_PATTERN.match(reference)
+            if not match:
+                continue
+            table = match.group("table")
+            aliases[table.lower()] = table
+            if match.group("alias"):
+                aliases[match.group("alias").lower()] = table
+    return aliases
+
+
+class QueryCostGuard:
+    """Reviews a SELECT with EXPLAIN QUERY PLAN before it is allowed to run."""
+
+    def __init__(self, conn, large_table_rows=None, row_limit=None):
+        self.conn = conn
+        self.large_table_rows = large_table_rows or env_int(
+            "EDGAR_LARGE_TABLE_ROWS", DEFAULT_LARGE_TABLE_ROWS
+        )
+        self.row_limit = row_limit or env_int(
+            "EDGAR_MAX_RESULT_ROWS", DEFAULT_ROW_LIMIT
+        )
+        self._table_sizes: Dict[str, int] = {}
+        self._decisions = OrderedDict()
+        self._decisions_lock = threading.Lock()
+
+    def explain(
+        self, sql_query: str, params=(), conn=None
+    ) -> List[Tuple[int, int, str]]:
+        conn = conn or self.conn
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {sql_query}", params).fetchall()
+        return [(row[0], row[1], row[3]) for row in rows]
+
+    def table_size(self, table: str, conn=None) -> int:
+        key = table.lower()
+        if key not in self._table_sizes:
+            try:
+                row = (
+                    (conn or self.conn)
+                    .execute(f'SELECT MAX(rowid) FROM "{table}"')
+                    .fetchone()
+                )
+                self._table_sizes[key] = int(row[0] or 0)
+            except sqlite3.Error:
+                self._table_sizes[key] = 0
+        return self._table_sizes[key]
+
+    def is_large(self, table: str, conn=None) -> bool:
+        return self.table_size(table, conn) >= self.large_table_rows
+
+    def review(self, sql_query: str, params=(), conn=None) -> GuardDecision:
+        """Return the SQL to run, or a rejection reason, plus the recorded plan.
+
+        Decisions are cached by statement text, so parameterized templates are
+        planned once per shape. Raises sqlite3.Error when the statement cannot
+        be planned at all. ``conn`` overrides the guard's own connection so
+        callers on other threads can plan on theirs.
+        """
+        sql = strip_sql(sql_query)
+        with self._decisions_lock:
+            cached = self._decisions.get(sql)
+            if cached:
+                self._decisions.move_to_end(sql)
+                return replace(cached, notes=list(cached.notes))
+
+        decision = self._review(sql, params, conn or self.conn)
+        with self._decisions_lock:
+            self._decisions[sql] = decision
+            while len(self._decisions) > DEFAULT_DECISION_CACHE_SIZE:
+                self._decisions.popitem(last=False)
+        return replace(decision, notes=list(decision.notes))
+
+    def _review(self, sql: str, params, conn) -> GuardDecision:
+        plan = self.explain(sql, params, conn)
+        decision = GuardDecision(sql_query=sql, query_plan=format_plan(plan))
+
+        large_scans = self.large_full_scans(plan, table_aliases(sql), conn)
+        for parent_id, tables in large_scans.items():
+            if len(tables) > 1:
+                decision.rejected_reason = (
+                    f"Query would scan large tables {', '.join(tables)} in a nested loop "
+                    "without a selective predicate; add a filter on an indexed column "
+                    "such as cik, adsh or form_type"
+                )
+                return decision
+            if parent_id and _is_correlated(plan, parent_id) and large_scans.get(0):
+                decision.rejected_reason = (
+                    f"Correlated subquery would rescan large table {tables[0]} once per "
+                    "outer row; rewrite it as a join on an indexed column"
+                )
+                return decision
+
+        for tables in large_scans.values():
+            decision.notes.extend(
+                f"Full scan of large table {table}" for table in tables
+            )
+
+        if not has_top_level_limit(sql):
+            decision.sql_query = f"SELECT * FROM ({sql}) LIMIT {self.row_limit}"
+            decision.notes.append(f"Injected LIMIT {self.row_limit}")
+        return decision
+
+    def large_full_scans(self, plan, aliases, conn=None) -> Dict[int, List[str]]:
+        """Group full scans of large tables by the plan node they are nested under."""
+        scans: Dict[int, List[str]] = {}
+        for _, parent_id, detail in plan:
+            match = _SCAN_PATTERN.match(detail)
+            if not match or match.group("index"):
+                continue
+            name = match.group("alias") or match.group("name")
+            table = aliases.get(name.lower(), match.group("name"))
+            if self.is_large(table, conn):
+                scans.setdefault(parent_id, []).append(table)
+        return scans
+
+
+def _is_correlated(plan, node_id: int) -> bool:
+    return any(
+        row_id == node_id and detail.startswith("CORRELATED")
+        for row_id, _, detail in plan
+    )
+
+
+def format_plan(plan) -> List[str]:
+    depths = {0: -1}
+    lines = []
+    for row_id, parent_id, detail in plan:
+        depth = depths.get(parent_id, -1) + 1
+        depths[row_id] = depth
+        lines.append(f"{'  ' * depth}{detail}")
+    return lines
@@ -0,0 +1,119 @@
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ..config import env_str
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS query_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    logged_at REAL NOT NULL,
+    request_id TEXT,
+    question TEXT NOT NULL,
+    sql_template TEXT,
+    params TEXT,
+    generation_mode TEXT,
+    success INTEGER NOT NULL,
+    error TEXT,
+    row_count INTEGER,
+    timings_ms TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_query_log_logged_at ON query_log(logged_at);
+"""
+
+
+@dataclass
+class QueryLogEntry:
+    question: str
+    success: bool
+    sql_template: Optional[str] = None
+    params: Tuple = ()
+    generation_mode: Optional[str] = None
+    error: Optional[str] = None
+    row_count: Optional[int] = None
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+    request_id: Optional[str] = None
+    logged_at: float = 0.0
+
+    @classmethod
+    def from_result(cls, question, result, request_id=None):
+        """Entry for an engine result; result rows themselves are never logged."""
+        return cls(
+            question=question,
+            success=result["success"],
+            sql_template=result.get("sql_template"),
+            params=tuple(result.get("sql_params") or ()),
+            generation_mode=result.get("generation_mode"),
+            error=result.get("error"),
+            row_count=result.get("row_count"),
+            timings_ms=result.get("timings_ms") or {},
+            request_id=request_id,
+        )
+
+
+class QueryLog:
+    """Local SQLite record of served questions and the SQL that answered them."""
+
+    def __init__(self, db_path=None):
+        project_root = Path(__file__).parent.parent.parent
+        default_path = project_root / "data" / "query_log.db"
+        self.db_path = Path(db_path or env_str("EDGAR_QUERY_LOG", default_path))
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+
+    def record(self, entry: QueryLogEntry):
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO query_log "
+                "(logged_at, request_id, question, sql_template, params, "
+                "generation_mode, success, error, row_count, timings_ms) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    entry.logged_at or time.time(),
+                    entry.request_id,
+                    entry.question,
+                    entry.sql_template,
+                    json.dumps(list(entry.params)),
+                    entry.generation_mode,
+                    int(entry.success),
+                    entry.error,
+                    entry.row_count,
+                    json.dumps(entry.timings_ms),
+                ),
+            )
+            self.conn.commit()
+
+    def entries(self, since=None, successful_only=False) -> List[QueryLogEntry]:
+        query = (
+            "SELECT question, success, sql_template, params, generation_mode, error, "
+            "row_count, timings_ms, request_id, logged_at FROM query_log "
+            "WHERE logged_at >= ?"
+        )
+        if successful_only:
+            query += " AND success = 1"
+        with self._lock:
+            rows = self.conn.execute(query + " ORDER BY id", (since or 0,)).fetchall()
+        return [
+            QueryLogEntry(
+                question=row[0],
+                success=bool(row[1]),
+                sql_template=row[2],
+                params=tuple(json.loads(row[3])) if row[3] else (),
+                generation_mode=row[4],
+                error=row[5],
+                row_count=row[6],
+                timings_ms=json.loads(row[7]) if row[7] else {},
+                request_id=row[8],
+                logged_at=row[9],
+            )
+            for row in rows
+        ]
+
+    def close(self):
+        self.conn.close()
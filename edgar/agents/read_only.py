@@ -0,0 +1,111 @@
+import re
+import sqlite3
+import threading
+from collections import Counter
+
+from ..config import env_str
+
+ALLOWED_ACTIONS = {
+    sqlite3.SQLITE_SELECT,
+    sqlite3.SQLITE_READ,
+    sqlite3.SQLITE_FUNCTION,
+    sqlite3.SQLITE_RECURSIVE,
+}
+ACTION_NAMES = {
+    getattr(sqlite3, name): name
+    for name in (
+        "SQLITE_CREATE_INDEX",
+        "SQLITE_CREATE_TABLE",
+        "SQLITE_CREATE_TEMP_INDEX",
+        "SQLITE_CREATE_TEMP_TABLE",
+        "SQLITE_CREATE_TEMP_TRIGGER",
+        "SQLITE_CREATE_TEMP_VIEW",
+        "SQLITE_CREATE_TRIGGER",
+        "SQLITE_CREATE_VIEW",
+        "SQLITE_DELETE",
+        "SQLITE_DROP_INDEX",
+        "SQLITE_DROP_TABLE",
+        "SQLITE_DROP_TEMP_INDEX",
+        "SQLITE_DROP_TEMP_TABLE",
+        "SQLITE_DROP_TEMP_TRIGGER",
+        "SQLITE_DROP_TEMP_VIEW",
+        "SQLITE_DROP_TRIGGER",
+        "SQLITE_DROP_VIEW",
+        "SQLITE_INSERT",
+        "SQLITE_PRAGMA",
+        "SQLITE_READ",
+        "SQLITE_SELECT",
+        "SQLITE_TRANSACTION",
+        "SQLITE_UPDATE",
+        "SQLITE_ATTACH",
+        "SQLITE_DETACH",
+        "SQLITE_ALTER_TABLE",
+        "SQLITE_REINDEX",
+        "SQLITE_ANALYZE",
+        "SQLITE_CREATE_VTABLE",
+        "SQLITE_DROP_VTABLE",
+        "SQLITE_FUNCTION",
+        "SQLITE_SAVEPOINT",
+        "SQLITE_RECURSIVE",
+    )
+    if hasattr(sqlite3, name)
+}
+_READ_STATEMENT_PATTERN = re.compile(
+    r"^(?:\s|--[^\n]*\n|/\*.*?\*/|\()*(?:SELECT|WITH|VALUES)\b",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def is_read_statement(sql_query: str) -> bool:
+    return _READ_STATEMENT_PATTERN.match(sql_query) is not None
+
+
+def user_tables(conn):
+    rows = conn.execute(
+        "SELECT name FROM sqlite_master "
+        "WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%'"
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+class ReadOnlyAuthorizer:
+    """sqlite3 authorizer that only lets SELECTs read whitelisted tables.
+
+    SQLite calls it once per action while compiling a statement, so the cost
+    does not grow with the number of rows or with the length of string literals.
+    """
+
+    def __init__(self, allowed_tables):
+        self.allowed_tables = {table.lower() for table in allowed_tables}
+        self.rejected_actions = Counter()
+        self.rejected_queries = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_connection(cls, conn):
+        configured = env_str("EDGAR_ALLOWED_TABLES")
+        if configured:
+            return cls(table.strip() for table in configured.split(","))
+        return cls(user_tables(conn))
+
+    def install(self, conn):
+        conn.set_authorizer(self)
+
+    def __call__(self, action, arg1, arg2, db_name, source):
+        if action == sqlite3.SQLITE_READ:
+            if arg1 and arg1.lower() in self.allowed_tables:
+                return sqlite3.SQLITE_OK
+        elif action in ALLOWED_ACTIONS:
+            return sqlite3.SQLITE_OK
+        with self._lock:
+            self.rejected_actions[ACTION_NAMES.get(action, str(action))] += 1
+        return sqlite3.SQLITE_DENY
+
+    def record_rejected_query(self):
+        with self._lock:
+            self.rejected_queries += 1
+
+
+def is_authorization_error(error: Exception) -> bool:
+    message = str(error)
+    return "not authorized" in message or message.endswith("is prohibited")
@@ -0,0 +1,340 @@
+"""Stream the full result of an answer's SQL as CSV, Arrow IPC or Parquet.
+
+Rows go from the SQLite cursor to the output format in batches of
+``batch_rows``, so an export never holds more than one batch (plus one
+Parquet row group) in memory, whatever its size. The SQL passes the same
+read-only authorizer and cost guard as answers, is capped at
+``EDGAR_EXPORT_MAX_ROWS`` rows and is cancelled once it has run for
+``EDGAR_EXPORT_TIMEOUT_SECONDS``.
+
+Arrow and Parquet need the optional ``pyarrow`` package. Their schema has
+to be written before the first batch, so each column's type comes from its
+declared SQLite type rather than from whichever values arrive first.
+"""
+
+import csv
+import io
+import queue
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ..config import env_int
+from .query_guard import strip_sql, top_level_sql
+from .read_only import is_authorization_error, is_read_statement
+from .sql_executor import FORBIDDEN_ERROR, PROGRESS_CHECK_INSTRUCTIONS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: only needed for Arrow and Parquet exports
+    pa = None
+    pq = None
+
+DEFAULT_MAX_ROWS = 5_000_000
+DEFAULT_TIMEOUT_SECONDS = 300
+DEFAULT_BATCH_ROWS = 10_000
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+_LIMIT_PATTERN = re.compile(r"\bLIMIT\s+(?P<count>\d+|\?)\s*$", re.IGNORECASE)
+# Column types by SQLite's type affinity rules, in the order SQLite applies them
+_AFFINITY_KINDS = (
+    (("INT",), "int64"),
+    (("CHAR", "CLOB", "TEXT"), "string"),
+    (("BLOB",), "binary"),
+    (("REAL", "FLOA", "DOUB"), "float64"),
+)
+_KIND_TYPES = {"int64": int, "float64": float, "binary": bytes}
+
+
+class ExportError(Exception):
+    pass
+
+
+def without_limit(sql_query: str, params=()) -> Tuple[str, Tuple]:
+    """The statement and parameters without its top-level ``LIMIT n``."""
+    sql = strip_sql(sql_query)
+    params = tuple(params)
+    match = _LIMIT_PATTERN.search(top_level_sql(sql))
+    if not match:
+        return sql, params
+    if match.group("count") == "?":
+        params = params[:-1]
+    return _LIMIT_PATTERN.sub("", sql).rstrip(), params
+
+
+def column_kinds(columns, declared_types: Dict[str, str], rows) -> List[str]:
+    """Arrow type name for each exported column.
+
+    Columns read straight from a table take the type their declaration
+    gives them, NUMERIC included as float64. Expressions have no declared
+    type, so they are typed from ``rows``, the first batch, with integers
+    and reals together as float64 and columns with no values yet as text.
+    """
+    kinds = []
+    for index, column in enumerate(columns):
+        kind = affinity_kind(declared_types.get(column))
+        if kind is None:
+            found = {type(row[index]) for row in rows if row[index] is not None}
+            if found == {int}:
+                kind = "int64"
+            elif found and found <= {int, float}:
+                kind = "float64"
+            elif found == {bytes}:
+                kind = "binary"
+            else:
+                kind = "string"
+        kinds.append(kind)
+    return kinds
+
+
+def affinity_kind(declared: Optional[str]) -> Optional[str]:
+    """Arrow type name for a declared SQLite type, or None when it has none."""
+    declared = (declared or "").upper()
+    if not declared:
+        return None
+    for fragments, kind in _AFFINITY_KINDS:
+        if any(fragment in declared for fragment in fragments):
+            return kind
+    return "float64"
+
+
+def conform(values, kind: str, column: str = "") -> list:
+    """Values converted to ``kind`` without losing any of them.
+
+    SQLite lets any column hold any value, so an INTEGER column can return
+    a REAL. Such values are converted where that is exact; otherwise an
+    ExportError names the column.
+    """
+    conformed = []
+    for value in values:
+        if value is None:
+            pass
+        elif kind == "string":
+            if isinstance(value, bytes):
+                value = value.hex()
+            else:
+                value = str(value)
+        elif kind == "float64" and isinstance(value, int):
+            value = float(value)
+        elif kind == "int64" and isinstance(value, float) and value.is_integer():
+            value = int(value)
+        elif kind == "binary" and isinstance(value, str):
+            value = value.encode("utf-8")
+        elif not isinstance(value, _KIND_TYPES[kind]):
+            raise ExportError(
+                f"Column {column!r} holds {value!r}, which does not fit its {kind} type"
+            )
+        conformed.append(value)
+    return conformed
+
+
+class ResultExporter:
+    def __init__(self, executor, max_rows=None, timeout_seconds=None, batch_rows=None):
+        self.executor = executor
+        self.max_rows = max_rows or env_int("EDGAR_EXPORT_MAX_ROWS", DEFAULT_MAX_ROWS)
+        self.timeout_seconds = timeout_seconds or env_int(
+            "EDGAR_EXPORT_TIMEOUT_SECONDS", DEFAULT_TIMEOUT_SECONDS
+        )
+        self.batch_rows = batch_rows or env_int(
+            "EDGAR_EXPORT_BATCH_ROWS", DEFAULT_BATCH_ROWS
+        )
+
+    def prepare(
+        self, sql_query, params=(), fmt="csv", full_result=False
+    ) -> Tuple[str, Tuple]:
+        """The capped export SQL, after the guard has reviewed it.
+
+        The query's own LIMIT is kept unless ``full_result`` asks for every
+        matching row. Raises ExportError when the format is unavailable or
+        the query is not allowed, so callers can refuse before streaming
+        starts.
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ExportError(f"Unknown export format {fmt!r}")
+        if fmt != "csv" and pa is None:
+            raise ExportError(f"{fmt} export requires the optional pyarrow package")
+        if not is_read_statement(sql_query):
+            raise ExportError(FORBIDDEN_ERROR)
+        sql = strip_sql(sql_query)
+        if full_result:
+            sql, params = without_limit(sql, params)
+        sql = f"SELECT * FROM ({sql}) LIMIT {self.max_rows}"
+        try:
+            decision = self.executor.cost_guard.review(
+                sql, params, self.executor.connection()
+            )
+        except sqlite3.Error as e:
+            if is_authorization_error(e):
+                raise ExportError(FORBIDDEN_ERROR) from e
+            raise ExportError(f"Error executing query: {e}") from e
+        if decision.rejected:
+            raise ExportError(
+                f"Query rejected by cost guard: {decision.rejected_reason}"
+            )
+        return decision.sql_query, tuple(params)
+
+    def stream(self, sql_query, params=(), fmt="csv") -> Iterator[bytes]:
+        """Encoded chunks of the export of prepared SQL.
+
+        The query runs on its own connection in a producer thread that stays
+        at most a few chunks ahead of the consumer, so a slow client slows
+        the query down instead of buffering the result.
+        """
+        chunks: queue.Queue = queue.Queue(maxsize=4)
+        stop = threading.Event()
+        done = object()
+
+        def produce():
+            try:
+                batches = self._batches(sql_query, params)
+                for chunk in self._encode(batches, fmt, sql_query):
+                    while not stop.is_set():
+                        try:
+                            chunks.put(chunk, timeout=0.5)
+                            break
+                        except queue.Full:
+                            continue
+                    if stop.is_set():
+                        return
+                chunks.put(done)
+            except Exception as e:
+                chunks.put(e)
+
+        threading.Thread(target=produce, name="edgar-export", daemon=True).start()
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is done:
+                    return
+                if isinstance(chunk, Exception):
+                    # Abort the response so the client sees a truncated export
+                    raise chunk
+                yield chunk
+        finally:
+            stop.set()
+
+    def _batches(self, sql_query, params) -> Iterator[Tuple[List[str], List[tuple]]]:
+        factory = self.executor.connection_factory
+        conn = factory() if factory else self.executor.conn
+        self.executor.authorizer.install(conn)
+        deadline = time.monotonic() + self.timeout_seconds
+        conn.set_progress_handler(
+            lambda: int(time.monotonic() > deadline), PROGRESS_CHECK_INSTRUCTIONS
+        )
+        try:
+            cursor = conn.execute(sql_query, params)
+            columns = [description[0] for description in cursor.description]
+            rows = cursor.fetchmany(self.batch_rows)
+            # An empty export still carries its columns
+            yield columns, rows
+            while rows:
+                rows = cursor.fetchmany(self.batch_rows)
+                if rows:
+                    yield columns, rows
+        except sqlite3.OperationalError as e:
+            if str(e) != "interrupted":
+                raise
+            raise ExportError(
+                f"Export exceeded the {self.timeout_seconds:g}s time budget "
+                "and was cancelled"
+            ) from e
+        finally:
+            conn.set_progress_handler(None, 0)
+            if factory:
+                conn.close()
+
+    def _encode(self, batches, fmt, sql_query) -> Iterator[bytes]:
+        if fmt == "csv":
+            yield from encode_csv(batches)
+            return
+        declared_types = self.executor.declared_types(sql_query)
+        if fmt == "arrow":
+            yield from encode_arrow(batches, declared_types)
+        else:
+            yield from encode_parquet(batches, declared_types)
+
+
+def encode_csv(batches) -> Iterator[bytes]:
+    header_written = False
+    for columns, rows in batches:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if not header_written:
+            writer.writerow(columns)
+            header_written = True
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _Sink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last drain."""
+
+    def __init__(self):
+        self.parts: List[bytes] = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def _record_batch(columns, rows, kinds):
+    values = [list(column) for column in zip(*rows)] if rows else [[]] * len(columns)
+    arrays = [
+        pa.array(conform(column_values, kind, column), type=pa.type_for_alias(kind))
+        for column_values, kind, column in zip(values, kinds, columns)
+    ]
+    return pa.RecordBatch.from_arrays(arrays, names=columns)
+
+
+def encode_arrow(batches, declared_types=None) -> Iterator[bytes]:
+    sink = _Sink()
+    writer = None
+    kinds = None
+    for columns, rows in batches:
+        if kinds is None:
+            kinds = column_kinds(columns, declared_types or {}, rows)
+        batch = _record_batch(columns, rows, kinds)
+        if writer is None:
+            writer = pa.ipc.new_stream(sink, batch.schema)
+        writer.write_batch(batch)
+        yield sink.drain()
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
+
+
+def encode_parquet(batches, declared_types=None) -> Iterator[bytes]:
+    sink = _Sink()
+    writer = None
+    kinds = None
+    for columns, rows in batches:
+        if kinds is None:
+            kinds = column_kinds(columns, declared_types or {}, rows)
+        batch = _record_batch(columns, rows, kinds)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, batch.schema)
+        # Each batch becomes one row group, which is flushed to the sink
+        writer.write_batch(batch, row_group_size=len(rows))
+        yield sink.drain()
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
@@ -0,0 +1,103 @@
+"""Compact dtypes for query result frames.
+
+``pd.read_sql_query`` returns 64-bit numbers and one Python object per text
+cell. Results are converted to nullable Int32/Int64 for integer columns,
+categoricals for low-cardinality text such as form types, and Arrow-backed
+strings for other text when pyarrow is installed. Dates stay text, so
+answers, pages and exports render them exactly as stored.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# Always categorical: a handful of values repeated on every row
+CATEGORICAL_COLUMNS = {"form_type", "form", "stmt", "fp", "afs", "prevrpt"}
+# Other text becomes categorical when values repeat at least this often
+CATEGORY_MIN_REPEAT = 2
+CATEGORY_MIN_ROWS = 32
+INT32_RANGE = (np.iinfo(np.int32).min, np.iinfo(np.int32).max)
+
+
+@dataclass
+class CompactionReport:
+    bytes_before: int
+    bytes_after: int
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+
+def frame_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True, index=False).sum())
+
+
+def _arrow_string_dtype():
+    try:
+        return pd.StringDtype("pyarrow")
+    except ImportError:
+        return None
+
+
+ARROW_STRING = _arrow_string_dtype()
+
+
+def compact_frame(df: pd.DataFrame, declared_types: Optional[Dict[str, str]] = None):
+    """Return ``df`` with compact dtypes and a report of the memory saved."""
+    declared_types = declared_types or {}
+    before = frame_bytes(df)
+    columns = {}
+    for column in df.columns:
+        compacted = compact_series(
+            df[column], declared_types.get(str(column), ""), str(column)
+        )
+        if compacted is not df[column]:
+            columns[column] = compacted
+    if columns:
+        df = df.assign(**columns)
+    return df, CompactionReport(before, frame_bytes(df))
+
+
+def compact_series(series: pd.Series, declared_type="", name=""):
+    """The series in the most compact dtype that keeps every value."""
+    if series.empty:
+        return series
+    if pd.api.types.is_bool_dtype(series):
+        return series
+    if pd.api.types.is_integer_dtype(series):
+        return _as_nullable_int(series)
+    if pd.api.types.is_float_dtype(series):
+        # Integer columns with NULLs come back as floats
+        values = series.dropna()
+        if "INT" in declared_type and (values == values.round()).all():
+            return _as_nullable_int(series)
+        return series
+    if not (
+        pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)
+    ):
+        return series
+    values = series.dropna()
+    if pd.api.types.infer_dtype(values, skipna=True) != "string":
+        return series
+    distinct = values.nunique()
+    if name.lower() in CATEGORICAL_COLUMNS or (
+        len(series) >= CATEGORY_MIN_ROWS
+        and distinct * CATEGORY_MIN_REPEAT <= len(series)
+    ):
+        return series.astype("category")
+    if ARROW_STRING is not None and series.dtype != ARROW_STRING:
+        return series.astype(ARROW_STRING)
+    return series
+
+
+def _as_nullable_int(series):
+    values = series.dropna()
+    if values.empty:
+        return series.astype("Int32")
+    low, high = values.min(), values.max()
+    if INT32_RANGE[0] <= low and high <= INT32_RANGE[1]:
+        return series.astype("Int32")
+    return series.astype("Int64")
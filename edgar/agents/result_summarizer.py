@@ -0,0 +1,182 @@
+"""Compact, token-budgeted descriptions of query results for the answer prompt."""
+
+import math
+import re
+from dataclasses import dataclass, field
+from typing import List
+
+import pandas as pd
+
+from ..config import env_int
+
+CHARS_PER_TOKEN = 4
+TOP_K = 5
+TRUNCATED = "\n[truncated to fit the token budget]"
+MAX_COLUMNS = 8
+MAX_CELL_CHARS = 40
+DATE_FORMATS = ("%Y-%m-%d", "%Y%m%d")
+# Columns that identify a filing and are worth keeping whatever the question
+KEY_COLUMNS = ("company_name", "name", "cik", "form_type", "form", "date_filed")
+DATE_NAME = re.compile(r"date|filed|period|accepted", re.IGNORECASE)
+
+
+def estimate_tokens(text) -> int:
+    """Rough token count for prompt budgeting (about four characters per token)."""
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+
+@dataclass
+class ResultSummary:
+    text: str
+    tokens: int
+    columns: List[str] = field(default_factory=list)
+    sampled_rows: int = 0
+    total_rows: int = 0
+
+
+class ResultSummarizer:
+    """Describes a result set within a token budget.
+
+    Small results are sent whole. Larger ones are reduced to the columns the
+    question refers to, local aggregates (distinct counts, top values, date
+    and numeric ranges) and evenly spaced sample rows, dropping sample rows
+    until the text fits the budget. If the aggregates alone are too long,
+    fewer top values are listed, and as a last resort the text is cut off at
+    the budget.
+    """
+
+    def __init__(self, token_budget=None):
+        self.token_budget = token_budget or env_int("EDGAR_ANSWER_TOKEN_BUDGET", 1500)
+
+    def summarize(self, question, df) -> ResultSummary:
+        if df.empty:
+            return ResultSummary(
+                "No results found", estimate_tokens("No results found")
+            )
+
+        columns = self.relevant_columns(question, df)
+        frame = df[columns]
+        elided = [
+            column
+            for column in df.columns
+            if column not in columns and df[column].notna().any()
+        ]
+        if elided:
+            label = f"All {len(df)} rows ({len(columns)} of {len(df.columns)} columns)"
+        else:
+            label = f"Full data ({len(df)} rows)"
+        full = f"{label}:\n{self._table(frame)}"
+        if estimate_tokens(full) <= self.token_budget:
+            return ResultSummary(full, estimate_tokens(full), columns, len(df), len(df))
+
+        header = f"Found {len(df)} rows"
+        if len(columns) < len(df.columns):
+            header += f" ({len(columns)} of {len(df.columns)} columns shown)"
+        for top_k in (TOP_K, 1):
+            text = (
+                f"{header}.\nColumn summaries:\n{self.column_summaries(frame, top_k)}"
+            )
+            if estimate_tokens(text) <= self.token_budget:
+                break
+
+        sample_size = min(len(df), 20)
+        while sample_size > 0:
+            sample = self.sample_rows(frame, sample_size)
+            candidate = f"{text}\nRepresentative rows:\n{self._table(sample)}"
+            if estimate_tokens(candidate) <= self.token_budget:
+                return ResultSummary(
+                    candidate,
+                    estimate_tokens(candidate),
+                    columns,
+                    sample_size,
+                    len(df),
+                )
+            sample_size //= 2
+        text = self._truncate(text)
+        return ResultSummary(text, estimate_tokens(text), columns, 0, len(df))
+
+    def _truncate(self, text) -> str:
+        """Cut ``text`` off so that it fits the token budget."""
+        if estimate_tokens(text) <= self.token_budget:
+            return text
+        keep = max(self.token_budget * CHARS_PER_TOKEN - len(TRUNCATED), 0)
+        return text[:keep] + TRUNCATED
+
+    def relevant_columns(self, question, df) -> List[str]:
+        """Columns named in the question first, then identifying columns."""
+        words = set(re.findall(r"[a-z0-9]+", (question or "").lower()))
+        scored = []
+        for position, column in enumerate(df.columns):
+            if df[column].isna().all():
+                continue
+            parts = set(re.findall(r"[a-z0-9]+", str(column).lower()))
+            score = 2 * len(parts & words)
+            if column in KEY_COLUMNS:
+                score += 1
+            scored.append((-score, position, column))
+        if len(scored) <= MAX_COLUMNS:
+            return [column for _, _, column in sorted(scored, key=lambda s: s[1])]
+        chosen = sorted(scored)[:MAX_COLUMNS]
+        return [column for _, _, column in sorted(chosen, key=lambda s: s[1])]
+
+    def column_summaries(self, df, top_k=TOP_K) -> str:
+        lines = []
+        for column in df.columns:
+            series = df[column].dropna()
+            lines.append(f"- {column}: {self._describe(column, series, top_k)}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def sample_rows(df, size):
+        """Evenly spaced rows so the sample spans the whole (ordered) result."""
+        if size >= len(df):
+            return df
+        if size <= 1:
+            return df.head(1)
+        step = (len(df) - 1) / (size - 1)
+        return df.iloc[sorted({round(i * step) for i in range(size)})]
+
+    def _describe(self, column, series, top_k=TOP_K):
+        if series.empty:
+            return "all empty"
+        if pd.api.types.is_numeric_dtype(series):
+            return (
+                f"min {series.min()}, max {series.max()}, "
+                f"mean {series.mean():.4g}, {series.nunique()} distinct"
+            )
+        dates = _as_dates(column, series)
+        if dates is not None:
+            return f"from {dates.min():%Y-%m-%d} to {dates.max():%Y-%m-%d}"
+        counts = series.astype(str).value_counts()
+        top = ", ".join(
+            f"{_clip(value)} ({count})" for value, count in counts.head(top_k).items()
+        )
+        return f"{len(counts)} distinct; top: {top}"
+
+    @staticmethod
+    def _table(df) -> str:
+        clipped = df.apply(
+            lambda column: (
+                column if pd.api.types.is_numeric_dtype(column) else column.map(_clip)
+            )
+        )
+        return clipped.to_string(index=False)
+
+
+def _clip(value):
+    if isinstance(value, str) and len(value) > MAX_CELL_CHARS:
+        return value[: MAX_CELL_CHARS - 3] + "..."
+    return value
+
+
+def _as_dates(column, series):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    if not DATE_NAME.search(str(column)):
+        return None
+    values = series.astype(str)
+    for date_format in DATE_FORMATS:
+        dates = pd.to_datetime(values, format=date_format, errors="coerce")
+        if dates.notna().all():
+            return dates
+    return None
@@ -0,0 +1,88 @@
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from ..config import env_str
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS slow_queries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    logged_at REAL NOT NULL,
+    question TEXT,
+    sql_query TEXT NOT NULL,
+    params TEXT,
+    elapsed_ms REAL NOT NULL,
+    row_count INTEGER,
+    query_plan TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_slow_queries_logged_at ON slow_queries(logged_at);
+"""
+
+
+@dataclass
+class SlowQueryEntry:
+    sql_query: str
+    elapsed_ms: float
+    params: Tuple = ()
+    question: Optional[str] = None
+    row_count: Optional[int] = None
+    query_plan: List[str] = field(default_factory=list)
+    logged_at: float = 0.0
+
+
+class SlowQueryLog:
+    """Local SQLite store of queries that exceeded the slow-query threshold."""
+
+    def __init__(self, db_path=None):
+        project_root = Path(__file__).parent.parent.parent
+        default_path = project_root / "data" / "slow_queries.db"
+        self.db_path = Path(db_path or env_str("EDGAR_SLOW_QUERY_LOG", default_path))
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+
+    def record(self, entry: SlowQueryEntry):
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO slow_queries "
+                "(logged_at, question, sql_query, params, elapsed_ms, row_count, "
+                "query_plan) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    entry.logged_at or time.time(),
+                    entry.question,
+                    entry.sql_query,
+                    json.dumps(list(entry.params)),
+                    entry.elapsed_ms,
+                    entry.row_count,
+                    "\n".join(entry.query_plan),
+                ),
+            )
+            self.conn.commit()
+
+    def entries(self, since=None) -> List[SlowQueryEntry]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT sql_query, elapsed_ms, question, row_count, query_plan, "
+                "logged_at, params FROM slow_queries WHERE logged_at >= ? ORDER BY logged_at",
+                (since or 0,),
+            ).fetchall()
+        return [
+            SlowQueryEntry(
+                sql_query=row[0],
+                elapsed_ms=row[1],
+                question=row[2],
+                row_count=row[3],
+                query_plan=row[4].split("\n") if row[4] else [],
+                logged_at=row[5],
+                params=tuple(json.loads(row[6])) if row[6] else (),
+            )
+            for row in rows
+        ]
+
+    def close(self):
+        self.conn.close()
@@ -1,24 +1,282 @@
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
 import pandas as pd
 
+from ..config import env_bool, env_float
+from ..observability import span, sql_hash
+from .query_guard import QueryCostGuard, strip_sql, table_aliases
+from .read_only import ReadOnlyAuthorizer, is_authorization_error, is_read_statement
+from .result_frames import compact_frame, frame_bytes
+from .slow_query_log import SlowQueryEntry
+
+DEFAULT_TIMEOUT_SECONDS = 10.0
+DEFAULT_SLOW_QUERY_MS = 500.0
+PROGRESS_CHECK_INSTRUCTIONS = 10_000
+FORBIDDEN_ERROR = "Query contains forbidden operations"
+
+
+@dataclass
+class ExecutionResult:
+    df: Optional[pd.DataFrame] = None
+    error: Optional[str] = None
+    sql_query: Optional[str] = None
+    params: Tuple = ()
+    query_plan: List[str] = field(default_factory=list)
+    guard_notes: List[str] = field(default_factory=list)
+    elapsed_ms: float = 0.0
+    memory_bytes: int = 0
+    memory_saved_bytes: int = 0
+    backend: str = "sqlite"
+
 
 class SQLExecutorAgent:
-    def __init__(self, conn):
-        self.conn = conn
+    """Runs generated SQL behind the authorizer, cost guard and time budget.
+
+    Given a ``connection_factory``, every thread gets its own connection so
+    concurrent requests do not share one SQLite handle; a plain ``conn`` is
+    used as-is and must stay on the thread that created it. Given a
+    ``router``, statements it picks run on its analytical backend after the
+    SQLite checks, falling back to SQLite if the backend fails. Given a
+    ``columnar`` index, the statements it understands are answered from
+    memory before either.
+    """
+
+    def __init__(
+        self,
+        conn=None,
+        timeout_seconds=None,
+        cost_guard=None,
+        slow_query_log=None,
+        slow_query_ms=None,
+        authorizer=None,
+        connection_factory=None,
+        compact_results=None,
+        router=None,
+        columnar=None,
+    ):
+        if conn is None and connection_factory is None:
+            raise ValueError("Either conn or connection_factory is required")
+        self.connection_factory = connection_factory
+        self._local = threading.local()
+        self.conn = conn if conn is not None else connection_factory()
+        self._local.conn = self.conn
+        # Connections this executor opened, closed by close()
+        self._opened = [] if conn is not None else [self.conn]
+        self._opened_lock = threading.Lock()
+        self.authorizer = authorizer or ReadOnlyAuthorizer.for_connection(self.conn)
+        self.authorizer.install(self.conn)
+        self.timeout_seconds = timeout_seconds or env_float(
+            "EDGAR_QUERY_TIMEOUT_SECONDS", DEFAULT_TIMEOUT_SECONDS
+        )
+        self.cost_guard = cost_guard or QueryCostGuard(self.conn)
+        self.slow_query_log = slow_query_log
+        self.slow_query_ms = (
+            slow_query_ms
+            if slow_query_ms is not None
+            else env_float("EDGAR_SLOW_QUERY_MS", DEFAULT_SLOW_QUERY_MS)
+        )
+        self.compact_results = (
+            compact_results
+            if compact_results is not None
+            else env_bool("EDGAR_COMPACT_RESULTS", True)
+        )
+        self._declared_types: Dict[str, Dict[str, str]] = {}
+        self.router = router
+        self.columnar = columnar
 
-    def execute_sql_query(self, sql_query):
+    def connection(self):
+        """Return the connection for the calling thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        if self.connection_factory is None:
+            return self.conn
+        conn = self._local.conn = self.connection_factory()
+        with self._opened_lock:
+            self._opened.append(conn)
+        self.authorizer.install(conn)
+        return conn
+
+    def close(self):
+        """Close the connections opened from ``connection_factory``.
+
+        A connection the factory bound to its thread (sqlite3's default
+        ``check_same_thread``) can only be closed there, and is left to be
+        closed when that thread's connection is released.
+        """
+        with self._opened_lock:
+            opened, self._opened = self._opened, []
+        for conn in opened:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                pass
+
+    def declared_types(self, sql_query) -> Dict[str, str]:
+        """Declared SQLite type of each column of the tables a query reads."""
+        types = {}
+        for table in set(table_aliases(sql_query).values()):
+            key = table.lower()
+            if key not in self.authorizer.allowed_tables:
+                continue
+            if key not in self._declared_types:
+                # PRAGMA is denied to generated SQL, so lift the authorizer for
+                # this fixed statement on a table it already allows
+                conn = self.connection()
+                conn.set_authorizer(None)
+                try:
+                    rows = conn.execute(f'PRAGMA table_info("{table}")').fetchall()
+                finally:
+                    self.authorizer.install(conn)
+                self._declared_types[key] = {
+                    row[1]: (row[2] or "").upper() for row in rows
+                }
+            for column, declared in self._declared_types[key].items():
+                types.setdefault(column, declared)
+        return types
+
+    def execute_sql_query(self, sql_query, params=()):
+        result = self.execute(sql_query, params)
+        return result.df, result.error
+
+    def validate(self, sql_query, params=()) -> Optional[str]:
+        """Compile the statement with EXPLAIN without running it; return any error."""
+        if not is_read_statement(sql_query):
+            return FORBIDDEN_ERROR
         try:
-            forbidden = [
-                "DROP",
-                "DELETE",
-                "INSERT",
-                "UPDATE",
-                "CREATE",
-                "ALTER",
-                "TRUNCATE",
-            ]
-            if any(keyword in sql_query.upper() for keyword in forbidden):
-                return None, "Query contains forbidden operations"
-            df = pd.read_sql_query(sql_query, self.conn)
-            return df, None
+            self.connection().execute(
+                f"EXPLAIN {strip_sql(sql_query)}", params
+            ).fetchall()
+        except sqlite3.Error as e:
+            if is_authorization_error(e):
+                return FORBIDDEN_ERROR
+            return str(e)
+        return None
+
+    def execute(self, sql_query, params=(), question=None) -> ExecutionResult:
+        with span("sql_executor.execute") as current:
+            if current.recording:
+                current.set_attribute("sql_hash", sql_hash(sql_query))
+            result = self._execute(sql_query, params, question)
+            current.set_attribute(
+                "row_count", None if result.df is None else len(result.df)
+            )
+            current.set_attribute("elapsed_ms", result.elapsed_ms)
+            if result.error:
+                current.set_attribute("error", result.error)
+            return result
+
+    def _execute(self, sql_query, params, question) -> ExecutionResult:
+        if not is_read_statement(sql_query):
+            self.authorizer.record_rejected_query()
+            return ExecutionResult(error=FORBIDDEN_ERROR, sql_query=sql_query)
+
+        try:
+            decision = self.cost_guard.review(sql_query, params, self.connection())
+        except sqlite3.Error as e:
+            if is_authorization_error(e):
+                self.authorizer.record_rejected_query()
+                return ExecutionResult(error=FORBIDDEN_ERROR, sql_query=sql_query)
+            return ExecutionResult(
+                error=f"Error executing query: {e}", sql_query=sql_query
+            )
+
+        result = ExecutionResult(
+            sql_query=decision.sql_query,
+            params=tuple(params),
+            query_plan=decision.query_plan,
+            guard_notes=decision.notes,
+        )
+        if decision.rejected:
+            result.error = f"Query rejected by cost guard: {decision.rejected_reason}"
+            return result
+
+        started = time.perf_counter()
+        try:
+            result.df = self._read(decision, params, result)
+            if self.compact_results:
+                result.df, report = compact_frame(
+                    result.df, self.declared_types(decision.sql_query)
+                )
+                result.memory_bytes = report.bytes_after
+                result.memory_saved_bytes = report.bytes_saved
+            else:
+                result.memory_bytes = frame_bytes(result.df)
         except Exception as e:
-            return None, f"Error executing query: {e}"
+            # pandas wraps driver errors, so look at the cause
+            cause = e.__cause__ or e
+            if is_authorization_error(cause):
+                self.authorizer.record_rejected_query()
+                result.error = FORBIDDEN_ERROR
+            elif str(cause) == "interrupted" or isinstance(cause, TimeoutError):
+                result.error = (
+                    f"Query exceeded the {self.timeout_seconds:g}s time budget "
+                    "and was cancelled"
+                )
+            else:
+                result.error = f"Error executing query: {e}"
+        result.elapsed_ms = (time.perf_counter() - started) * 1000
+        self._log_if_slow(result, question)
+        return result
+
+    def _log_if_slow(self, result: ExecutionResult, question):
+        if not self.slow_query_log or result.elapsed_ms < self.slow_query_ms:
+            return
+        self.slow_query_log.record(
+            SlowQueryEntry(
+                sql_query=result.sql_query,
+                params=result.params,
+                elapsed_ms=result.elapsed_ms,
+                question=question,
+                row_count=None if result.df is None else len(result.df),
+                query_plan=result.query_plan,
+            )
+        )
+
+    def _read(self, decision, params, result: ExecutionResult) -> pd.DataFrame:
+        """Read the reviewed statement on the backend the router picks."""
+        if self.columnar is not None:
+            df = self.columnar.execute(decision.sql_query, params)
+            if df is not None:
+                result.backend = self.columnar.name
+                return df
+        if self.router is not None:
+            conn = self.connection()
+            large_tables = [
+                table
+                for table in sorted(set(table_aliases(decision.sql_query).values()))
+                if self.cost_guard.is_large(table, conn)
+            ]
+            route = self.router.route(decision, large_tables)
+            backend = self.router.backend
+            if route.backend == backend.name:
+                try:
+                    df = backend.read(route.sql_query, params, self.timeout_seconds)
+                    result.backend = backend.name
+                    result.guard_notes.append(f"Ran on {backend.name}: {route.reason}")
+                    return df
+                except TimeoutError:
+                    raise
+                except Exception as e:
+                    print(f"{backend.name} failed, running on SQLite instead: {e}")
+                    result.guard_notes.append(f"{backend.name} failed: {e}")
+            elif large_tables:
+                result.guard_notes.append(f"Kept on SQLite: {route.reason}")
+        return self._read_with_deadline(decision.sql_query, params)
+
+    def _read_with_deadline(self, sql_query, params=()):
+        conn = self.connection()
+        deadline = time.monotonic() + self.timeout_seconds
+
+        def past_deadline():
+            return int(time.monotonic() > deadline)
+
+        conn.set_progress_handler(past_deadline, PROGRESS_CHECK_INSTRUCTIONS)
+        try:
+            return pd.read_sql_query(sql_query, conn, params=params)
+        finally:
+            conn.set_progress_handler(None, 0)
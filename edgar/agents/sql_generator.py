@@ -1,18 +1,27 @@
-import os
 import re
 from pathlib import Path
 
-from openai import OpenAI
+from ..observability import span, sql_hash, stage
+from .llm_client import default_llm_client
+from .sql_templates import parameterize_sql
+
+# Rows the prompt asks the model to cap answers at
+ANSWER_ROW_LIMIT = 10
 
 
 class SQLGeneratorAgent:
-    def __init__(self):
-        self.openai_client = None
-        api_key = os.getenv("OPENAI_API_KEY")
-        if api_key:
-            self.openai_client = OpenAI(api_key=api_key)
+    def __init__(self, llm_client=None):
+        self.llm_client = llm_client or default_llm_client()
+        self._schema_info = None
 
     def get_database_schema_info(self):
+        """Schema description for the prompt, read from disk once per agent."""
+        if self._schema_info is None:
+            with stage("schema_load"):
+                self._schema_info = self._read_schema_info()
+        return self._schema_info
+
+    def _read_schema_info(self):
         # Get project root directory (go up from edgar/services/)
         project_root = Path(__file__).parent.parent.parent
 
@@ -41,13 +50,24 @@ class SQLGeneratorAgent:
         normalized_query = re.sub(cik_pattern, replace_cik, user_query)
         return normalized_query
 
-    def generate_sql_query(self, user_query):
-        if not self.openai_client:
-            print("OpenAI API key not configured")
-            return None, None
+    def generate_sql_template(self, user_query, temperature=None):
+        """Generate SQL and split its literals out into bound parameters."""
+        sql_query, prompt = self.generate_sql_query(user_query, temperature)
+        if not sql_query:
+            return None, prompt
+        return parameterize_sql(sql_query), prompt
+
+    def repair_sql_template(self, user_query, failed_sql, error):
+        """Ask for a corrected query once, given the SQL that failed and why."""
+        sql_query, prompt = self.repair_sql_query(user_query, failed_sql, error)
+        if not sql_query:
+            return None, prompt
+        return parameterize_sql(sql_query), prompt
+
+    def build_sql_prompt(self, user_query):
         normalized_query = self.normalize_cik_in_query(user_query)
         schema = self.get_database_schema_info()
-        prompt = f"""
+        return f"""
         You are a SQL expert. Given the database schema and user query, generate a precise SQL query.
 
         {schema}
@@ -66,14 +86,45 @@ class SQLGeneratorAgent:
         9. Use the query patterns provided in the schema as examples
 
         **Ensure that you follow these rules:**
-        1. Limit the number of results to max 10 whenever limit is applicable
+        1. Limit the number of results to max {ANSWER_ROW_LIMIT} whenever limit is applicable
         2. Always use SELECT * in the query unless you need to apply DISTINCT
 
         SQL Query:
         """
+
+    def generate_sql_query(self, user_query, temperature=None):
+        if not self.llm_client.available:
+            print("OpenAI API key not configured")
+            return None, None
+        prompt = self.build_sql_prompt(user_query)
+        return self._request_sql(prompt, temperature), prompt
+
+    def repair_sql_query(self, user_query, failed_sql, error):
+        if not self.llm_client.available:
+            print("OpenAI API key not configured")
+            return None, None
+        prompt = f"""{self.build_sql_prompt(user_query)}
+        {failed_sql}
+
+        The query above failed against the live SQLite database with this error:
+        {error}
+
+        Return only a corrected SQL query that follows the same rules.
+
+        SQL Query:
+        """
+        return self._request_sql(prompt, temperature=0), prompt
+
+    def _request_sql(self, prompt, temperature=None):
+        with span("sql_generator.request", temperature=temperature) as current:
+            sql_query = self._complete_sql(prompt, temperature)
+            if current.recording:
+                current.set_attribute("sql_hash", sql_query and sql_hash(sql_query))
+            return sql_query
+
+    def _complete_sql(self, prompt, temperature):
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o-mini",
+            response = self.llm_client.chat(
                 messages=[
                     {
                         "role": "system",
@@ -82,16 +133,17 @@ class SQLGeneratorAgent:
                     {"role": "user", "content": prompt},
                 ],
                 max_tokens=500,
+                temperature=temperature,
             )
             if response.choices and response.choices[0].message.content:
                 sql_query = response.choices[0].message.content.strip()
                 sql_query = sql_query.replace("```sql", "").replace("```", "").strip()
                 print(f"Generated SQL Query: {sql_query}")
-                return sql_query, prompt
+                return sql_query
             else:
                 print("No response received from OpenAI API")
-                return None, prompt
+                return None
 
         except Exception as e:
             print(f"Error generating SQL: {e}")
-            return None, prompt
+            return None
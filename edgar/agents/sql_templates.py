@@ -0,0 +1,269 @@
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+DEFAULT_CACHE_SIZE = 256
+MAX_SLOT_WORDS = 5
+
+# Numbers in these clauses are positions or row counts, not values
+_LITERAL_NUMBER_CLAUSES = {"SELECT", "ORDER", "GROUP", "LIMIT", "OFFSET"}
+_CLAUSE_KEYWORDS = _LITERAL_NUMBER_CLAUSES | {
+    "FROM",
+    "WHERE",
+    "HAVING",
+    "ON",
+    "JOIN",
+    "UNION",
+    "EXCEPT",
+    "INTERSECT",
+}
+_TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<string>'(?:[^']|'')*')
+  | (?P<identifier>"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\])
+  | (?P<comment>--[^\n]*|/\*.*?\*/)
+  | (?P<number>(?<![\w.])\d+(?:\.\d+)?(?![\w.]))
+  | (?P<word>[A-Za-z_]\w*)
+  | (?P<other>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+# Words that signal a captured slot has swallowed another part of the question
+_SLOT_STOP_WORDS = {
+    "after",
+    "at",
+    "before",
+    "between",
+    "by",
+    "during",
+    "for",
+    "from",
+    "in",
+    "last",
+    "on",
+    "over",
+    "since",
+    "this",
+    "within",
+}
+# Values that join several entities, which one slot cannot stand for
+_SLOT_CONJUNCTIONS = {"and", "or", "vs", "versus"}
+# Form types such as 10-K, 8-K, 10-K/A, S-1, 13F-HR or DEF 14A
+_FORM_PATTERN = re.compile(
+    r"(?:[A-Z]+[- ]?)?\d+[A-Z]*(?:-[A-Z0-9]+)*(?:/A)?", re.IGNORECASE
+)
+
+
+@dataclass
+class SQLTemplate:
+    template: str
+    params: Tuple = ()
+
+    @property
+    def shape(self) -> str:
+        return " ".join(self.template.split())
+
+    def render(self) -> str:
+        """Inline the parameters for display; never used for execution."""
+        values = iter(self.params)
+        parts = []
+        for match in _TOKEN_PATTERN.finditer(self.template):
+            if match.group() != "?" or match.lastgroup != "other":
+                parts.append(match.group())
+                continue
+            value = next(values)
+            if isinstance(value, str):
+                value = "'" + value.replace("'", "''") + "'"
+            parts.append(str(value))
+        return "".join(parts)
+
+
+def parameterize_sql(sql_query: str) -> SQLTemplate:
+    """Replace value literals with ? placeholders and return them as parameters."""
+    parts = []
+    params = []
+    clause = None
+    for match in _TOKEN_PATTERN.finditer(sql_query):
+        kind = match.lastgroup
+        text = match.group()
+        if kind == "word" and text.upper() in _CLAUSE_KEYWORDS:
+            clause = text.upper()
+        if kind == "string" and clause != "SELECT":
+            parts.append("?")
+            params.append(text[1:-1].replace("''", "'"))
+            continue
+        if kind == "number" and clause not in _LITERAL_NUMBER_CLAUSES:
+            parts.append("?")
+            params.append(float(text) if "." in text else int(text))
+            continue
+        parts.append(text)
+    return SQLTemplate(template="".join(parts), params=tuple(params))
+
+
+def canonical_question(question: str) -> str:
+    return normalize_question(question).lower()
+
+
+def normalize_question(question: str) -> str:
+    return " ".join(question.split()).rstrip("?.! ")
+
+
+@dataclass
+class _Slot:
+    param_index: int
+    prefix: str = ""
+    suffix: str = ""
+    case: str = "as_is"
+    numeric: bool = False
+    # "form" for a form type, "name" for anything else; a new value must match
+    kind: str = "name"
+
+
+@dataclass
+class _LearnedQuery:
+    pattern: "re.Pattern"
+    template: str
+    params: Tuple
+    slots: List[_Slot] = field(default_factory=list)
+
+
+class SQLTemplateCache:
+    """Reuses generated SQL templates for questions that differ only in their values.
+
+    A question such as "Show me all filings from Apple" that produced
+    ``... LIKE ?`` with ``'%APPLE%'`` is learned as the pattern
+    "show me all filings from (...)"; a later "Show me all filings from Tesla"
+    reuses the template with ``'%TESLA%'`` instead of calling the LLM again.
+    """
+
+    def __init__(self, max_entries=DEFAULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def learn(self, question: str, sql_template: SQLTemplate):
+        learned = _learn_query(normalize_question(question), sql_template)
+        with self._lock:
+            self._entries[learned.pattern.pattern] = learned
+            self._entries.move_to_end(learned.pattern.pattern)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def lookup(self, question: str) -> Optional[SQLTemplate]:
+        normalized = normalize_question(question)
+        with self._lock:
+            for key, learned in reversed(self._entries.items()):
+                params = _match_params(learned, normalized)
+                if params is None:
+                    continue
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return SQLTemplate(template=learned.template, params=params)
+            self.misses += 1
+            return None
+
+
+def _learn_query(question: str, sql_template: SQLTemplate) -> _LearnedQuery:
+    spans = []
+    slots = []
+    for index, value in enumerate(sql_template.params):
+        slot = _locate_slot(question, index, value, spans)
+        if slot:
+            slots.append(slot)
+
+    ordered = sorted(zip(spans, slots), key=lambda pair: pair[0][0])
+    pattern_parts = []
+    position = 0
+    for (start, end), _ in ordered:
+        pattern_parts.append(re.escape(question[position:start]))
+        pattern_parts.append(r"([\w&.,'/-]+(?:\s+[\w&.,'/-]+)*?)")
+        position = end
+    pattern_parts.append(re.escape(question[position:]))
+    return _LearnedQuery(
+        pattern=re.compile("".join(pattern_parts), re.IGNORECASE),
+        template=sql_template.template,
+        params=sql_template.params,
+        slots=[slot for _, slot in ordered],
+    )
+
+
+def _locate_slot(question, index, value, spans) -> Optional[_Slot]:
+    if isinstance(value, (int, float)):
+        core = str(value)
+        match = re.search(rf"(?<!\d)0*{re.escape(core)}(?!\d)", question)
+        slot = _Slot(param_index=index, numeric=True)
+    else:
+        core = value.strip("%").strip()
+        if not core or "%" in core or "_" in core:
+            return None
+        match = re.search(rf"(?<!\w){re.escape(core)}(?!\w)", question, re.IGNORECASE)
+        slot = _Slot(
+            param_index=index,
+            prefix=value[: len(value) - len(value.lstrip("%"))],
+            suffix=value[len(value.rstrip("%")) :],
+            case=_case_of(core),
+            kind="form" if _FORM_PATTERN.fullmatch(core) else "name",
+        )
+    if not match or any(_overlaps(match.span(), span) for span in spans):
+        return None
+    spans.append(match.span())
+    return slot
+
+
+def _case_of(text: str) -> str:
+    if text.isupper():
+        return "upper"
+    if text.islower():
+        return "lower"
+    return "as_is"
+
+
+def _overlaps(first, second) -> bool:
+    return first[0] < second[1] and second[0] < first[1]
+
+
+def _match_params(learned: _LearnedQuery, question: str) -> Optional[Tuple]:
+    match = learned.pattern.fullmatch(question)
+    if not match:
+        return None
+    params = list(learned.params)
+    for slot, captured in zip(learned.slots, match.groups()):
+        words = captured.split()
+        if len(words) > MAX_SLOT_WORDS or _SLOT_STOP_WORDS & {
+            word.lower() for word in words
+        }:
+            return None
+        if slot.numeric:
+            if not captured.isdigit():
+                return None
+            params[slot.param_index] = int(captured)
+            continue
+        if not _fits_slot(slot, captured):
+            return None
+        if slot.case == "upper":
+            captured = captured.upper()
+        elif slot.case == "lower":
+            captured = captured.lower()
+        params[slot.param_index] = f"{slot.prefix}{captured}{slot.suffix}"
+    return tuple(params)
+
+
+def _fits_slot(slot: _Slot, captured: str) -> bool:
+    """Whether ``captured`` is the same kind of value the slot was learned from.
+
+    "Show all filings for Apple" must not reuse "Show 10-K filings for Apple"
+    with ``ALL`` as the form type, and "Apple and Microsoft" is two companies,
+    not one name to match.
+    """
+    if slot.kind == "form":
+        return _FORM_PATTERN.fullmatch(captured) is not None
+    return "," not in captured and not _SLOT_CONJUNCTIONS & {
+        word.lower() for word in captured.split()
+    }
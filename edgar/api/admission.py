@@ -0,0 +1,211 @@
+"""Admission control for API requests.
+
+At most ``max_concurrency`` requests are answered at once. Up to ``max_queue``
+more wait in a priority queue, where interactive requests go ahead of batch
+ones. When the queue is full a new request is refused straight away (429),
+unless it outranks a queued one, in which case the newest lowest-priority
+waiter is refused instead. A request that waits longer than
+``queue_timeout_seconds`` is refused with 503. Both carry a Retry-After hint.
+
+Streamed responses such as exports outlive the slot that planned them, so
+StreamLimiter separately caps how many streams run at once.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import List, Tuple
+
+from ..config import env_float, env_int
+from ..observability import REGISTRY
+
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+QUEUE_DEPTH = REGISTRY.gauge(
+    "edgar_admission_queue_depth",
+    "Requests waiting for an admission slot, by priority class",
+    ["priority"],
+)
+IN_FLIGHT = REGISTRY.gauge(
+    "edgar_admission_in_flight", "Requests currently admitted and being answered"
+)
+WAIT_SECONDS = REGISTRY.histogram(
+    "edgar_admission_wait_seconds",
+    "Time requests spent queued before being admitted",
+    ["priority"],
+)
+REJECTED_TOTAL = REGISTRY.counter(
+    "edgar_admission_rejected_total",
+    "Requests refused by admission control, by priority class and reason",
+    ["priority", "reason"],
+)
+
+
+STREAMS_IN_FLIGHT = REGISTRY.gauge(
+    "edgar_admission_streams_in_flight",
+    "Streamed responses, such as exports, currently being sent",
+)
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code, detail, retry_after):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    def __init__(
+        self, max_concurrency=None, max_queue=None, queue_timeout_seconds=None
+    ):
+        self.max_concurrency = max(
+            1, max_concurrency or env_int("EDGAR_MAX_CONCURRENT_REQUESTS", 16)
+        )
+        self.max_queue = (
+            max_queue
+            if max_queue is not None
+            else env_int("EDGAR_MAX_QUEUED_REQUESTS", 64)
+        )
+        self.queue_timeout_seconds = (
+            queue_timeout_seconds
+            if queue_timeout_seconds is not None
+            else env_float("EDGAR_QUEUE_TIMEOUT_SECONDS", 30.0)
+        )
+        self.active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        # Moving average of how long an admitted request holds its slot
+        self._service_seconds = 1.0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    @asynccontextmanager
+    async def admit(self, priority="interactive"):
+        """Hold an admission slot for the body; raises AdmissionRejected."""
+        await self.acquire(priority)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            held = time.perf_counter() - started
+            self._service_seconds = 0.8 * self._service_seconds + 0.2 * held
+            self.release()
+
+    async def acquire(self, priority="interactive"):
+        rank = PRIORITIES[priority]
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            IN_FLIGHT.set(self.active)
+            WAIT_SECONDS.observe(0.0, priority=priority)
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self._shed(rank, priority)
+        future = asyncio.get_running_loop().create_future()
+        entry = (rank, next(self._sequence), future)
+        heapq.heappush(self._waiters, entry)
+        self._update_depth()
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(future, self.queue_timeout_seconds)
+        except asyncio.TimeoutError:
+            self._remove(entry)
+            REJECTED_TOTAL.inc(priority=priority, reason="timeout")
+            raise AdmissionRejected(
+                503, "Timed out waiting for capacity", self.retry_after()
+            ) from None
+        except asyncio.CancelledError:
+            # The client went away; hand on the slot if it had just been granted
+            if future.done() and not future.cancelled():
+                self.release()
+            else:
+                self._remove(entry)
+            raise
+        finally:
+            WAIT_SECONDS.observe(time.perf_counter() - started, priority=priority)
+
+    def release(self):
+        """Pass the slot to the highest-priority waiter, or free it."""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                self._update_depth()
+                return
+        self._update_depth()
+        self.active -= 1
+        IN_FLIGHT.set(self.active)
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free, from queue length and service time."""
+        backlog = (len(self._waiters) + 1) / self.max_concurrency
+        return max(1, math.ceil(backlog * self._service_seconds))
+
+    def _shed(self, rank, priority):
+        """Make room in a full queue for ``rank`` or refuse the new request."""
+        victim = max(self._waiters, default=None)
+        if victim is None or victim[0] <= rank:
+            REJECTED_TOTAL.inc(priority=priority, reason="queue_full")
+            raise AdmissionRejected(429, "Server is busy", self.retry_after())
+        self._remove(victim)
+        victim_priority = next(
+            name for name, value in PRIORITIES.items() if value == victim[0]
+        )
+        REJECTED_TOTAL.inc(priority=victim_priority, reason="shed")
+        victim[2].set_exception(
+            AdmissionRejected(429, "Server is busy", self.retry_after())
+        )
+
+    def _remove(self, entry):
+        if entry in self._waiters:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+        self._update_depth()
+
+    def _update_depth(self):
+        for name, rank in PRIORITIES.items():
+            QUEUE_DEPTH.set(
+                sum(1 for waiter in self._waiters if waiter[0] == rank), priority=name
+            )
+
+
+class StreamLimiter:
+    """Caps concurrent streamed responses; a full limiter refuses with 429.
+
+    Each stream holds its own producer thread and SQLite connection until the
+    last byte is sent, so streams do not queue: a client is told to come back
+    once one is likely to have finished.
+    """
+
+    def __init__(self, max_streams=None):
+        self.max_streams = max(
+            1, max_streams or env_int("EDGAR_MAX_CONCURRENT_EXPORTS", 4)
+        )
+        self.active = 0
+        # Moving average of how long a stream holds its slot
+        self._stream_seconds = 10.0
+
+    def acquire(self) -> float:
+        """Take a stream slot and return its start time; raises AdmissionRejected."""
+        if self.active >= self.max_streams:
+            REJECTED_TOTAL.inc(priority="stream", reason="streams_full")
+            raise AdmissionRejected(
+                429, "Too many exports in progress", self.retry_after()
+            )
+        self.active += 1
+        STREAMS_IN_FLIGHT.set(self.active)
+        return time.perf_counter()
+
+    def release(self, started: float):
+        held = time.perf_counter() - started
+        self._stream_seconds = 0.8 * self._stream_seconds + 0.2 * held
+        self.active -= 1
+        STREAMS_IN_FLIGHT.set(self.active)
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self._stream_seconds / self.max_streams))
@@ -0,0 +1,180 @@
+"""Background jobs for questions too slow to answer within one HTTP request.
+
+Jobs run on a bounded thread pool. Each job's status is written to
+``<job_dir>/<id>.json`` and its result to ``<id>.result.json``, so results
+can be fetched after a restart until they are older than the TTL.
+"""
+
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from ..config import env_int, env_str
+from ..observability.tracing import new_id
+
+JOB_ID = re.compile(r"^[0-9a-f]{16}$")
+FINISHED = ("succeeded", "failed")
+
+
+@dataclass
+class Job:
+    id: str
+    query: str
+    status: str = "queued"
+    submitted_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        now = time.time()
+        data["queued_ms"] = (
+            ((self.started_at or now) - self.submitted_at) * 1000
+            if self.submitted_at
+            else None
+        )
+        data["elapsed_ms"] = (
+            ((self.finished_at or now) - self.started_at) * 1000
+            if self.started_at
+            else None
+        )
+        return data
+
+
+class JobManager:
+    """Runs questions in the background and keeps their results on disk.
+
+    ``run(question, job_id)`` answers one question and returns the engine
+    result; ``render(result, job_id)`` turns it into the JSON stored as the
+    job's result.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[str, str], Dict],
+        render: Callable[[Dict, str], Dict],
+        workers=None,
+        job_dir=None,
+        ttl_seconds=None,
+    ):
+        project_root = Path(__file__).parent.parent.parent
+        self.run = run
+        self.render = render
+        self.job_dir = Path(
+            job_dir or env_str("EDGAR_JOB_DIR", project_root / "data" / "jobs")
+        )
+        self.job_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = (
+            ttl_seconds
+            if ttl_seconds is not None
+            else env_int("EDGAR_JOB_TTL_SECONDS", 3600)
+        )
+        self.workers = workers or env_int("EDGAR_JOB_WORKERS", 2)
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="edgar-job"
+        )
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._last_cleanup = 0.0
+
+    def submit(self, question) -> Job:
+        self.cleanup()
+        job = Job(id=new_id(), query=question, submitted_at=time.time())
+        with self._lock:
+            self._jobs[job.id] = job
+        self._save(job)
+        self._pool.submit(self._execute, job)
+        return job
+
+    def get(self, job_id) -> Optional[Job]:
+        if not JOB_ID.match(job_id):
+            return None
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        path = self._status_path(job_id)
+        if not path.exists():
+            return None
+        return Job(**json.loads(path.read_text(encoding="utf-8")))
+
+    def result(self, job_id) -> Optional[Dict]:
+        """The stored result of a finished job, or None."""
+        job = self.get(job_id)
+        if job is None or not job.finished:
+            return None
+        path = self._result_path(job_id)
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def cleanup(self, force=False) -> int:
+        """Delete jobs finished longer than the TTL ago; returns how many."""
+        now = time.time()
+        # Sweeping lists the job directory, so do it at most once a minute
+        if not force and now - self._last_cleanup < min(60, self.ttl_seconds):
+            return 0
+        self._last_cleanup = now
+        cutoff = now - self.ttl_seconds
+        removed = 0
+        with self._lock:
+            for job_id in [
+                job.id
+                for job in self._jobs.values()
+                if job.finished and job.finished_at < cutoff
+            ]:
+                del self._jobs[job_id]
+            active = set(self._jobs)
+        for path in self.job_dir.glob("*.json"):
+            job_id = path.name.split(".", 1)[0]
+            if job_id in active or path.stat().st_mtime >= cutoff:
+                continue
+            path.unlink(missing_ok=True)
+            removed += not path.name.endswith(".result.json")
+        return removed
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+    def _execute(self, job: Job):
+        job.status = "running"
+        job.started_at = time.time()
+        self._save(job)
+        try:
+            result = self.run(job.query, job.id)
+            self._write(self._result_path(job.id), self.render(result, job.id))
+            job.timings_ms = result.get("timings_ms") or {}
+            job.error = result.get("error")
+            job.status = "succeeded" if result["success"] else "failed"
+        except Exception as e:
+            print(f"Job {job.id} failed: {e}")
+            job.error = str(e)
+            job.status = "failed"
+        job.finished_at = time.time()
+        self._save(job)
+
+    def _save(self, job: Job):
+        self._write(self._status_path(job.id), asdict(job))
+
+    def _write(self, path: Path, payload):
+        # Write then rename so a poll never reads a half-written file
+        partial = path.with_suffix(".tmp")
+        partial.write_text(json.dumps(payload, default=str), encoding="utf-8")
+        partial.replace(path)
+
+    def _status_path(self, job_id) -> Path:
+        return self.job_dir / f"{job_id}.json"
+
+    def _result_path(self, job_id) -> Path:
+        return self.job_dir / f"{job_id}.result.json"
@@ -1,13 +1,44 @@
-from typing import Optional
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
 
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 
+from ..agents.pagination import InvalidCursor, Page
+from ..agents.query_log import QueryLog, QueryLogEntry
+from ..agents.result_export import EXPORT_FORMATS, ExportError, ResultExporter
+from ..agents.sql_templates import canonical_question
+from ..config import env_bool, env_int
 from ..core.engine import EdgarQueryEngine
+from ..observability import CONTENT_TYPE, render_metrics, span
+from ..observability.tracing import new_id
+from .admission import AdmissionController, AdmissionRejected, StreamLimiter
+from .jobs import JobManager
 
-app = FastAPI(title="EDGAR Filings Query API")
+_engine: Optional[EdgarQueryEngine] = None
+_query_log: Optional[QueryLog] = None
+_jobs: Optional[JobManager] = None
+_admission: Optional[AdmissionController] = None
+_streams: Optional[StreamLimiter] = None
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Close the engine's connections when the server shuts down."""
+    yield
+    global _engine
+    if _engine is not None:
+        _engine.close()
+        _engine = None
+
+
+app = FastAPI(title="EDGAR Filings Query API", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -19,14 +50,169 @@ app.add_middleware(
 )
 
 
+DEBUG_FIELDS = (
+    "timings_ms",
+    "row_count",
+    "backend",
+    "result_bytes",
+    "result_bytes_saved",
+    "prompt_tokens",
+    "llm_tokens",
+    "sql_cache_hit",
+    "generation_mode",
+    "coalesced",
+    "profile_path",
+)
+
+
 class QueryRequest(BaseModel):
     query: str
+    debug: bool = False
+    page_size: Optional[int] = None
+    full_result: bool = False
 
 
 class QueryResponse(BaseModel):
     markdown_response: Optional[str] = None
     sql_query: Optional[str] = None
     error: Optional[str] = None
+    query_plan: Optional[List[str]] = None
+    debug: Optional[Dict[str, Any]] = None
+    columns: Optional[List[str]] = None
+    rows: Optional[List[Dict[str, Any]]] = None
+    next_cursor: Optional[str] = None
+
+
+class PageResponse(BaseModel):
+    columns: List[str] = []
+    rows: List[Dict[str, Any]] = []
+    next_cursor: Optional[str] = None
+    error: Optional[str] = None
+
+
+class JobRequest(BaseModel):
+    query: str
+
+
+class ExportRequest(BaseModel):
+    query: str
+    format: str = "csv"
+    full_result: bool = False
+
+
+class BatchQueryRequest(BaseModel):
+    queries: List[str]
+    debug: bool = False
+
+
+def get_engine() -> EdgarQueryEngine:
+    """Return the process-wide engine so caches survive across requests."""
+    global _engine
+    if _engine is None:
+        engine = EdgarQueryEngine()
+        engine.initialize()
+        _engine = engine
+    return _engine
+
+
+def get_query_log() -> Optional[QueryLog]:
+    """The query log when EDGAR_RECORD_QUERIES is enabled, else None."""
+    global _query_log
+    if _query_log is None and env_bool("EDGAR_RECORD_QUERIES"):
+        _query_log = QueryLog()
+    return _query_log
+
+
+def answer_question(engine, question, profile=False, request_id=None):
+    """Run the engine and record the request in the query log if enabled."""
+    result = engine.query(question, profile, request_id)
+    query_log = get_query_log()
+    if query_log is not None:
+        query_log.record(QueryLogEntry.from_result(question, result, request_id))
+    return result
+
+
+def build_response(
+    result, debug=False, request_id=None, page: Optional[Page] = None
+) -> QueryResponse:
+    details = None
+    if debug:
+        details = {field: result[field] for field in DEBUG_FIELDS if field in result}
+        details["request_id"] = request_id
+    if not result["success"]:
+        return QueryResponse(
+            error=result["error"],
+            query_plan=result.get("query_plan"),
+            debug=details,
+        )
+    response = QueryResponse(
+        markdown_response=result["markdown_response"],
+        sql_query=result["sql_query"],
+        query_plan=result["query_plan"],
+        debug=details,
+    )
+    if page is not None:
+        response.columns = page.columns
+        response.rows = page.rows
+        response.next_cursor = page.next_cursor
+    return response
+
+
+def get_admission() -> AdmissionController:
+    global _admission
+    if _admission is None:
+        _admission = AdmissionController()
+    return _admission
+
+
+def get_streams() -> StreamLimiter:
+    global _streams
+    if _streams is None:
+        _streams = StreamLimiter()
+    return _streams
+
+
+def _refused(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=e.status_code,
+        detail=str(e),
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+async def _holding_stream_slot(chunks, streams: StreamLimiter, started: float):
+    """Yield ``chunks`` and free the stream slot once sent or abandoned."""
+    try:
+        async for chunk in iterate_in_threadpool(chunks):
+            yield chunk
+    finally:
+        streams.release(started)
+
+
+@asynccontextmanager
+async def admitted(priority):
+    """Hold an admission slot, turning a refusal into 429/503 with Retry-After."""
+    try:
+        async with get_admission().admit(priority):
+            yield
+    except AdmissionRejected as e:
+        raise _refused(e) from e
+
+
+def run_job(question, job_id):
+    with span("api.job", trace_id=job_id):
+        return answer_question(get_engine(), question, request_id=job_id)
+
+
+def render_job(result, job_id):
+    return build_response(result, debug=True, request_id=job_id).model_dump()
+
+
+def get_jobs() -> JobManager:
+    global _jobs
+    if _jobs is None:
+        _jobs = JobManager(run_job, render_job)
+    return _jobs
 
 
 @app.get("/health")
@@ -35,22 +221,207 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics for stage latencies, cache hits and token usage"""
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+
 @app.post("/query", response_model=QueryResponse)
-async def query_filings(request: QueryRequest):
+async def query_filings(
+    request: QueryRequest,
+    response: Response,
+    x_request_id: Optional[str] = Header(default=None),
+    x_edgar_profile: Optional[str] = Header(default=None),
+):
     """
     Process a natural language query about SEC filings and return a formatted response.
     """
+    request_id = x_request_id or new_id()
+    response.headers["X-Request-ID"] = request_id
+    engine = get_engine()
+    profile = x_edgar_profile is not None
+    if profile and not engine.profiler.authorized(x_edgar_profile):
+        raise HTTPException(status_code=403, detail="Profiling not permitted")
+    async with admitted("interactive"):
+        try:
+            with span("api.query", trace_id=request_id, debug=request.debug) as current:
+                # Run off the event loop so identical concurrent questions can
+                # coalesce; the worker thread inherits the span context
+                result = await run_in_threadpool(
+                    answer_question, engine, request.query, profile, request_id
+                )
+                current.set_attribute("success", result["success"])
+                page = None
+                if request.page_size and result["success"]:
+                    page = await run_in_threadpool(
+                        engine.first_page,
+                        result,
+                        request.page_size,
+                        request.full_result,
+                    )
+            return build_response(result, request.debug, request_id, page)
+
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+@app.get("/query/page", response_model=PageResponse)
+async def query_page(cursor: str):
+    """
+    Fetch the page of rows after a cursor returned by /query or this endpoint.
+    """
+    engine = get_engine()
+    async with admitted("interactive"):
+        try:
+            with span("api.query_page"):
+                page = await run_in_threadpool(engine.next_page, cursor)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+    return PageResponse(
+        columns=page.columns,
+        rows=page.rows,
+        next_cursor=page.next_cursor,
+        error=page.error,
+    )
+
+
+@app.post("/query/export")
+async def export_query(request: ExportRequest):
+    """
+    Stream every row behind a question as CSV, Arrow IPC or Parquet.
+    """
+    engine = get_engine()
+    exporter = ResultExporter(engine.sql_executor)
+    # The stream outlives the admission slot, so it holds a stream slot too
+    streams = get_streams()
     try:
-        engine = EdgarQueryEngine()
-        engine.initialize()
-        response = engine.query(request.query)
-        return QueryResponse(
-            markdown_response=response["markdown_response"],
-            sql_query=response["sql_query"],
+        started = streams.acquire()
+    except AdmissionRejected as e:
+        raise _refused(e) from e
+    try:
+        async with admitted("interactive"):
+            sql_template, error = await run_in_threadpool(
+                engine.plan_sql, request.query
+            )
+            if not sql_template:
+                raise HTTPException(
+                    status_code=422, detail=error or "Could not generate SQL query"
+                )
+            try:
+                sql_query, params = await run_in_threadpool(
+                    exporter.prepare,
+                    sql_template.template,
+                    sql_template.params,
+                    request.format,
+                    request.full_result,
+                )
+            except ExportError as e:
+                raise HTTPException(status_code=400, detail=str(e)) from e
+    except BaseException:
+        streams.release(started)
+        raise
+    media_type, extension = EXPORT_FORMATS[request.format]
+    return StreamingResponse(
+        _holding_stream_slot(
+            exporter.stream(sql_query, params, request.format), streams, started
+        ),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="edgar-export.{extension}"'
+        },
+    )
+
+
+@app.post("/query/batch")
+async def query_batch(
+    request: BatchQueryRequest,
+    x_request_id: Optional[str] = Header(default=None),
+):
+    """
+    Answer a list of questions, streaming one JSON line per distinct question.
+
+    Questions that are identical after canonicalization are answered once and
+    the line lists every position they appeared at. Lines arrive in completion
+    order; a failed question produces a line with ``error`` set and does not
+    stop the rest of the batch.
+    """
+    max_queries = env_int("EDGAR_BATCH_MAX_QUERIES", 1000)
+    if len(request.queries) > max_queries:
+        raise HTTPException(
+            status_code=413, detail=f"A batch may hold at most {max_queries} queries"
         )
+    batch_id = x_request_id or new_id()
+    engine = get_engine()
+    positions: Dict[str, List[int]] = {}
+    for index, question in enumerate(request.queries):
+        positions.setdefault(canonical_question(question), []).append(index)
+    limit = asyncio.Semaphore(max(1, env_int("EDGAR_BATCH_CONCURRENCY", 4)))
+
+    async def answer(indices):
+        question = request.queries[indices[0]]
+        request_id = f"{batch_id}-{indices[0]}"
+        async with limit:
+            try:
+                async with get_admission().admit("batch"):
+                    with span(
+                        "api.batch_query", trace_id=batch_id, request_id=request_id
+                    ) as current:
+                        result = await run_in_threadpool(
+                            answer_question, engine, question, False, request_id
+                        )
+                        current.set_attribute("success", result["success"])
+                item = build_response(result, request.debug, request_id).model_dump()
+            except Exception as e:
+                item = {**dict.fromkeys(QueryResponse.model_fields), "error": str(e)}
+        return {"indices": indices, "query": question, **item}
+
+    async def stream():
+        tasks = [asyncio.create_task(answer(indices)) for indices in positions.values()]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield json.dumps(await finished, default=str) + "\n"
+        finally:
+            # The client went away; don't keep answering for nobody
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(
+        stream(),
+        media_type="application/x-ndjson",
+        headers={"X-Request-ID": batch_id},
+    )
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: JobRequest):
+    """Queue a question to be answered in the background; returns the job id."""
+    job = get_jobs().submit(request.query)
+    return {"id": job.id, "status": job.status}
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """Status and timings of a background job."""
+    job = get_jobs().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job.to_dict()
+
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) from e
+@app.get("/jobs/{job_id}/result", response_model=QueryResponse)
+async def job_result(job_id: str):
+    """The answer of a finished job, in the same shape as /query."""
+    jobs = get_jobs()
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    if not job.finished:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    result = jobs.result(job_id)
+    if result is None:
+        return QueryResponse(error=job.error)
+    return result
 
 
 def main():
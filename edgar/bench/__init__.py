@@ -0,0 +1,25 @@
+"""Benchmarking tools for EDGAR query tool."""
+
+from .loadgen import LoadGenerator, LoadResult
+from .replay import ReplayResult, ReplayRunner, format_report
+from .stub_llm import LatencyDistribution, StubLLM, start_stub_server
+from .suite import BenchmarkSuite, compare, load_results, save_results
+from .synthetic import SyntheticConfig, SyntheticDataset, generate_dataset
+
+__all__ = [
+    "BenchmarkSuite",
+    "LatencyDistribution",
+    "LoadGenerator",
+    "LoadResult",
+    "ReplayResult",
+    "ReplayRunner",
+    "StubLLM",
+    "SyntheticConfig",
+    "SyntheticDataset",
+    "compare",
+    "format_report",
+    "generate_dataset",
+    "load_results",
+    "save_results",
+    "start_stub_server",
+]
@@ -0,0 +1,129 @@
+"""Open-loop load generator for the /query endpoint.
+
+Requests are scheduled at a fixed rate regardless of how fast earlier ones
+complete, and latency is measured from each request's scheduled start, so a
+stalled server shows up as queueing delay instead of silently lowering the
+offered load.
+"""
+
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_QUESTIONS = (
+    "How many 10-K filings are there?",
+    "Show 8-K filings",
+    "List filings by 'LIBERTY'",
+    "How many 10-Q filings were made?",
+    "Show filings for CIK 1750",
+)
+
+
+@dataclass
+class LoadResult:
+    target_rps: float
+    duration_seconds: float
+    latencies_ms: List[float] = field(default_factory=list)
+    errors: Counter = field(default_factory=Counter)
+
+    @property
+    def sent(self) -> int:
+        return len(self.latencies_ms) + sum(self.errors.values())
+
+    @property
+    def throughput(self) -> float:
+        """Successful responses per second over the run."""
+        return len(self.latencies_ms) / self.duration_seconds
+
+    @property
+    def error_rate(self) -> float:
+        return sum(self.errors.values()) / self.sent if self.sent else 0.0
+
+    def percentile(self, quantile) -> Optional[float]:
+        if not self.latencies_ms:
+            return None
+        return float(np.percentile(self.latencies_ms, quantile))
+
+    def summary(self) -> Dict:
+        return {
+            "target_rps": self.target_rps,
+            "sent": self.sent,
+            "succeeded": len(self.latencies_ms),
+            "throughput_rps": self.throughput,
+            "error_rate": self.error_rate,
+            "errors": dict(self.errors),
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": max(self.latencies_ms, default=None),
+        }
+
+
+class LoadGenerator:
+    def __init__(
+        self,
+        url="http://127.0.0.1:8000",
+        rps=10.0,
+        duration_seconds=30.0,
+        questions: Sequence[str] = DEFAULT_QUESTIONS,
+        max_in_flight=64,
+        timeout_seconds=60.0,
+    ):
+        self.endpoint = url.rstrip("/") + "/query"
+        self.rps = rps
+        self.duration_seconds = duration_seconds
+        self.questions = list(questions)
+        self.max_in_flight = max_in_flight
+        self.timeout_seconds = timeout_seconds
+
+    def run(self) -> LoadResult:
+        total = int(self.rps * self.duration_seconds)
+        result = LoadResult(self.rps, self.duration_seconds)
+        lock = threading.Lock()
+        started = time.perf_counter()
+
+        def send(index, scheduled):
+            outcome = self.post(self.questions[index % len(self.questions)])
+            elapsed_ms = (time.perf_counter() - scheduled) * 1000
+            with lock:
+                if outcome is None:
+                    result.latencies_ms.append(elapsed_ms)
+                else:
+                    result.errors[outcome] += 1
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            for index in range(total):
+                scheduled = started + index / self.rps
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(send, index, scheduled)
+        result.duration_seconds = time.perf_counter() - started
+        return result
+
+    def post(self, question) -> Optional[str]:
+        """Send one question; return None on success or an error category."""
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps({"query": question}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout_seconds) as reply:
+                body = json.loads(reply.read() or b"{}")
+        except urllib.error.HTTPError as e:
+            return f"http_{e.code}"
+        except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+            return type(getattr(e, "reason", e)).__name__
+        if body.get("error"):
+            return "query_error"
+        return None
@@ -0,0 +1,192 @@
+"""Replay logged production SQL against a candidate database build.
+
+Each distinct (SQL template, parameters) pair from the query log is executed
+against the current and the candidate database through SQLExecutorAgent, so
+the same authorizer, cost guard and time budget apply as in production.
+The report lists the latency change and any change in row count per query.
+
+Row counts are taken on a separate read-only connection, with the same
+authorizer and time budget, but without the cost guard's row limit, which
+would otherwise hide any change above the cap.
+"""
+
+import sqlite3
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from ..agents import SQLExecutorAgent
+from ..agents.query_guard import without_injected_limit
+from ..agents.read_only import is_authorization_error
+from ..agents.sql_executor import FORBIDDEN_ERROR, PROGRESS_CHECK_INSTRUCTIONS
+
+
+def read_only_factory(db_path):
+    uri = f"{Path(db_path).resolve().as_uri()}?mode=ro"
+    return lambda: sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+
+@dataclass
+class ReplayResult:
+    sql_template: str
+    params: tuple
+    occurrences: int
+    current_ms: Optional[float] = None
+    candidate_ms: Optional[float] = None
+    current_rows: Optional[int] = None
+    candidate_rows: Optional[int] = None
+    current_error: Optional[str] = None
+    candidate_error: Optional[str] = None
+
+    @property
+    def change(self) -> Optional[float]:
+        """Relative latency change on the candidate; negative is faster."""
+        if not self.current_ms or self.candidate_ms is None:
+            return None
+        return (self.candidate_ms - self.current_ms) / self.current_ms
+
+    @property
+    def rows_changed(self) -> bool:
+        return self.current_rows != self.candidate_rows
+
+    @property
+    def weighted_delta_ms(self) -> float:
+        """Total time gained or lost across all logged occurrences."""
+        if self.current_ms is None or self.candidate_ms is None:
+            return 0.0
+        return (self.candidate_ms - self.current_ms) * self.occurrences
+
+
+class ReplayRunner:
+    def __init__(self, query_log, current_db, candidate_db, concurrency=4, repeats=3):
+        self.query_log = query_log
+        self.current = SQLExecutorAgent(
+            connection_factory=read_only_factory(current_db)
+        )
+        self.candidate = SQLExecutorAgent(
+            connection_factory=read_only_factory(candidate_db)
+        )
+        self.concurrency = concurrency
+        self.repeats = repeats
+
+    def close(self):
+        self.current.close()
+        self.candidate.close()
+
+    def workload(self, since=None):
+        """Distinct logged queries with how often each was served."""
+        counts = Counter(
+            (entry.sql_template, entry.params)
+            for entry in self.query_log.entries(since=since, successful_only=True)
+            if entry.sql_template
+        )
+        return counts.most_common()
+
+    def run(self, since=None) -> List[ReplayResult]:
+        workload = self.workload(since)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            return list(
+                pool.map(
+                    lambda item: self.replay(item[0][0], item[0][1], item[1]), workload
+                )
+            )
+
+    def replay(self, sql_template, params, occurrences) -> ReplayResult:
+        result = ReplayResult(sql_template, params, occurrences)
+        result.current_ms, result.current_rows, result.current_error = self._measure(
+            self.current, sql_template, params
+        )
+        (
+            result.candidate_ms,
+            result.candidate_rows,
+            result.candidate_error,
+        ) = self._measure(self.candidate, sql_template, params)
+        return result
+
+    def _measure(self, executor, sql_template, params):
+        """Median latency over the repeats, the row count and any error."""
+        timings = []
+        for _ in range(self.repeats):
+            started = time.perf_counter()
+            execution = executor.execute(sql_template, params)
+            timings.append((time.perf_counter() - started) * 1000)
+            if execution.error:
+                return None, None, execution.error
+        try:
+            rows = self._count(executor, sql_template, params)
+        except sqlite3.Error as e:
+            if is_authorization_error(e):
+                error = FORBIDDEN_ERROR
+            elif str(e) == "interrupted":
+                error = (
+                    f"Row count exceeded the {executor.timeout_seconds:g}s time "
+                    "budget and was cancelled"
+                )
+            else:
+                error = f"Error counting rows: {e}"
+            return statistics.median(timings), None, error
+        return statistics.median(timings), rows, None
+
+    @staticmethod
+    def _count(executor, sql_template, params) -> int:
+        """Rows the statement returns with no cost-guard cap."""
+        sql = without_injected_limit(sql_template, executor.cost_guard.row_limit)
+        # A fresh connection from the executor's read-only factory, guarded
+        # like the executor's own: same authorizer, same time budget
+        conn = executor.connection_factory()
+        executor.authorizer.install(conn)
+        deadline = time.monotonic() + executor.timeout_seconds
+        conn.set_progress_handler(
+            lambda: int(time.monotonic() > deadline), PROGRESS_CHECK_INSTRUCTIONS
+        )
+        try:
+            return conn.execute(f"SELECT COUNT(*) FROM ({sql})", params).fetchone()[0]
+        finally:
+            conn.close()
+
+
+def format_report(results: List[ReplayResult], top=20) -> str:
+    if not results:
+        return "No successful queries in the log to replay"
+    lines = []
+    ranked = sorted(results, key=lambda r: abs(r.weighted_delta_ms), reverse=True)
+    current_total = sum((r.current_ms or 0) * r.occurrences for r in results)
+    candidate_total = sum((r.candidate_ms or 0) * r.occurrences for r in results)
+    lines.append(
+        f"Replayed {len(results)} distinct queries "
+        f"({sum(r.occurrences for r in results)} logged requests): "
+        f"{current_total:.0f} ms -> {candidate_total:.0f} ms weighted total"
+    )
+    for result in ranked[:top]:
+        change = "n/a" if result.change is None else f"{result.change:+.0%}"
+        rows = (
+            f"rows {result.current_rows} -> {result.candidate_rows}"
+            if result.rows_changed
+            else f"rows {result.current_rows}"
+        )
+        current = "error" if result.current_ms is None else f"{result.current_ms:.1f}"
+        candidate = (
+            "error" if result.candidate_ms is None else f"{result.candidate_ms:.1f}"
+        )
+        lines.append(
+            f"{change:>6}  {current:>8} -> {candidate:>8} ms  x{result.occurrences}  "
+            f"{rows}  {_one_line(result.sql_template)}"
+        )
+        for label, error in (
+            ("current", result.current_error),
+            ("candidate", result.candidate_error),
+        ):
+            if error:
+                lines.append(f"        {label} error: {error}")
+    changed = [r for r in results if r.rows_changed]
+    lines.append(f"{len(changed)} queries returned a different number of rows")
+    return "\n".join(lines)
+
+
+def _one_line(sql, width=80):
+    text = " ".join(sql.split())
+    return text if len(text) <= width else text[: width - 3] + "..."
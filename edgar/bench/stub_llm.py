@@ -0,0 +1,200 @@
+"""Local OpenAI-compatible chat-completions server for load tests.
+
+Answers ``POST /v1/chat/completions`` without a model: SQL requests get
+canned SQL for known questions or SQL derived from simple rules, and answer
+requests get a short markdown answer built from the data in the prompt.
+Latency follows a configurable distribution and a fraction of calls can be
+made to fail, so retries, the circuit breaker and tail latency can be
+exercised without spending provider quota. Point the agents at it with
+``EDGAR_LLM_BASE_URL=http://127.0.0.1:<port>/v1``.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional
+
+from ..agents.result_summarizer import estimate_tokens
+
+FORM_TYPE = re.compile(r"\b(10-K|10-Q|8-K|20-F|40-F|6-K|S-1|13F-HR|DEF 14A)\b", re.I)
+CIK = re.compile(r"\bcik\s*0*(\d{1,10})\b", re.I)
+QUOTED = re.compile(r"['\"]([^'\"]{2,60})['\"]")
+QUESTION = re.compile(r"User Query:\s*(.+)")
+
+
+class LatencyDistribution:
+    """Samples delays in seconds from a spec such as ``lognormal:300,0.5``.
+
+    Supported specs (values in milliseconds): ``fixed:MS``, ``uniform:LOW,HIGH``,
+    ``exponential:MEAN`` and ``lognormal:MEDIAN,SIGMA``.
+    """
+
+    KINDS = ("fixed", "uniform", "exponential", "lognormal")
+
+    def __init__(self, spec="fixed:0", rng=None):
+        kind, _, values = spec.partition(":")
+        if kind not in self.KINDS:
+            raise ValueError(
+                f"Unknown latency distribution {kind!r}; "
+                f"expected one of {', '.join(self.KINDS)}"
+            )
+        self.kind = kind
+        self.values = [float(value) for value in values.split(",") if value]
+        self.rng = rng or random.Random()
+
+    def sample(self) -> float:
+        if self.kind == "fixed":
+            ms = self.values[0] if self.values else 0.0
+        elif self.kind == "uniform":
+            ms = self.rng.uniform(*self.values[:2])
+        elif self.kind == "exponential":
+            ms = self.rng.expovariate(1 / self.values[0])
+        else:
+            median, sigma = self.values[:2]
+            ms = self.rng.lognormvariate(0, sigma) * median
+        return max(ms, 0.0) / 1000
+
+
+def rule_sql(question) -> str:
+    """SQL for a question from a few keyword rules, like a cooperative model."""
+    conditions = []
+    form = FORM_TYPE.search(question)
+    if form:
+        conditions.append(f"form_type LIKE '{form.group(1).upper()}%'")
+    cik = CIK.search(question)
+    if cik:
+        conditions.append(f"cik = {int(cik.group(1))}")
+    quoted = QUOTED.search(question)
+    if quoted:
+        name = quoted.group(1).upper().replace("'", "''")
+        conditions.append(f"UPPER(company_name) LIKE '%{name}%'")
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    if re.search(r"\bhow many\b|\bcount\b|\bnumber of\b", question, re.I):
+        return f"SELECT COUNT(*) AS count FROM master_index{where}"
+    return f"SELECT * FROM master_index{where} LIMIT 10"
+
+
+class StubLLM:
+    """Produces completions and decides delays and failures for each call."""
+
+    def __init__(
+        self,
+        latency="fixed:0",
+        error_rate=0.0,
+        rate_limit_rate=0.0,
+        canned: Optional[Dict[str, str]] = None,
+        seed=None,
+    ):
+        self.rng = random.Random(seed)
+        self.latency = LatencyDistribution(latency, self.rng)
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.canned = canned or {}
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, canned_path, **kwargs):
+        """Load canned ``{question: sql}`` answers from a JSON file."""
+        canned = json.loads(Path(canned_path).read_text(encoding="utf-8"))
+        return cls(canned=canned, **kwargs)
+
+    def outcome(self):
+        """Return (delay_seconds, status) for the next call."""
+        with self._lock:
+            self.calls += 1
+            delay = self.latency.sample()
+            roll = self.rng.random()
+        if roll < self.error_rate:
+            return delay, 500
+        if roll < self.error_rate + self.rate_limit_rate:
+            return delay, 429
+        return delay, 200
+
+    def complete(self, messages):
+        system = " ".join(m["content"] for m in messages if m["role"] == "system")
+        prompt = messages[-1]["content"] if messages else ""
+        if "SQL" in system:
+            match = QUESTION.search(prompt)
+            question = match.group(1).strip() if match else prompt
+            content = self.canned.get(question) or rule_sql(question)
+        else:
+            content = answer_markdown(prompt)
+        prompt_tokens = estimate_tokens(" ".join(m["content"] for m in messages))
+        completion_tokens = estimate_tokens(content)
+        return {
+            "id": f"chatcmpl-stub-{self.calls}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "edgar-stub",
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+
+def answer_markdown(prompt) -> str:
+    match = re.search(r"Data Results:\s*(.+)", prompt)
+    first_line = match.group(1).strip() if match else "No results found"
+    return f"**Answer:** {first_line}"
+
+
+def make_handler(stub: StubLLM):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                return self._reply(404, {"error": {"message": "Not found"}})
+
+            delay, status = stub.outcome()
+            time.sleep(delay)
+            if status == 429:
+                return self._reply(
+                    429,
+                    {"error": {"message": "Rate limited", "type": "rate_limit"}},
+                    {"Retry-After": "0"},
+                )
+            if status != 200:
+                return self._reply(
+                    status, {"error": {"message": "Injected failure", "type": "server"}}
+                )
+            self._reply(200, stub.complete(body.get("messages", [])))
+
+        def _reply(self, status, payload, headers=None):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_stub_server(stub: StubLLM, host="127.0.0.1", port=0):
+    """Serve ``stub`` on a background thread; returns the server and its base URL."""
+    server = ThreadingHTTPServer((host, port), make_handler(stub))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
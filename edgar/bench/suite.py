@@ -0,0 +1,418 @@
+"""Benchmarks for database builds, SQL execution and the /query endpoint.
+
+Each run builds synthetic datasets of the requested sizes, then measures:
+
+- the DataLoaderAgent build (total and per-stage seconds, and the peak RSS
+  of the build, which runs in its own process so each size reports its own),
+- SQLExecutorAgent latency for a fixed catalogue of representative queries,
+  on SQLite and, when requested, on DuckDB over the same database and on
+  the in-memory columnar master_index (with its memory and speedup),
+- /query throughput and latency percentiles, with SQL generation and
+  answer rendering replaced by local stubs so no LLM is involved.
+
+Results are flat ``{metric: {value, unit, higher_is_better}}`` maps that can
+be written as JSON and compared against a stored baseline.
+"""
+
+import json
+import multiprocessing
+import platform
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..agents import DataLoaderAgent, SQLExecutorAgent
+from ..agents.columnar_index import ColumnarMasterIndex
+from ..agents.duckdb_backend import BackendRouter, DuckDBBackend
+from ..agents.load_report import peak_rss_bytes
+from ..agents.markdown_responder import render_local_markdown
+from ..agents.sql_templates import parameterize_sql
+from .synthetic import SyntheticConfig, generate_dataset
+
+DEFAULT_SIZES = (10_000, 100_000)
+DEFAULT_TOLERANCE = 0.25
+# Differences below these are treated as noise whatever the ratio
+NOISE_FLOOR = {"ms": 0.5, "s": 0.02, "bytes": 16 * 1024 * 1024}
+
+
+@dataclass(frozen=True)
+class BenchQuery:
+    name: str
+    question: str
+    sql: str
+
+
+# Placeholders are filled from the built database so lookups hit real rows
+QUERY_CATALOGUE = (
+    BenchQuery(
+        "count_by_form",
+        "How many filings are there of each form type?",
+        "SELECT form_type, COUNT(*) AS filings FROM master_index "
+        "GROUP BY form_type ORDER BY filings DESC LIMIT 10",
+    ),
+    BenchQuery(
+        "company_name_like",
+        "Show filings by companies named Liberty",
+        "SELECT * FROM master_index WHERE UPPER(company_name) LIKE '%LIBERTY%' "
+        "LIMIT 10",
+    ),
+    BenchQuery(
+        "cik_lookup",
+        "Show the filings of CIK {cik}",
+        "SELECT * FROM master_index WHERE cik = {cik} LIMIT 10",
+    ),
+    BenchQuery(
+        "form_in_date_range",
+        "Which 10-K filings were made in February {year}?",
+        "SELECT * FROM master_index WHERE form_type = '10-K' "
+        "AND date_filed BETWEEN '{year}-02-01' AND '{year}-02-28' LIMIT 10",
+    ),
+    BenchQuery(
+        "top_filers",
+        "Which companies filed the most?",
+        "SELECT company_name, COUNT(*) AS filings FROM master_index "
+        "GROUP BY company_name ORDER BY filings DESC LIMIT 10",
+    ),
+    BenchQuery(
+        "xbrl_join",
+        "What XBRL submissions did CIK {cik} make?",
+        "SELECT m.company_name, s.form, s.period FROM master_index m "
+        "JOIN submissions s ON s.cik = m.cik WHERE m.cik = {cik} LIMIT 10",
+    ),
+    BenchQuery(
+        "balance_sheet_tags",
+        "Which balance sheet tags are most common?",
+        "SELECT tag, COUNT(*) AS lines FROM presentation_of_statement "
+        "WHERE stmt = 'BS' GROUP BY tag ORDER BY lines DESC LIMIT 10",
+    ),
+    BenchQuery(
+        "submission_lines",
+        "Show the presentation of submission {adsh}",
+        "SELECT * FROM presentation_of_statement WHERE adsh = '{adsh}' "
+        "ORDER BY report, line LIMIT 50",
+    ),
+)
+
+
+@dataclass
+class Regression:
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        if not self.baseline:
+            return float("inf")
+        return (self.current - self.baseline) / self.baseline
+
+    def __str__(self):
+        return (
+            f"{self.metric}: {self.baseline:.4g} -> {self.current:.4g} "
+            f"({self.change:+.0%})"
+        )
+
+
+class CatalogueSQLGenerator:
+    """Answers catalogue questions with their SQL instead of calling an LLM."""
+
+    def __init__(self, queries):
+        self.sql_by_question = {query.question: query.sql for query in queries}
+
+    def generate_sql_template(self, user_query, temperature=None):
+        sql_query = self.sql_by_question.get(user_query)
+        return (parameterize_sql(sql_query) if sql_query else None), None
+
+    def repair_sql_template(self, user_query, failed_sql, error):
+        return None, None
+
+
+class LocalMarkdownResponder:
+    """Renders answers locally, as the responder does when the LLM is down."""
+
+    def generate_markdown_response(self, user_query, sql_query, df):
+        return render_local_markdown(df), None
+
+
+class BenchmarkSuite:
+    def __init__(
+        self,
+        work_dir="data/bench",
+        sizes=DEFAULT_SIZES,
+        seed=0,
+        query_repeats=20,
+        api_requests=200,
+        api_concurrency=8,
+        backends=("sqlite",),
+    ):
+        self.work_dir = Path(work_dir)
+        self.sizes = tuple(sizes)
+        self.seed = seed
+        self.query_repeats = query_repeats
+        self.api_requests = api_requests
+        self.api_concurrency = api_concurrency
+        self.backends = tuple(backends)
+        self.metrics: Dict[str, Dict] = {}
+
+    def run(self) -> Dict:
+        for size in self.sizes:
+            print(f"Benchmarking {size:,} rows...")
+            loader = self.build(size)
+            queries = self.catalogue(loader)
+            self.bench_queries(size, loader, queries)
+            self.bench_api(size, loader, queries)
+        return self.results()
+
+    def results(self) -> Dict:
+        return {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": list(self.sizes),
+            "seed": self.seed,
+            "metrics": self.metrics,
+        }
+
+    def record(self, name, value, unit, higher_is_better=False):
+        self.metrics[name] = {
+            "value": float(value),
+            "unit": unit,
+            "higher_is_better": higher_is_better,
+        }
+
+    def build(self, size) -> DataLoaderAgent:
+        """Generate (once) and load the dataset for ``size``, recording the build."""
+        folder = self.work_dir / f"synthetic-{size}-seed{self.seed}"
+        if not (folder / "pre.txt").exists():
+            generate_dataset(folder, SyntheticConfig(master_rows=size, seed=self.seed))
+        db_path = folder / "edgar_filings.db"
+        db_path.unlink(missing_ok=True)
+
+        # ru_maxrss only ever grows, so a build in this process would report
+        # the largest earlier build (or the generator) instead of its own peak
+        spawn = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+            total, stages, rss = pool.submit(_build_database, db_path, folder).result()
+        self.record(f"load/{size}/total", total, "s")
+        for stage in ("parse", "convert", "insert", "index"):
+            self.record(f"load/{size}/{stage}", stages.get(stage, 0.0), "s")
+        if rss is not None:
+            self.record(f"load/{size}/peak_rss", rss, "bytes")
+        return DataLoaderAgent(db_path=db_path, data_folder=folder)
+
+    def catalogue(self, loader) -> List[BenchQuery]:
+        """The query catalogue with placeholders filled from the database."""
+        conn = sqlite3.connect(loader.db_path)
+        try:
+            cik = conn.execute(
+                "SELECT cik FROM submissions GROUP BY cik ORDER BY COUNT(*) DESC LIMIT 1"
+            ).fetchone()[0]
+            adsh = conn.execute("SELECT adsh FROM submissions LIMIT 1").fetchone()[0]
+            year = conn.execute("SELECT MIN(date_filed) FROM master_index").fetchone()[
+                0
+            ][:4]
+        finally:
+            conn.close()
+        values = {"cik": cik, "adsh": adsh, "year": year}
+        return [
+            BenchQuery(
+                query.name, query.question.format(**values), query.sql.format(**values)
+            )
+            for query in QUERY_CATALOGUE
+        ]
+
+    def bench_queries(self, size, loader, queries):
+        executor = SQLExecutorAgent(connection_factory=loader.connect_read_only)
+        try:
+            for query in queries:
+                template = parameterize_sql(query.sql)
+                timings, result = self.time_query(executor, query, template)
+                self.record(
+                    f"query/{size}/{query.name}/p50", np.percentile(timings, 50), "ms"
+                )
+                self.record(
+                    f"query/{size}/{query.name}/p95", np.percentile(timings, 95), "ms"
+                )
+                self.record(
+                    f"query/{size}/{query.name}/result_bytes",
+                    result.memory_bytes,
+                    "bytes",
+                )
+                self.record(
+                    f"query/{size}/{query.name}/result_bytes_saved",
+                    result.memory_saved_bytes,
+                    "bytes",
+                    higher_is_better=True,
+                )
+        finally:
+            executor.close()
+        if "duckdb" in self.backends:
+            self.bench_duckdb(size, loader, queries)
+        if "columnar" in self.backends:
+            self.bench_columnar(size, loader, queries)
+
+    def bench_duckdb(self, size, loader, queries):
+        """Run the catalogue on DuckDB over the same database, where it can."""
+        router = BackendRouter(DuckDBBackend(db_path=loader.db_path), mode="always")
+        executor = SQLExecutorAgent(
+            connection_factory=loader.connect_read_only, router=router
+        )
+        try:
+            for query in queries:
+                template = parameterize_sql(query.sql)
+                timings, result = self.time_query(executor, query, template)
+                if result.backend != "duckdb":
+                    print(f"  {query.name} stayed on SQLite: {result.guard_notes}")
+                    continue
+                self.record(
+                    f"duckdb/{size}/{query.name}/p50", np.percentile(timings, 50), "ms"
+                )
+                self.record(
+                    f"duckdb/{size}/{query.name}/p95", np.percentile(timings, 95), "ms"
+                )
+        finally:
+            executor.close()
+            router.backend.close()
+
+    def bench_columnar(self, size, loader, queries):
+        """Time the in-memory master_index on the queries it answers."""
+        conn = loader.connect_read_only()
+        started = time.perf_counter()
+        try:
+            index = ColumnarMasterIndex.load(conn)
+        finally:
+            conn.close()
+        self.record(f"columnar/{size}/load", time.perf_counter() - started, "s")
+        self.record(f"columnar/{size}/memory", index.memory_bytes, "bytes")
+        executor = SQLExecutorAgent(
+            connection_factory=loader.connect_read_only, columnar=index
+        )
+        try:
+            for query in queries:
+                template = parameterize_sql(query.sql)
+                timings, result = self.time_query(executor, query, template)
+                if result.backend != "columnar":
+                    continue
+                p50 = np.percentile(timings, 50)
+                self.record(f"columnar/{size}/{query.name}/p50", p50, "ms")
+                self.record(
+                    f"columnar/{size}/{query.name}/p95",
+                    np.percentile(timings, 95),
+                    "ms",
+                )
+                sqlite_p50 = self.metrics[f"query/{size}/{query.name}/p50"]["value"]
+                self.record(
+                    f"columnar/{size}/{query.name}/speedup",
+                    sqlite_p50 / p50,
+                    "x",
+                    higher_is_better=True,
+                )
+        finally:
+            executor.close()
+
+    def time_query(self, executor, query, template):
+        timings = []
+        for _ in range(self.query_repeats):
+            started = time.perf_counter()
+            result = executor.execute(template.template, template.params)
+            timings.append((time.perf_counter() - started) * 1000)
+            if result.error:
+                raise RuntimeError(f"Query {query.name} failed: {result.error}")
+        return timings, result
+
+    def bench_api(self, size, loader, queries):
+        """Drive /query through the ASGI app with the LLM stages stubbed."""
+        from fastapi.testclient import TestClient
+
+        from ..api import server
+        from ..core import EdgarQueryEngine
+
+        engine = EdgarQueryEngine()
+        engine.data_loader = loader
+        engine.sql_generator = CatalogueSQLGenerator(queries)
+        engine.markdown_responder = LocalMarkdownResponder()
+        engine.sql_executor = SQLExecutorAgent(
+            connection_factory=loader.connect_read_only
+        )
+
+        previous = server._engine
+        server._engine = engine
+        try:
+            with TestClient(server.app) as client:
+
+                def ask(index):
+                    question = queries[index % len(queries)].question
+                    started = time.perf_counter()
+                    response = client.post("/query", json={"query": question})
+                    elapsed = (time.perf_counter() - started) * 1000
+                    if response.status_code != 200 or response.json()["error"]:
+                        raise RuntimeError(f"/query failed for {question!r}")
+                    return elapsed
+
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=self.api_concurrency) as pool:
+                    timings = list(pool.map(ask, range(self.api_requests)))
+                elapsed = time.perf_counter() - started
+        finally:
+            server._engine = previous
+
+        self.record(
+            f"api/{size}/throughput",
+            self.api_requests / elapsed,
+            "req/s",
+            higher_is_better=True,
+        )
+        for quantile in (50, 95, 99):
+            self.record(
+                f"api/{size}/p{quantile}", np.percentile(timings, quantile), "ms"
+            )
+
+
+def _build_database(db_path, folder) -> Tuple[float, Dict[str, float], Optional[int]]:
+    """Build the database; returns total seconds, seconds per stage and peak RSS."""
+    loader = DataLoaderAgent(db_path=db_path, data_folder=folder)
+    started = time.perf_counter()
+    loader.init_db().close()
+    total = time.perf_counter() - started
+    stages: Dict[str, float] = {}
+    for record in loader.load_report.stages:
+        stages[record.stage] = stages.get(record.stage, 0.0) + record.seconds
+    return total, stages, peak_rss_bytes()
+
+
+def compare(current: Dict, baseline: Dict, tolerance=DEFAULT_TOLERANCE):
+    """Metrics that got worse than the baseline by more than ``tolerance``."""
+    regressions = []
+    for name, metric in current["metrics"].items():
+        reference = baseline.get("metrics", {}).get(name)
+        if reference is None:
+            continue
+        value, base = metric["value"], reference["value"]
+        if abs(value - base) < NOISE_FLOOR.get(metric["unit"], 0):
+            continue
+        if metric["higher_is_better"]:
+            worse = value < base * (1 - tolerance)
+        else:
+            worse = value > base * (1 + tolerance)
+        if worse:
+            regressions.append(Regression(name, base, value))
+    return regressions
+
+
+def load_results(path) -> Optional[Dict]:
+    path = Path(path)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_results(results: Dict, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n", "utf-8")
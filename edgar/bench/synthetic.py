@@ -0,0 +1,499 @@
+"""Deterministic synthetic EDGAR files in the formats DataLoaderAgent parses.
+
+Generates ``master.idx`` (pipe separated, ten header lines), ``sub.txt`` and
+``pre.txt`` (tab separated with a header row). Filers are drawn from a
+Zipf-like popularity distribution, so a few companies account for most
+filings as in the real feeds. Rows are produced and written in vectorized
+chunks, so memory stays flat from thousands to tens of millions of rows.
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 500_000
+# The six-digit sequence of an accession number wraps after this many filings
+ACCESSION_SEQUENCES = 1_000_000
+# Synthetic CIKs stay below this, so the agent part has room above them
+CIK_LIMIT = 10_000_000
+
+# Relative frequencies loosely following a quarter of the EDGAR full index
+MASTER_FORMS = {
+    "4": 0.34,
+    "8-K": 0.09,
+    "10-Q": 0.05,
+    "SC 13G/A": 0.06,
+    "424B2": 0.08,
+    "D": 0.04,
+    "13F-HR": 0.03,
+    "10-K": 0.03,
+    "3": 0.03,
+    "144": 0.04,
+    "6-K": 0.03,
+    "DEF 14A": 0.02,
+    "S-1": 0.01,
+    "10-K/A": 0.01,
+    "N-PX": 0.01,
+    "497K": 0.07,
+    "SC 13D": 0.01,
+    "S-8": 0.01,
+    "20-F": 0.01,
+    "424B3": 0.02,
+}
+SUB_FORMS = {
+    "10-Q": 0.55,
+    "10-K": 0.2,
+    "8-K": 0.1,
+    "10-K/A": 0.03,
+    "10-Q/A": 0.03,
+    "20-F": 0.03,
+    "40-F": 0.01,
+    "6-K": 0.05,
+}
+STATEMENTS = ("BS", "IS", "CF", "EQ", "CI", "SI", "UN")
+STATES = ("NY", "CA", "TX", "DE", "FL", "IL", "MA", "NJ", "PA", "WA", "GA", "OH")
+CITIES = (
+    "NEW YORK",
+    "SAN FRANCISCO",
+    "HOUSTON",
+    "WILMINGTON",
+    "MIAMI",
+    "CHICAGO",
+    "BOSTON",
+    "NEWARK",
+    "PHILADELPHIA",
+    "SEATTLE",
+    "ATLANTA",
+    "COLUMBUS",
+)
+NAME_WORDS = (
+    "ACME",
+    "AMERICAN",
+    "APEX",
+    "ATLAS",
+    "BLUE",
+    "CAPITAL",
+    "CENTURY",
+    "CITY",
+    "COASTAL",
+    "CONTINENTAL",
+    "DELTA",
+    "EAGLE",
+    "ENERGY",
+    "FIRST",
+    "GENERAL",
+    "GLOBAL",
+    "GOLDEN",
+    "GREAT",
+    "HARBOR",
+    "HERITAGE",
+    "INTERNATIONAL",
+    "LIBERTY",
+    "MERIDIAN",
+    "NATIONAL",
+    "NORTHERN",
+    "PACIFIC",
+    "PIONEER",
+    "PRIME",
+    "SUMMIT",
+    "UNITED",
+)
+NAME_SUFFIXES = ("INC", "CORP", "CO", "LLC", "LP", "HOLDINGS INC", "GROUP INC", "TRUST")
+GAAP_TAGS = (
+    "Assets",
+    "AssetsCurrent",
+    "Liabilities",
+    "LiabilitiesCurrent",
+    "LiabilitiesAndStockholdersEquity",
+    "StockholdersEquity",
+    "CashAndCashEquivalentsAtCarryingValue",
+    "AccountsReceivableNetCurrent",
+    "InventoryNet",
+    "PropertyPlantAndEquipmentNet",
+    "Goodwill",
+    "Revenues",
+    "RevenueFromContractWithCustomerExcludingAssessedTax",
+    "CostOfRevenue",
+    "GrossProfit",
+    "OperatingExpenses",
+    "OperatingIncomeLoss",
+    "NetIncomeLoss",
+    "EarningsPerShareBasic",
+    "EarningsPerShareDiluted",
+    "IncomeTaxExpenseBenefit",
+    "NetCashProvidedByUsedInOperatingActivities",
+    "NetCashProvidedByUsedInInvestingActivities",
+    "NetCashProvidedByUsedInFinancingActivities",
+    "CommonStockValue",
+    "RetainedEarningsAccumulatedDeficit",
+    "LongTermDebtNoncurrent",
+    "ShareBasedCompensation",
+    "DepreciationDepletionAndAmortization",
+    "InterestExpense",
+)
+SUB_COLUMNS = (
+    "adsh",
+    "cik",
+    "name",
+    "sic",
+    "countryba",
+    "stprba",
+    "cityba",
+    "zipba",
+    "bas1",
+    "bas2",
+    "baph",
+    "countryma",
+    "stprma",
+    "cityma",
+    "zipma",
+    "mas1",
+    "mas2",
+    "countryinc",
+    "stprinc",
+    "ein",
+    "former",
+    "changed",
+    "afs",
+    "wksi",
+    "fye",
+    "form",
+    "period",
+    "fy",
+    "fp",
+    "filed",
+    "accepted",
+    "prevrpt",
+    "detail",
+    "instance",
+    "nciks",
+    "aciks",
+)
+PRE_COLUMNS = (
+    "adsh",
+    "report",
+    "line",
+    "stmt",
+    "inpth",
+    "rfile",
+    "tag",
+    "version",
+    "plabel",
+    "negating",
+)
+LINES_PER_REPORT = 40
+
+
+@dataclass
+class SyntheticConfig:
+    """Sizes and shape of a synthetic dataset; unset sizes scale with master_rows."""
+
+    master_rows: int = 10_000
+    sub_rows: Optional[int] = None
+    pre_rows: Optional[int] = None
+    companies: Optional[int] = None
+    tags: int = 2_000
+    # Distinct master.idx form types, or their relative frequencies
+    form_types: Union[int, Dict[str, float], None] = None
+    skew: float = 1.1
+    seed: int = 0
+    year: int = 2025
+    quarter: int = 1
+
+    def __post_init__(self):
+        if self.sub_rows is None:
+            self.sub_rows = max(1, self.master_rows // 20)
+        if self.pre_rows is None:
+            self.pre_rows = self.master_rows
+        if self.companies is None:
+            self.companies = max(10, self.master_rows // 50)
+        if not 1 <= self.quarter <= 4:
+            raise ValueError(f"Quarter must be 1-4, got {self.quarter}")
+        if isinstance(self.form_types, int) and self.form_types < 1:
+            raise ValueError(f"form_types must be at least 1, got {self.form_types}")
+
+
+def master_forms(form_types=None) -> Dict[str, float]:
+    """Form types of master.idx and their weights for a ``form_types`` setting.
+
+    None keeps MASTER_FORMS. A count keeps that many of the most frequent
+    real forms and, past those, adds ``FORM-<n>`` types whose weights keep
+    falling off like the tail of the real distribution. A dict is used as-is.
+    """
+    if form_types is None:
+        return dict(MASTER_FORMS)
+    if isinstance(form_types, dict):
+        if not form_types:
+            raise ValueError("form_types needs at least one form")
+        return dict(form_types)
+    ranked = sorted(MASTER_FORMS.items(), key=lambda item: -item[1])
+    forms = dict(ranked[:form_types])
+    smallest = ranked[-1][1]
+    for extra in range(form_types - len(forms)):
+        forms[f"FORM-{extra + 1}"] = smallest / (extra + 2)
+    return forms
+
+
+@dataclass
+class SyntheticDataset:
+    folder: Path
+    config: SyntheticConfig
+    files: Dict[str, Path] = field(default_factory=dict)
+
+
+class _Universe:
+    """Companies, tags and dates shared by all three files."""
+
+    def __init__(self, config: SyntheticConfig, rng):
+        self.config = config
+        count = config.companies
+        self.ciks = np.sort(rng.choice(np.arange(1_000, CIK_LIMIT), count, False))
+        words = np.array(NAME_WORDS, dtype=object)
+        suffixes = np.array(NAME_SUFFIXES, dtype=object)
+        self.names = (
+            words[rng.integers(0, len(words), count)]
+            + " "
+            + words[rng.integers(0, len(words), count)]
+            + " "
+            + pd.Series(np.arange(count)).astype(str).to_numpy(dtype=object)
+            + " "
+            + suffixes[rng.integers(0, len(suffixes), count)]
+        )
+        self.sics = rng.integers(100, 9_999, count)
+        self.states = rng.integers(0, len(STATES), count)
+
+        # Zipf-like popularity: a few filers account for most rows
+        weights = 1.0 / np.arange(1, count + 1) ** config.skew
+        self.popularity = weights / weights.sum()
+        rng.shuffle(self.popularity)
+
+        custom = [
+            f"CustomElement{i}" for i in range(max(0, config.tags - len(GAAP_TAGS)))
+        ]
+        self.tags = np.array((GAAP_TAGS + tuple(custom))[: config.tags], dtype=object)
+        tag_weights = 1.0 / np.arange(1, len(self.tags) + 1) ** config.skew
+        self.tag_popularity = tag_weights / tag_weights.sum()
+
+        start = np.datetime64(f"{config.year}-{3 * config.quarter - 2:02d}-01")
+        end = (start.astype("datetime64[M]") + 3).astype("datetime64[D]")
+        self.quarter_start = start
+        self.quarter_days = int((end - start).astype(int))
+        self.master_forms = master_forms(config.form_types)
+        # Filled in while sub.txt is written so pre.txt can reference it
+        self.submission_ciks = np.empty(0, dtype=np.int64)
+
+    def companies(self, rng, size):
+        return rng.choice(len(self.ciks), size, p=self.popularity)
+
+    def dates(self, rng, size):
+        return self.quarter_start + rng.integers(0, self.quarter_days, size)
+
+
+def generate_dataset(folder, config: Optional[SyntheticConfig] = None):
+    """Write master.idx, sub.txt and pre.txt into ``folder`` and return their paths.
+
+    The same config (including seed) always produces byte-identical files.
+    """
+    config = config or SyntheticConfig()
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(config.seed)
+    universe = _Universe(config, rng)
+
+    dataset = SyntheticDataset(folder, config)
+    dataset.files["master.idx"] = _write_master(folder / "master.idx", universe, rng)
+    dataset.files["sub.txt"] = _write_sub(folder / "sub.txt", universe, rng)
+    dataset.files["pre.txt"] = _write_pre(folder / "pre.txt", universe, rng)
+    return dataset
+
+
+def _chunks(total):
+    for start in range(0, total, CHUNK_ROWS):
+        yield start, min(CHUNK_ROWS, total - start)
+
+
+def _choice(rng, weighted, size):
+    values = np.array(list(weighted), dtype=object)
+    weights = np.array(list(weighted.values()))
+    return values[rng.choice(len(values), size, p=weights / weights.sum())]
+
+
+def _digits(values, width):
+    return pd.Series(values).astype(str).str.zfill(width)
+
+
+def _accessions(agents, sequence, year):
+    return (
+        _digits(agents, 10)
+        + f"-{year % 100:02d}-"
+        + _digits(sequence % ACCESSION_SEQUENCES, 6)
+    )
+
+
+def _submission_accessions(ciks, sequence, year):
+    """Accession numbers of submissions filed by ``ciks``, each one unique.
+
+    The agent part is the filer's CIK; once the sequence wraps, the number
+    of wraps is added above the CIK so a busy filer never repeats one.
+    """
+    return _accessions(
+        ciks + sequence // ACCESSION_SEQUENCES * CIK_LIMIT, sequence, year
+    )
+
+
+def _write_master(path, universe: _Universe, rng):
+    config = universe.config
+    with open(path, "w", encoding="latin-1", newline="\n") as f:
+        f.write(
+            "Description:           Master Index of EDGAR Dissemination Feed\n"
+            f"Last Data Received:    Synthetic {config.year} QTR{config.quarter}\n"
+            "Comments:              webmaster@sec.gov\n"
+            "Anonymous FTP:         ftp://ftp.sec.gov/edgar/\n"
+            "Cloud HTTP:            https://www.sec.gov/Archives/\n"
+            "\n"
+            "\n"
+            "\n"
+            "CIK|Company Name|Form Type|Date Filed|Filename\n"
+            "--------------------------------------------------------------------------------\n"
+        )
+        for start, size in _chunks(config.master_rows):
+            company = universe.companies(rng, size)
+            ciks = universe.ciks[company]
+            sequence = np.arange(start, start + size)
+            accession = _accessions(
+                1_000_000 + sequence // ACCESSION_SEQUENCES, sequence, config.year
+            )
+            chunk = pd.DataFrame(
+                {
+                    "cik": ciks,
+                    "company_name": universe.names[company],
+                    "form_type": _choice(rng, universe.master_forms, size),
+                    "date_filed": universe.dates(rng, size).astype(str),
+                    "filename": "edgar/data/"
+                    + pd.Series(ciks).astype(str)
+                    + "/"
+                    + accession
+                    + ".txt",
+                }
+            )
+            chunk.to_csv(f, sep="|", header=False, index=False, lineterminator="\n")
+    return path
+
+
+def _write_sub(path, universe: _Universe, rng):
+    config = universe.config
+    submission_ciks = []
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write("\t".join(SUB_COLUMNS) + "\n")
+        for start, size in _chunks(config.sub_rows):
+            company = universe.companies(rng, size)
+            ciks = universe.ciks[company]
+            submission_ciks.append(ciks)
+            states = np.array(STATES, dtype=object)[universe.states[company]]
+            cities = np.array(CITIES, dtype=object)[universe.states[company]]
+            filed = universe.dates(rng, size)
+            period = (filed.astype("datetime64[M]") - rng.integers(1, 4, size)).astype(
+                "datetime64[D]"
+            ) - 1
+            forms = _choice(rng, SUB_FORMS, size)
+            annual = np.isin(forms, ("10-K", "10-K/A", "20-F", "40-F"))
+            sequence = np.arange(start, start + size)
+            zips = _digits(rng.integers(501, 99_950, size), 5)
+            chunk = pd.DataFrame(
+                {
+                    "adsh": _submission_accessions(ciks, sequence, config.year),
+                    "cik": ciks,
+                    "name": universe.names[company],
+                    "sic": universe.sics[company],
+                    "countryba": "US",
+                    "stprba": states,
+                    "cityba": cities,
+                    "zipba": zips,
+                    "bas1": pd.Series(rng.integers(1, 9_999, size)).astype(str)
+                    + " MAIN STREET",
+                    "bas2": "",
+                    "baph": "212-555-" + _digits(rng.integers(0, 10_000, size), 4),
+                    "countryma": "US",
+                    "stprma": states,
+                    "cityma": cities,
+                    "zipma": zips,
+                    "mas1": "",
+                    "mas2": "",
+                    "countryinc": "US",
+                    "stprinc": "DE",
+                    "ein": rng.integers(10_000_000, 999_999_999, size),
+                    "former": "",
+                    "changed": "",
+                    "afs": _choice(
+                        rng,
+                        {"1-LAF": 0.3, "2-ACC": 0.2, "4-NON": 0.2, "5-SML": 0.3},
+                        size,
+                    ),
+                    "wksi": (rng.random(size) < 0.1).astype(int),
+                    "fye": "1231",
+                    "form": forms,
+                    "period": pd.Series(period).dt.strftime("%Y%m%d"),
+                    "fy": pd.Series(period).dt.year,
+                    "fp": np.where(
+                        annual, "FY", "Q" + pd.Series(period).dt.quarter.astype(str)
+                    ),
+                    "filed": pd.Series(filed).dt.strftime("%Y%m%d"),
+                    "accepted": pd.Series(filed).dt.strftime("%Y-%m-%d")
+                    + " 16:"
+                    + _digits(rng.integers(0, 60, size), 2)
+                    + ":00.0",
+                    "prevrpt": 0,
+                    "detail": 1,
+                    "instance": "filing-"
+                    + pd.Series(period).dt.strftime("%Y%m%d")
+                    + "_htm.xml",
+                    "nciks": 1,
+                    "aciks": "",
+                }
+            )
+            chunk.to_csv(f, sep="\t", header=False, index=False, lineterminator="\n")
+    universe.submission_ciks = np.concatenate(submission_ciks)
+    return path
+
+
+def _write_pre(path, universe: _Universe, rng):
+    """Presentation lines spread evenly over the submissions in sub.txt."""
+    config = universe.config
+    lines_per_submission = -(-config.pre_rows // config.sub_rows)
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write("\t".join(PRE_COLUMNS) + "\n")
+        for start, size in _chunks(config.pre_rows):
+            rows = np.arange(start, start + size)
+            submission = rows // lines_per_submission
+            position = rows % lines_per_submission
+            report = 1 + position // LINES_PER_REPORT
+            tags = universe.tags[
+                rng.choice(len(universe.tags), size, p=universe.tag_popularity)
+            ]
+            custom = pd.Series(tags).str.startswith("CustomElement").to_numpy()
+            adsh = _submission_accessions(
+                universe.submission_ciks[submission], submission, config.year
+            )
+            chunk = pd.DataFrame(
+                {
+                    "adsh": adsh,
+                    "report": report,
+                    "line": 1 + position % LINES_PER_REPORT,
+                    "stmt": np.array(STATEMENTS, dtype=object)[
+                        (report - 1) % len(STATEMENTS)
+                    ],
+                    "inpth": 0,
+                    "rfile": "H",
+                    "tag": tags,
+                    "version": np.where(custom, adsh, f"us-gaap/{config.year - 1}"),
+                    "plabel": pd.Series(tags).str.replace(
+                        r"(?<=[a-z])(?=[A-Z])", " ", regex=True
+                    ),
+                    "negating": 0,
+                }
+            )
+            chunk.to_csv(f, sep="\t", header=False, index=False, lineterminator="\n")
+    return path
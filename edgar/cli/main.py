@@ -1,8 +1,14 @@
 """Command-line interface for EDGAR query tool."""
 
 import argparse
+import json
 import sys
+import time
 
+from ..agents import DataLoaderAgent
+from ..agents.index_advisor import IndexAdvisorAgent
+from ..agents.load_report import LoadReport
+from ..agents.slow_query_log import SlowQueryLog
 from ..core import EdgarQueryEngine
 
 
@@ -12,12 +18,161 @@ def main():
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
 
     # Load data command
-    subparsers.add_parser("load-data", help="Load EDGAR filing data")
+    load_parser = subparsers.add_parser("load-data", help="Load EDGAR filing data")
+    load_parser.add_argument(
+        "--data-folder", help="Folder with master.idx, sub.txt and pre.txt"
+    )
+    load_parser.add_argument("--db-path", help="SQLite database to build")
+    load_parser.add_argument(
+        "--parquet-dir",
+        help="Also write each table as partitioned, zstd-compressed Parquet here",
+    )
 
     # Query command
     query_parser = subparsers.add_parser("query", help="Query EDGAR filings")
     query_parser.add_argument("query", help="Natural language query")
 
+    # Index advisor command
+    advisor_parser = subparsers.add_parser(
+        "index-advisor", help="Propose indexes from the slow-query log"
+    )
+    advisor_parser.add_argument(
+        "--top", type=int, default=5, help="Number of indexes to propose"
+    )
+    advisor_parser.add_argument(
+        "--apply",
+        action="store_true",
+        help="Create the proposed indexes and measure the improvement",
+    )
+
+    # Synthetic data command
+    synth_parser = subparsers.add_parser(
+        "generate-data", help="Write synthetic master.idx, sub.txt and pre.txt"
+    )
+    synth_parser.add_argument(
+        "--output", default="data/synthetic", help="Folder to write the files to"
+    )
+    synth_parser.add_argument(
+        "--rows", type=int, default=10_000, help="Rows in master.idx"
+    )
+    synth_parser.add_argument("--sub-rows", type=int, help="Rows in sub.txt")
+    synth_parser.add_argument("--pre-rows", type=int, help="Rows in pre.txt")
+    synth_parser.add_argument("--companies", type=int, help="Distinct CIKs")
+    synth_parser.add_argument(
+        "--tags", type=int, default=2_000, help="Distinct presentation tags"
+    )
+    synth_parser.add_argument(
+        "--form-types", type=int, help="Distinct form types in master.idx"
+    )
+    synth_parser.add_argument(
+        "--skew", type=float, default=1.1, help="Zipf exponent of filer popularity"
+    )
+    synth_parser.add_argument("--seed", type=int, default=0, help="Random seed")
+
+    # Benchmark command
+    bench_parser = subparsers.add_parser(
+        "bench", help="Benchmark loading, queries and /query on synthetic data"
+    )
+    bench_parser.add_argument(
+        "--sizes",
+        default="10000,100000",
+        help="Comma-separated master.idx row counts to benchmark",
+    )
+    bench_parser.add_argument(
+        "--work-dir", default="data/bench", help="Where datasets are generated"
+    )
+    bench_parser.add_argument(
+        "--output", default="data/bench/results.json", help="Results JSON file"
+    )
+    bench_parser.add_argument(
+        "--baseline",
+        default="benchmarks/baseline.json",
+        help="Baseline JSON to compare against",
+    )
+    bench_parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed relative slowdown before a metric counts as a regression",
+    )
+    bench_parser.add_argument(
+        "--backends",
+        default="sqlite",
+        help="Comma-separated backends to time the query catalogue on "
+        "(sqlite, duckdb, columnar)",
+    )
+    bench_parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Store these results as the new baseline",
+    )
+
+    # Stub LLM command
+    stub_parser = subparsers.add_parser(
+        "stub-llm", help="Serve a local OpenAI-compatible stand-in for load tests"
+    )
+    stub_parser.add_argument("--host", default="127.0.0.1", help="Host to bind to")
+    stub_parser.add_argument("--port", type=int, default=8089, help="Port to bind to")
+    stub_parser.add_argument(
+        "--latency",
+        default="lognormal:300,0.5",
+        help="fixed:MS, uniform:LOW,HIGH, exponential:MEAN or lognormal:MEDIAN,SIGMA",
+    )
+    stub_parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of calls failing with 500",
+    )
+    stub_parser.add_argument(
+        "--rate-limit-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of calls rejected with 429",
+    )
+    stub_parser.add_argument("--canned", help="JSON file mapping questions to SQL")
+    stub_parser.add_argument("--seed", type=int, help="Random seed")
+
+    # Load generator command
+    load_parser = subparsers.add_parser(
+        "loadgen", help="Drive /query at a target rate and report latency"
+    )
+    load_parser.add_argument(
+        "--url", default="http://127.0.0.1:8000", help="API base URL"
+    )
+    load_parser.add_argument("--rps", type=float, default=10.0, help="Requests/sec")
+    load_parser.add_argument(
+        "--duration", type=float, default=30.0, help="Seconds to run"
+    )
+    load_parser.add_argument("--questions", help="File with one question per line")
+    load_parser.add_argument(
+        "--max-in-flight", type=int, default=64, help="Concurrent request limit"
+    )
+
+    # Replay command
+    replay_parser = subparsers.add_parser(
+        "replay", help="Replay logged queries against a candidate database"
+    )
+    replay_parser.add_argument(
+        "candidate", help="Path of the candidate edgar_filings.db build"
+    )
+    replay_parser.add_argument(
+        "--current", help="Database to compare against (default: the live build)"
+    )
+    replay_parser.add_argument("--log", help="Query log database to replay")
+    replay_parser.add_argument(
+        "--concurrency", type=int, default=4, help="Queries replayed at once"
+    )
+    replay_parser.add_argument(
+        "--repeats", type=int, default=3, help="Runs per query; the median is kept"
+    )
+    replay_parser.add_argument(
+        "--since-hours", type=float, help="Only replay queries logged recently"
+    )
+    replay_parser.add_argument(
+        "--top", type=int, default=20, help="Queries shown in the report"
+    )
+
     # API command
     api_parser = subparsers.add_parser("api", help="Start API server")
     api_parser.add_argument("--host", default="0.0.0.0", help="Host to bind to")
@@ -34,13 +189,7 @@ def main():
         return
 
     if args.command == "load-data":
-        engine = EdgarQueryEngine()
-        engine.initialize()
-        if engine.load_data():
-            print("Data loaded successfully")
-        else:
-            print("Failed to load data")
-            sys.exit(1)
+        run_load_data(args.data_folder, args.db_path, args.parquet_dir)
 
     elif args.command == "query":
         engine = EdgarQueryEngine()
@@ -52,6 +201,24 @@ def main():
         if result:
             print(result["markdown_response"])
 
+    elif args.command == "generate-data":
+        run_generate_data(args)
+
+    elif args.command == "bench":
+        run_bench(args)
+
+    elif args.command == "stub-llm":
+        run_stub_llm(args)
+
+    elif args.command == "loadgen":
+        run_loadgen(args)
+
+    elif args.command == "replay":
+        run_replay(args)
+
+    elif args.command == "index-advisor":
+        run_index_advisor(args.top, args.apply)
+
     elif args.command == "api":
         try:
             # Dynamic imports to avoid top-level dependencies
@@ -92,5 +259,166 @@ def main():
             sys.exit(1)
 
 
+def run_load_data(data_folder=None, db_path=None, parquet_dir=None):
+    """Build the database if needed and print the build report."""
+    loader = DataLoaderAgent(
+        db_path=db_path, data_folder=data_folder, parquet_dir=parquet_dir
+    )
+    try:
+        conn = loader.init_db()
+    except FileNotFoundError as e:
+        print(f"Failed to load data: {e}")
+        sys.exit(1)
+    if loader.load_report is not None:
+        print("Data loaded successfully")
+        return
+    report = LoadReport.latest(conn)
+    if report is not None:
+        print("Last build report:")
+        print(report.summary())
+    if parquet_dir:
+        # The database already existed, so mirror what it holds
+        loader.mirror_to_parquet()
+
+
+def run_generate_data(args):
+    """Write a reproducible synthetic dataset for benchmarks."""
+    from ..bench import SyntheticConfig, generate_dataset
+
+    config = SyntheticConfig(
+        master_rows=args.rows,
+        sub_rows=args.sub_rows,
+        pre_rows=args.pre_rows,
+        companies=args.companies,
+        tags=args.tags,
+        form_types=args.form_types,
+        skew=args.skew,
+        seed=args.seed,
+    )
+    dataset = generate_dataset(args.output, config)
+    for path in dataset.files.values():
+        print(f"Wrote {path} ({path.stat().st_size / 1024 / 1024:.1f} MB)")
+    print(
+        f"Load it with: edgar load-data --data-folder {dataset.folder} "
+        f"--db-path {dataset.folder / 'edgar_filings.db'}"
+    )
+
+
+def run_bench(args):
+    """Run the benchmark suite and fail on regressions against the baseline."""
+    from ..bench import BenchmarkSuite, compare, load_results, save_results
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    backends = [name.strip() for name in args.backends.split(",") if name.strip()]
+    results = BenchmarkSuite(
+        work_dir=args.work_dir, sizes=sizes, backends=backends
+    ).run()
+    save_results(results, args.output)
+    print(f"Wrote benchmark results to {args.output}")
+
+    if args.update_baseline:
+        save_results(results, args.baseline)
+        print(f"Updated baseline {args.baseline}")
+        return
+    baseline = load_results(args.baseline)
+    if baseline is None:
+        print(
+            f"No baseline at {args.baseline}; run with --update-baseline to store one"
+        )
+        return
+    regressions = compare(results, baseline, args.tolerance)
+    if not regressions:
+        print(f"No regressions beyond {args.tolerance:.0%} of the baseline")
+        return
+    print(f"{len(regressions)} regressions beyond {args.tolerance:.0%}:")
+    for regression in regressions:
+        print(f"  {regression}")
+    sys.exit(1)
+
+
+def run_stub_llm(args):
+    """Serve the stub LLM until interrupted."""
+    from ..bench import StubLLM, start_stub_server
+
+    options = {
+        "latency": args.latency,
+        "error_rate": args.error_rate,
+        "rate_limit_rate": args.rate_limit_rate,
+        "seed": args.seed,
+    }
+    stub = (
+        StubLLM.from_file(args.canned, **options) if args.canned else StubLLM(**options)
+    )
+    server, base_url = start_stub_server(stub, args.host, args.port)
+    print(f"Stub LLM listening; set EDGAR_LLM_BASE_URL={base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"\nServed {stub.calls} calls.")
+
+
+def run_loadgen(args):
+    """Run the load generator and print its summary as JSON."""
+    from ..bench import LoadGenerator
+    from ..bench.loadgen import DEFAULT_QUESTIONS
+
+    questions = DEFAULT_QUESTIONS
+    if args.questions:
+        with open(args.questions, encoding="utf-8") as f:
+            questions = [line.strip() for line in f if line.strip()]
+    generator = LoadGenerator(
+        url=args.url,
+        rps=args.rps,
+        duration_seconds=args.duration,
+        questions=questions,
+        max_in_flight=args.max_in_flight,
+    )
+    print(json.dumps(generator.run().summary(), indent=2))
+
+
+def run_replay(args):
+    """Replay the query log against a candidate build and print the diff."""
+    from ..agents.query_log import QueryLog
+    from ..bench.replay import ReplayRunner, format_report
+
+    current = args.current or DataLoaderAgent().db_path
+    since = time.time() - args.since_hours * 3600 if args.since_hours else None
+    runner = ReplayRunner(
+        QueryLog(args.log),
+        current,
+        args.candidate,
+        concurrency=args.concurrency,
+        repeats=args.repeats,
+    )
+    try:
+        print(format_report(runner.run(since=since), top=args.top))
+    finally:
+        runner.close()
+
+
+def run_index_advisor(top, apply):
+    """Print index proposals for the most frequent slow full-scan patterns."""
+    conn = DataLoaderAgent().init_db()
+    advisor = IndexAdvisorAgent(conn, SlowQueryLog())
+    recommendations = advisor.recommend(top=top)
+    if not recommendations:
+        print("No full-scan patterns found in the slow-query log")
+        return
+
+    for recommendation in recommendations:
+        print(
+            f"{recommendation.statement};  -- {recommendation.occurrences} slow "
+            f"queries, {recommendation.total_ms:.0f} ms total"
+        )
+        if apply:
+            advisor.apply(recommendation)
+            print(
+                f"  applied: {recommendation.before_ms:.1f} ms -> "
+                f"{recommendation.after_ms:.1f} ms"
+            )
+
+
 if __name__ == "__main__":
     main()
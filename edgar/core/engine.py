@@ -1,6 +1,9 @@
 """Core functionality for EDGAR query tool."""
 
-from typing import Any, Dict
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Optional
 
 from ..agents import (
     DataLoaderAgent,
@@ -8,54 +11,377 @@ from ..agents import (
     SQLExecutorAgent,
     SQLGeneratorAgent,
 )
+from ..agents.columnar_index import ColumnarMasterIndex
+from ..agents.duckdb_backend import BackendRouter, DuckDBBackend
+from ..agents.pagination import Page, Paginator, frame_rows
+from ..agents.result_summarizer import estimate_tokens
+from ..agents.slow_query_log import SlowQueryLog
+from ..agents.sql_templates import SQLTemplate, SQLTemplateCache, canonical_question
+from ..config import env_bool, env_int, env_str
+from ..observability import REGISTRY, span, stage, track_request
+from ..observability.profiling import RequestProfiler
+from .singleflight import SingleFlight
+
+GENERATION_MODES = ("single", "parallel")
+CANDIDATE_TEMPERATURES = (0.0, 0.4, 0.7, 1.0)
+
+SQL_STAGE_SECONDS = REGISTRY.histogram(
+    "edgar_sql_stage_seconds",
+    "Time from question to validated, executed SQL",
+    ["mode"],
+)
+SQL_STAGE_TOTAL = REGISTRY.counter(
+    "edgar_sql_stage_total",
+    "Questions that reached SQL execution, by generation mode and outcome",
+    ["mode", "outcome"],
+)
+PROMPT_TOKENS = REGISTRY.histogram(
+    "edgar_prompt_tokens",
+    "Estimated prompt tokens sent to the LLM per request",
+    ["prompt"],
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000),
+)
+QUERIES_TOTAL = REGISTRY.counter(
+    "edgar_queries_total",
+    "Questions answered, by outcome and whether they joined an identical request",
+    ["outcome", "coalesced"],
+)
+TEMPLATE_CACHE_TOTAL = REGISTRY.counter(
+    "edgar_sql_template_cache_total",
+    "SQL template cache lookups by result",
+    ["result"],
+)
+RESULT_ROWS = REGISTRY.histogram(
+    "edgar_result_rows",
+    "Rows returned by executed SQL",
+    buckets=(0, 1, 10, 100, 1000, 10000, 100000),
+)
+SQL_BACKEND_TOTAL = REGISTRY.counter(
+    "edgar_sql_backend_total",
+    "Executed statements by the backend that answered them",
+    ["backend"],
+)
+COLUMNAR_INDEX_BYTES = REGISTRY.gauge(
+    "edgar_columnar_index_bytes", "Memory held by the in-memory master_index columns"
+)
+RESULT_BYTES_SAVED = REGISTRY.counter(
+    "edgar_result_bytes_saved_total",
+    "Result frame memory saved by compact dtypes, in bytes",
+)
 
 
 class EdgarQueryEngine:
     """Main query engine for EDGAR filings."""
 
-    def __init__(self):
+    def __init__(self, generation_mode=None, candidate_count=None, profiler=None):
         self.data_loader = DataLoaderAgent()
         self.sql_generator = SQLGeneratorAgent()
         self.markdown_responder = MarkdownResponderAgent()
         self.sql_executor = None
+        self.template_cache = SQLTemplateCache()
+        self.generation_mode = generation_mode or env_str(
+            "EDGAR_SQL_GENERATION_MODE", "single"
+        )
+        if self.generation_mode not in GENERATION_MODES:
+            raise ValueError(
+                f"Unknown SQL generation mode {self.generation_mode!r}; "
+                f"expected one of {', '.join(GENERATION_MODES)}"
+            )
+        self.candidate_count = candidate_count or env_int("EDGAR_SQL_CANDIDATES", 3)
+        self._candidate_pool: Optional[ThreadPoolExecutor] = None
+        self._question_flight = SingleFlight("question")
+        self._execution_flight = SingleFlight("execution")
+        self.profiler = profiler or RequestProfiler.from_env()
+        self.paginator = Paginator()
 
     def initialize(self):
         """Initialize the database connection."""
         conn = self.data_loader.init_db()
-        self.sql_executor = SQLExecutorAgent(conn)
+        self.sql_executor = SQLExecutorAgent(
+            connection_factory=self.data_loader.connect_read_only,
+            slow_query_log=SlowQueryLog(),
+            router=self._analytical_router(),
+            columnar=self._columnar_index(),
+        )
         return conn
 
-    def query(self, user_query: str) -> Dict[str, Any]:
-        """Execute a natural language query and return formatted results."""
+    def _columnar_index(self) -> Optional[ColumnarMasterIndex]:
+        """master_index in memory for filter queries, if EDGAR_COLUMNAR_INDEX is set."""
+        if not env_bool("EDGAR_COLUMNAR_INDEX"):
+            return None
+        started = time.perf_counter()
+        conn = self.data_loader.connect_read_only()
+        try:
+            index = ColumnarMasterIndex.load(conn)
+        except Exception as e:
+            print(f"Columnar master_index unavailable, using SQLite only: {e}")
+            return None
+        finally:
+            conn.close()
+        COLUMNAR_INDEX_BYTES.set(index.memory_bytes)
+        print(
+            f"Loaded master_index into memory: {len(index):,} rows, "
+            f"{index.memory_bytes / 1e6:.1f} MB in {time.perf_counter() - started:.2f}s"
+        )
+        return index
+
+    def _analytical_router(self) -> Optional[BackendRouter]:
+        """Router to the backend named by EDGAR_ANALYTICAL_BACKEND, if any."""
+        name = env_str("EDGAR_ANALYTICAL_BACKEND")
+        if not name:
+            return None
+        if name != "duckdb":
+            raise ValueError(f"Unknown analytical backend {name!r}; expected duckdb")
+        try:
+            backend = DuckDBBackend(
+                db_path=self.data_loader.db_path,
+                parquet_dir=env_str("EDGAR_DUCKDB_PARQUET_DIR"),
+            )
+        except Exception as e:
+            print(f"DuckDB backend unavailable, answering from SQLite only: {e}")
+            return None
+        return BackendRouter(backend)
+
+    def close(self):
+        """Close the executor's connections, the analytical backend and the pools."""
+        if self._candidate_pool is not None:
+            self._candidate_pool.shutdown(wait=False)
+            self._candidate_pool = None
+        if self.sql_executor is not None:
+            self.sql_executor.close()
+            if self.sql_executor.router is not None:
+                self.sql_executor.router.backend.close()
+
+    def query(
+        self, user_query: str, profile: bool = False, label: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Execute a natural language query and return formatted results.
+
+        Concurrent calls with the same canonical question share one computation.
+        The call is profiled when ``profile`` is set or the profiler samples it;
+        the profile location is returned as ``profile_path``.
+        """
         if not self.sql_executor:
             raise RuntimeError("Engine not initialized. Call initialize() first.")
 
-        # Generate SQL from natural language
-        sql_query, prompt = self.sql_generator.generate_sql_query(user_query)
-        if not sql_query:
+        if not (profile or self.profiler.should_profile()):
+            return self._coalesced_query(user_query)
+        with self.profiler.profile(label) as run:
+            result = self._coalesced_query(user_query)
+        return {**result, "profile_path": str(run.path) if run.path else None}
+
+    def _coalesced_query(self, user_query: str) -> Dict[str, Any]:
+        with span("engine.query") as current:
+            result, shared = self._question_flight.do(
+                canonical_question(user_query), lambda: self._query(user_query)
+            )
+            current.set_attribute("coalesced", shared)
+            current.set_attribute("success", result["success"])
+        QUERIES_TOTAL.inc(
+            outcome="success" if result["success"] else "error",
+            coalesced=str(shared).lower(),
+        )
+        return {**result, "coalesced": shared}
+
+    def _query(self, user_query: str) -> Dict[str, Any]:
+        with track_request() as stats:
+            result = self._answer(user_query)
+        result["timings_ms"] = dict(stats.timings_ms)
+        result["llm_tokens"] = dict(stats.llm_tokens)
+        return result
+
+    def _answer(self, user_query: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        with stage("sql_generation"):
+            sql_template, prompt, mode, error = self._plan_sql(user_query)
+        if not sql_template:
+            self._record_sql_stage(mode, "failed", started)
             return {
                 "success": False,
-                "error": "Could not generate SQL query",
+                "error": error or "Could not generate SQL query",
                 "sql_prompt": prompt,
             }
 
-        # Execute SQL query
-        df, error = self.sql_executor.execute_sql_query(sql_query)
-        if error:
-            return {"success": False, "error": error, "sql_prompt": prompt}
+        # Execute SQL query behind the cost guard, sharing identical executions
+        with stage("sql_execution"):
+            execution, _ = self._execution_flight.do(
+                (sql_template.template, sql_template.params),
+                lambda: self.sql_executor.execute(
+                    sql_template.template, sql_template.params, question=user_query
+                ),
+            )
+        if execution.error:
+            self._record_sql_stage(mode, "failed", started)
+            return {
+                "success": False,
+                "error": execution.error,
+                "sql_prompt": prompt,
+                "query_plan": execution.query_plan,
+            }
+        self._record_sql_stage(mode, "succeeded", started)
+        if mode != "cached":
+            self.template_cache.learn(user_query, sql_template)
+        sql_query = SQLTemplate(execution.sql_query, execution.params).render()
+        df = execution.df
+        RESULT_ROWS.observe(len(df))
+        RESULT_BYTES_SAVED.inc(execution.memory_saved_bytes)
+        SQL_BACKEND_TOTAL.inc(backend=execution.backend)
 
         # Generate markdown response
-        markdown_response, response_prompt = (
-            self.markdown_responder.generate_markdown_response(
-                user_query, sql_query, df
+        with stage("answer_generation"):
+            markdown_response, response_prompt = (
+                self.markdown_responder.generate_markdown_response(
+                    user_query, sql_query, df
+                )
             )
-        )
+
+        prompt_tokens = self._record_prompt_tokens(prompt, response_prompt)
 
         return {
             "success": True,
             "sql_query": sql_query,
+            "sql_template": execution.sql_query,
+            "source_template": sql_template.template,
+            "sql_params": list(execution.params),
+            "sql_cache_hit": mode == "cached",
+            "generation_mode": mode,
             "data": df,
+            "row_count": len(df),
+            "backend": execution.backend,
+            "result_bytes": execution.memory_bytes,
+            "result_bytes_saved": execution.memory_saved_bytes,
             "markdown_response": markdown_response,
             "sql_prompt": prompt,
             "response_prompt": response_prompt,
+            "query_plan": execution.query_plan,
+            "guard_notes": execution.guard_notes,
+            "prompt_tokens": prompt_tokens,
         }
+
+    def plan_sql(self, user_query: str):
+        """Return (template, error) for a question without running or answering it."""
+        with span("engine.plan_sql"):
+            sql_template, _, _, error = self._plan_sql(user_query)
+        return sql_template, error
+
+    def first_page(
+        self, result: Dict[str, Any], page_size: int, full_result: bool = False
+    ) -> Page:
+        """First page of a successful answer's full result, with a cursor.
+
+        The pages stop at the answer's own LIMIT unless ``full_result`` is
+        set. Queries that cannot be keyset paged return the rows already
+        fetched and no cursor.
+        """
+        page = self.paginator.first_page(
+            self.sql_executor,
+            result["source_template"],
+            result["sql_params"],
+            page_size,
+            full_result,
+        )
+        if page is None or page.error:
+            df = result["data"].head(self.paginator.clamp_page_size(page_size))
+            page = Page(columns=list(df.columns), rows=frame_rows(df))
+        return page
+
+    def next_page(self, cursor: str) -> Page:
+        """The page after ``cursor``; raises InvalidCursor for a bad cursor."""
+        return self.paginator.next_page(self.sql_executor, cursor)
+
+    def generation_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Success rate and p95 latency of the SQL stage for each generation mode."""
+        stats = {}
+        for mode in ("cached",) + GENERATION_MODES:
+            succeeded = SQL_STAGE_TOTAL.value(mode=mode, outcome="succeeded")
+            failed = SQL_STAGE_TOTAL.value(mode=mode, outcome="failed")
+            if not succeeded + failed:
+                continue
+            p95 = SQL_STAGE_SECONDS.percentile(0.95, mode=mode)
+            stats[mode] = {
+                "requests": int(succeeded + failed),
+                "success_rate": succeeded / (succeeded + failed),
+                "p95_ms": p95 * 1000,
+            }
+        return stats
+
+    def _record_sql_stage(self, mode, outcome, started):
+        SQL_STAGE_TOTAL.inc(mode=mode, outcome=outcome)
+        SQL_STAGE_SECONDS.observe(time.perf_counter() - started, mode=mode)
+
+    def _record_prompt_tokens(self, sql_prompt, response_prompt):
+        """Estimate the tokens of each prompt sent for this request."""
+        prompt_tokens = {}
+        for name, text in (("sql", sql_prompt), ("answer", response_prompt)):
+            if text is None:
+                continue
+            prompt_tokens[name] = estimate_tokens(text)
+            PROMPT_TOKENS.observe(prompt_tokens[name], prompt=name)
+        return prompt_tokens
+
+    def _plan_sql(self, user_query):
+        """Return (template, prompt, mode, error) for the question."""
+        cached = self.template_cache.lookup(user_query)
+        TEMPLATE_CACHE_TOTAL.inc(result="hit" if cached else "miss")
+        if cached:
+            return cached, None, "cached", None
+        if self.generation_mode == "parallel":
+            sql_template, prompt, error = self._generate_parallel(user_query)
+            return sql_template, prompt, "parallel", error
+        sql_template, prompt = self.sql_generator.generate_sql_template(user_query)
+        return sql_template, prompt, "single", None
+
+    def _generate_parallel(self, user_query):
+        """Request several candidates at once and keep the first that compiles.
+
+        Candidates are validated with EXPLAIN against the live schema as they
+        arrive; when none is valid, the first error is fed back for a single
+        repair attempt.
+        """
+        if self._candidate_pool is None:
+            self._candidate_pool = ThreadPoolExecutor(
+                max_workers=self.candidate_count, thread_name_prefix="sql-candidate"
+            )
+        temperatures = [
+            CANDIDATE_TEMPERATURES[index % len(CANDIDATE_TEMPERATURES)]
+            for index in range(self.candidate_count)
+        ]
+        # Run each candidate in a copy of this context so its stage timings
+        # are attributed to the current request
+        futures = [
+            self._candidate_pool.submit(
+                contextvars.copy_context().run,
+                self.sql_generator.generate_sql_template,
+                user_query,
+                temperature,
+            )
+            for temperature in temperatures
+        ]
+
+        prompt = None
+        failures = []
+        for future in as_completed(futures):
+            sql_template, prompt = future.result()
+            if not sql_template:
+                continue
+            error = self.sql_executor.validate(
+                sql_template.template, sql_template.params
+            )
+            if error is None:
+                for pending in futures:
+                    pending.cancel()
+                return sql_template, prompt, None
+            failures.append((sql_template, error))
+
+        if not failures:
+            return None, prompt, None
+        failed_template, error = failures[0]
+        sql_template, prompt = self.sql_generator.repair_sql_template(
+            user_query, failed_template.render(), error
+        )
+        if not sql_template:
+            return None, prompt, f"Generated SQL was invalid: {error}"
+        error = self.sql_executor.validate(sql_template.template, sql_template.params)
+        if error:
+            return None, prompt, f"Generated SQL was invalid after repair: {error}"
+        return sql_template, prompt, None
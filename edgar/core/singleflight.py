@@ -0,0 +1,77 @@
+"""Coalescing of identical concurrent calls onto one computation."""
+
+import copy
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+import pandas as pd
+
+from ..observability import REGISTRY
+
+COALESCED_TOTAL = REGISTRY.counter(
+    "edgar_singleflight_total",
+    "Calls per coalescing stage, split into leaders that computed and followers that waited",
+    ["stage", "role"],
+)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Any = None
+
+
+def shared_copy(value: Any) -> Any:
+    """A shallow copy of a result, with its DataFrames shallow-copied as well.
+
+    Followers get their own result so that setting a key or a column on it
+    does not change what the leader, or another follower, sees.
+    """
+    if isinstance(value, pd.DataFrame):
+        return value.copy(deep=False)
+    copied = copy.copy(value)
+    fields = copied if isinstance(copied, dict) else getattr(copied, "__dict__", {})
+    for name, item in list(fields.items()):
+        if isinstance(item, pd.DataFrame):
+            fields[name] = item.copy(deep=False)
+    return copied
+
+
+class SingleFlight:
+    """Runs at most one computation per key; concurrent callers share its result."""
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return (result, shared) where shared is True for callers that waited.
+
+        Callers that waited get a ``shared_copy`` of the leader's result.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            COALESCED_TOTAL.inc(stage=self.stage, role="follower")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return shared_copy(call.result), True
+
+        COALESCED_TOTAL.inc(stage=self.stage, role="leader")
+        try:
+            call.result = compute()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
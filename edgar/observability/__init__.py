@@ -0,0 +1,40 @@
+"""Observability package for EDGAR query tool."""
+
+from .exposition import CONTENT_TYPE, render_metrics
+from .metrics import REGISTRY, Counter, Gauge, Histogram, MetricsRegistry
+from .timing import RequestStats, current_stats, record_llm_usage, stage, track_request
+from .tracing import (
+    JsonlSink,
+    NoopSink,
+    RingBufferSink,
+    Tracer,
+    current_span,
+    get_tracer,
+    set_tracer,
+    span,
+    sql_hash,
+)
+
+__all__ = [
+    "CONTENT_TYPE",
+    "REGISTRY",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "JsonlSink",
+    "MetricsRegistry",
+    "NoopSink",
+    "RequestStats",
+    "RingBufferSink",
+    "Tracer",
+    "current_span",
+    "current_stats",
+    "get_tracer",
+    "record_llm_usage",
+    "render_metrics",
+    "set_tracer",
+    "span",
+    "sql_hash",
+    "stage",
+    "track_request",
+]
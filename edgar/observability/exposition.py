@@ -0,0 +1,54 @@
+"""Prometheus text exposition of the in-process metrics registry."""
+
+from .metrics import REGISTRY, Counter, Gauge, Histogram
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def render_metrics(registry=REGISTRY) -> str:
+    """Render every registered metric in the Prometheus text format."""
+    lines = []
+    for metric in registry.metrics():
+        if isinstance(metric, (Counter, Gauge)):
+            kind = "counter" if isinstance(metric, Counter) else "gauge"
+            lines.append(f"# HELP {metric.name} {_escape_help(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {kind}")
+            for key, value in sorted(metric.samples().items()):
+                labels = dict(zip(metric.labelnames, key))
+                lines.append(f"{metric.name}{_labels(labels)} {_number(value)}")
+        elif isinstance(metric, Histogram):
+            lines.append(f"# HELP {metric.name} {_escape_help(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} histogram")
+            for key, (buckets, count, total) in sorted(metric.samples().items()):
+                labels = dict(zip(metric.labelnames, key))
+                cumulative = 0
+                for bound, bucket_count in zip(metric.buckets, buckets):
+                    cumulative += bucket_count
+                    bucket_labels = _labels({**labels, "le": _number(bound)})
+                    lines.append(f"{metric.name}_bucket{bucket_labels} {cumulative}")
+                inf_labels = _labels({**labels, "le": "+Inf"})
+                lines.append(f"{metric.name}_bucket{inf_labels} {count}")
+                lines.append(f"{metric.name}_sum{_labels(labels)} {_number(total)}")
+                lines.append(f"{metric.name}_count{_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def _labels(labels) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape_value(value)}"' for name, value in labels.items()
+    )
+    return "{" + pairs + "}"
+
+
+def _escape_help(text) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
@@ -0,0 +1,111 @@
+"""Opt-in deterministic profiling of individual requests."""
+
+import cProfile
+import hmac
+import io
+import pstats
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+from ..config import env_bool, env_float, env_str
+from .tracing import new_id
+
+DEFAULT_PROFILE_DIR = Path("data") / "profiles"
+SUMMARY_LINES = 40
+# cProfile hooks the whole interpreter on Python 3.12+ and refuses to start a
+# second profiler while one is active, so only one request is profiled at a time
+_PROFILE_LOCK = threading.Lock()
+
+
+class ProfileRun:
+    """Where the profile of one request was written, once it finished."""
+
+    def __init__(self, label):
+        self.label = label
+        self.path: Optional[Path] = None
+        self.summary_path: Optional[Path] = None
+
+
+class RequestProfiler:
+    """Decides which requests to profile and writes their profiles to disk.
+
+    A request is profiled when profiling is enabled and it falls within the
+    sample rate, or when the caller presents the configured profile token.
+    Without a configured token, requests can never force profiling.
+
+    Only one request in the process is profiled at a time: a request that
+    asks while another profile is running is answered without one. Before
+    Python 3.12 cProfile only sees the thread it runs on, so work handed to
+    other threads (such as parallel SQL candidates) shows up as time spent
+    waiting; from 3.12 it also records whatever other threads run meanwhile.
+    """
+
+    def __init__(self, enabled=False, sample_rate=1.0, output_dir=None, token=None):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.output_dir = Path(output_dir or DEFAULT_PROFILE_DIR)
+        self.token = token
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            enabled=env_bool("EDGAR_PROFILE"),
+            sample_rate=env_float("EDGAR_PROFILE_SAMPLE_RATE", 1.0),
+            output_dir=env_str("EDGAR_PROFILE_DIR"),
+            token=env_str("EDGAR_PROFILE_TOKEN"),
+        )
+
+    def authorized(self, token) -> bool:
+        if not self.token or not token:
+            return False
+        return hmac.compare_digest(self.token.encode(), token.encode())
+
+    def should_profile(self, token=None) -> bool:
+        if self.authorized(token):
+            return True
+        return self.enabled and random.random() < self.sample_rate
+
+    @contextmanager
+    def profile(self, label=None):
+        """Profile the enclosed block and write ``<time>-<label>.prof`` plus a summary.
+
+        While another profile is running, including an enclosing one on the
+        same thread, the block runs unprofiled and ``run.path`` stays None.
+        """
+        run = ProfileRun(_safe_label(label or new_id()))
+        if not _PROFILE_LOCK.acquire(blocking=False):
+            yield run
+            return
+
+        try:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield run
+            finally:
+                profiler.disable()
+                self._write(profiler, run)
+        finally:
+            _PROFILE_LOCK.release()
+
+    def _write(self, profiler, run: ProfileRun):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stem = f"{time.strftime('%Y%m%d-%H%M%S')}-{run.label}"
+        run.path = self.output_dir / f"{stem}.prof"
+        profiler.dump_stats(run.path)
+
+        buffer = io.StringIO()
+        stats = pstats.Stats(profiler, stream=buffer)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(SUMMARY_LINES)
+        run.summary_path = self.output_dir / f"{stem}.txt"
+        run.summary_path.write_text(buffer.getvalue(), encoding="utf-8")
+        print(f"Wrote request profile to {run.path}")
+
+
+def _safe_label(label) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", str(label))[:64]
@@ -0,0 +1,87 @@
+"""Per-request stage timings and token usage, exported as metrics as they happen."""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from .metrics import REGISTRY
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "edgar_stage_seconds",
+    "Time spent in each stage of answering a question",
+    ["stage"],
+)
+LLM_TOKENS = REGISTRY.counter(
+    "edgar_llm_tokens_total",
+    "Tokens reported by the LLM provider",
+    ["kind"],
+)
+
+_current: contextvars.ContextVar[Optional["RequestStats"]] = contextvars.ContextVar(
+    "edgar_request_stats", default=None
+)
+
+
+class RequestStats:
+    """Stage durations and token counts collected while one request is served."""
+
+    def __init__(self):
+        self.timings_ms: Dict[str, float] = {}
+        self.llm_tokens: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add_time(self, stage, seconds):
+        with self._lock:
+            self.timings_ms[stage] = self.timings_ms.get(stage, 0.0) + seconds * 1000
+
+    def add_tokens(self, kind, count):
+        with self._lock:
+            self.llm_tokens[kind] = self.llm_tokens.get(kind, 0) + count
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+@contextmanager
+def track_request():
+    """Collect stage timings of the enclosed work into a fresh RequestStats."""
+    stats = RequestStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def stage(name):
+    """Time the enclosed block as ``name`` for the histogram and current request.
+
+    Time in repeated or concurrent blocks of the same stage is summed.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        stats = _current.get()
+        if stats is not None:
+            stats.add_time(name, elapsed)
+
+
+def record_llm_usage(usage):
+    """Count the prompt and completion tokens of an LLM response's usage block."""
+    if usage is None:
+        return
+    stats = _current.get()
+    for kind in ("prompt", "completion"):
+        count = getattr(usage, f"{kind}_tokens", None)
+        if not count:
+            continue
+        LLM_TOKENS.inc(count, kind=kind)
+        if stats is not None:
+            stats.add_tokens(kind, count)
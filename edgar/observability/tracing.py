@@ -0,0 +1,221 @@
+"""Lightweight request tracing with pluggable sinks.
+
+Spans nest through a context variable, so work done on behalf of a request
+(including worker threads started with a copied context) is attached to the
+request's trace. With the default no-op sink, ``span()`` returns a shared
+inert object and records nothing.
+"""
+
+import contextvars
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..config import env_int, env_str
+
+DEFAULT_TRACE_PATH = Path("data") / "traces.jsonl"
+
+
+def sql_hash(sql_query) -> str:
+    """Short stable identifier for a SQL text, so traces need not carry the SQL."""
+    return hashlib.sha1((sql_query or "").encode("utf-8")).hexdigest()[:12]
+
+
+def new_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+class Span:
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "start_time",
+        "duration_ms",
+        "attributes",
+        "error",
+        "_started",
+    )
+
+    # Attributes that are costly to compute are only worth it on a recording span
+    recording = True
+
+    def __init__(self, name, trace_id, parent_id=None, attributes=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = new_id()
+        self.parent_id = parent_id
+        self.start_time = time.time()
+        self.duration_ms: Optional[float] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.error: Optional[str] = None
+        self._started = time.perf_counter()
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Stand-in returned while tracing is off; every operation does nothing."""
+
+    trace_id = None
+    span_id = None
+    recording = False
+
+    def set_attribute(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class NoopSink:
+    enabled = False
+
+    def emit(self, span: Span):
+        pass
+
+
+class RingBufferSink:
+    """Keeps the most recent finished spans in memory."""
+
+    enabled = True
+
+    def __init__(self, capacity=1000):
+        self._spans = deque(maxlen=capacity)
+
+    def emit(self, span: Span):
+        self._spans.append(span)
+
+    def spans(self, trace_id=None) -> List[Span]:
+        spans = list(self._spans)
+        if trace_id is None:
+            return spans
+        return [span for span in spans if span.trace_id == trace_id]
+
+
+class JsonlSink:
+    """Appends one JSON object per finished span to a file."""
+
+    enabled = True
+
+    def __init__(self, path=None):
+        self.path = Path(path or DEFAULT_TRACE_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def emit(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+    "edgar_current_span", default=None
+)
+
+
+class _ActiveSpan:
+    def __init__(self, tracer, span):
+        self.tracer = tracer
+        self.span = span
+        self._token = None
+
+    def __enter__(self) -> Span:
+        self._token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        self.span.duration_ms = (time.perf_counter() - self.span._started) * 1000
+        if exc is not None:
+            self.span.error = f"{exc_type.__name__}: {exc}"
+        self.tracer.sink.emit(self.span)
+        return False
+
+
+class Tracer:
+    def __init__(self, sink=None):
+        self.sink = sink or NoopSink()
+
+    @property
+    def enabled(self) -> bool:
+        return self.sink.enabled
+
+    def span(self, name, trace_id=None, **attributes):
+        """Context manager for a child of the current span, or a new trace root.
+
+        ``trace_id`` only applies to root spans, e.g. to reuse a request id.
+        """
+        if not self.sink.enabled:
+            return NOOP_SPAN
+        parent = _current_span.get()
+        if parent is not None:
+            span = Span(name, parent.trace_id, parent.span_id, attributes)
+        else:
+            span = Span(name, trace_id or new_id(), None, attributes)
+        return _ActiveSpan(self, span)
+
+
+def current_span():
+    """The innermost active span, or the no-op span outside any trace."""
+    return _current_span.get() or NOOP_SPAN
+
+
+def tracer_from_env() -> Tracer:
+    """Build the tracer selected by EDGAR_TRACE_SINK: none, memory or jsonl."""
+    kind = env_str("EDGAR_TRACE_SINK", "none").lower()
+    if kind in ("", "none", "off"):
+        return Tracer(NoopSink())
+    if kind == "memory":
+        return Tracer(RingBufferSink(env_int("EDGAR_TRACE_BUFFER", 1000)))
+    if kind == "jsonl":
+        return Tracer(JsonlSink(env_str("EDGAR_TRACE_PATH")))
+    raise ValueError(f"Unknown trace sink {kind!r}; expected none, memory or jsonl")
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = tracer_from_env()
+    return _tracer
+
+
+def set_tracer(tracer: Tracer):
+    global _tracer
+    _tracer = tracer
+
+
+def span(name, trace_id=None, **attributes):
+    """Start a span on the process-wide tracer."""
+    return get_tracer().span(name, trace_id=trace_id, **attributes)
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from edgar.api.admission import QUEUE_DEPTH, AdmissionController, AdmissionRejected
+
+
+def test_interactive_requests_jump_the_queue_and_shed_batch_work():
+    """Test priority ordering, shedding when full and queue timeouts."""
+
+    async def scenario():
+        controller = AdmissionController(
+            max_concurrency=1, max_queue=2, queue_timeout_seconds=5
+        )
+        order = []
+        await controller.acquire("interactive")
+
+        async def request(priority, name):
+            async with controller.admit(priority):
+                order.append(name)
+
+        first_batch = asyncio.create_task(request("batch", "batch-1"))
+        second_batch = asyncio.create_task(request("batch", "batch-2"))
+        await asyncio.sleep(0)
+        assert QUEUE_DEPTH.value(priority="batch") == 2
+
+        # The queue is full, so the newest batch request makes way
+        interactive = asyncio.create_task(request("interactive", "interactive"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as shed:
+            await second_batch
+        assert shed.value.status_code == 429
+        assert shed.value.retry_after >= 1
+
+        controller.release()
+        await asyncio.gather(first_batch, interactive)
+        assert order == ["interactive", "batch-1"]
+        assert controller.active == 0
+
+        await controller.acquire("interactive")
+        controller.queue_timeout_seconds = 0.01
+        with pytest.raises(AdmissionRejected) as timed_out:
+            await controller.acquire("batch")
+        assert timed_out.value.status_code == 503
+        controller.max_queue = 0
+        with pytest.raises(AdmissionRejected) as full:
+            await controller.acquire("interactive")
+        assert full.value.status_code == 429
+        assert controller.queued == 0
+
+    asyncio.run(scenario())
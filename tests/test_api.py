@@ -0,0 +1,280 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from edgar.agents.sql_executor import SQLExecutorAgent
+from edgar.api import server
+from edgar.api.admission import AdmissionController, StreamLimiter
+from edgar.api.jobs import JobManager
+from edgar.core import EdgarQueryEngine
+from edgar.observability import RingBufferSink, Tracer, tracing
+from edgar.observability.profiling import RequestProfiler
+
+from .test_engine import FakeMarkdownResponder, FakeSQLGenerator
+
+
+@pytest.fixture
+def client(temp_db, monkeypatch):
+    db_path = temp_db.execute("PRAGMA database_list").fetchone()[2]
+    engine = EdgarQueryEngine()
+    engine.sql_generator = FakeSQLGenerator(
+        {0.0: "SELECT * FROM filings WHERE form_type = '10-K' LIMIT 10"}
+    )
+    engine.markdown_responder = FakeMarkdownResponder()
+    # Requests run in a worker thread, so each thread opens its own connection
+    engine.sql_executor = SQLExecutorAgent(
+        connection_factory=lambda: sqlite3.connect(db_path)
+    )
+    monkeypatch.setattr(server, "_engine", engine)
+    return TestClient(server.app)
+
+
+def test_query_debug_flag_returns_stage_breakdown(client):
+    """Test that debug details are only returned when asked for."""
+    plain = client.post("/query", json={"query": "Show 10-K filings"}).json()
+    assert plain["debug"] is None
+
+    debug = client.post(
+        "/query", json={"query": "Show 10-K filings", "debug": True}
+    ).json()["debug"]
+    assert debug["row_count"] == 1
+    assert debug["sql_cache_hit"]
+    assert "sql_execution" in debug["timings_ms"]
+
+
+def test_metrics_endpoint_exports_prometheus_text(client):
+    """Test that stage histograms and counters are exposed on /metrics."""
+    client.post("/query", json={"query": "Show 10-K filings"})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert "# TYPE edgar_stage_seconds histogram" in body
+    assert 'edgar_stage_seconds_bucket{stage="sql_execution",le="+Inf"}' in body
+    assert 'edgar_queries_total{outcome="success",coalesced="false"}' in body
+
+
+def test_query_spans_share_the_request_id(client, monkeypatch):
+    """Test that agent spans nest under the API span of the same request."""
+    sink = RingBufferSink()
+    monkeypatch.setattr(tracing, "_tracer", Tracer(sink))
+
+    response = client.post(
+        "/query",
+        json={"query": "Show 10-K filings"},
+        headers={"X-Request-ID": "req-123"},
+    )
+    assert response.headers["X-Request-ID"] == "req-123"
+
+    spans = {span.name: span for span in sink.spans("req-123")}
+    assert {"api.query", "engine.query", "sql_executor.execute"} <= set(spans)
+    assert spans["api.query"].parent_id is None
+    assert spans["engine.query"].parent_id == spans["api.query"].span_id
+    assert spans["sql_executor.execute"].attributes["row_count"] == 1
+
+
+def test_profile_header_requires_the_token(client, tmp_path):
+    """Test that only callers with the profile token can force a profile."""
+    server._engine.profiler = RequestProfiler(token="secret", output_dir=tmp_path)
+
+    denied = client.post(
+        "/query", json={"query": "Show 10-K filings"}, headers={"X-Edgar-Profile": "x"}
+    )
+    assert denied.status_code == 403
+
+    response = client.post(
+        "/query",
+        json={"query": "Show 10-K filings", "debug": True},
+        headers={"X-Edgar-Profile": "secret", "X-Request-ID": "req-9"},
+    )
+    profile_path = Path(response.json()["debug"]["profile_path"])
+    assert profile_path.parent == tmp_path
+    assert profile_path.name.endswith("-req-9.prof")
+    assert "query" in profile_path.with_suffix(".txt").read_text()
+
+
+def test_concurrent_profiled_requests_profile_one_at_a_time(client, tmp_path):
+    """Test that a request profiled while another profile runs still answers."""
+    profiler = RequestProfiler(token="secret", output_dir=tmp_path)
+    server._engine.profiler = profiler
+    started = threading.Event()
+    release = threading.Event()
+    runs = []
+
+    def hold_profile():
+        with profiler.profile("first") as run:
+            runs.append(run)
+            started.set()
+            release.wait()
+
+    first = threading.Thread(target=hold_profile)
+    first.start()
+    started.wait()
+    try:
+        response = client.post(
+            "/query",
+            json={"query": "Show 10-K filings", "debug": True},
+            headers={"X-Edgar-Profile": "secret"},
+        )
+    finally:
+        release.set()
+        first.join()
+
+    assert response.status_code == 200
+    assert response.json()["debug"]["profile_path"] is None
+    assert runs[0].path.exists()
+
+
+def test_profiler_samples_a_fraction_of_traffic(tmp_path):
+    """Test the sampling switch without a token."""
+    assert not RequestProfiler(enabled=False).should_profile()
+    assert not RequestProfiler(enabled=True, sample_rate=0.0).should_profile()
+    assert RequestProfiler(enabled=True, sample_rate=1.0).should_profile()
+    assert not RequestProfiler(enabled=True, sample_rate=0.0).should_profile("any")
+
+
+def test_batch_dedupes_questions_and_isolates_failures(client):
+    """Test that a batch answers duplicates once and survives a failing item."""
+
+    class ExplodingGenerator(FakeSQLGenerator):
+        def generate_sql_template(self, user_query, temperature=None):
+            if "explode" in user_query:
+                raise RuntimeError("generator exploded")
+            return super().generate_sql_template(user_query, temperature)
+
+    server._engine.sql_generator = ExplodingGenerator(
+        {0.0: "SELECT * FROM filings WHERE form_type = '10-K' LIMIT 10"}
+    )
+    response = client.post(
+        "/query/batch",
+        json={
+            "queries": [
+                "Show 10-K filings",
+                "please explode",
+                "  show 10-k   FILINGS? ",
+            ],
+            "debug": True,
+        },
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    items = {tuple(item["indices"]): item for item in lines}
+    assert set(items) == {(0, 2), (1,)}
+    assert items[(0, 2)]["markdown_response"] == "**Answer:** 1 rows"
+    assert items[(0, 2)]["debug"]["row_count"] == 1
+    assert "generator exploded" in items[(1,)]["error"]
+    # A failed line carries every field of a successful one
+    assert set(items[(1,)]) == set(items[(0, 2)])
+
+
+def test_jobs_run_in_the_background_and_expire(client, monkeypatch, tmp_path):
+    """Test submitting, polling and fetching a job, then TTL cleanup."""
+    jobs = JobManager(server.run_job, server.render_job, job_dir=tmp_path)
+    monkeypatch.setattr(server, "_jobs", jobs)
+
+    submitted = client.post("/jobs", json={"query": "Show 10-K filings"})
+    assert submitted.status_code == 202
+    job_id = submitted.json()["id"]
+
+    deadline = time.time() + 5
+    while (status := client.get(f"/jobs/{job_id}").json())["status"] != "succeeded":
+        assert time.time() < deadline, status
+        time.sleep(0.01)
+    assert status["elapsed_ms"] >= 0
+    assert "sql_execution" in status["timings_ms"]
+
+    result = client.get(f"/jobs/{job_id}/result").json()
+    assert result["markdown_response"] == "**Answer:** 1 rows"
+    assert client.get("/jobs/0000000000000000").status_code == 404
+
+    # Results survive a restart until the TTL passes
+    restarted = JobManager(server.run_job, server.render_job, job_dir=tmp_path)
+    assert restarted.result(job_id)["sql_query"] == result["sql_query"]
+    restarted.ttl_seconds = 0
+    time.sleep(0.01)
+    assert restarted.cleanup(force=True) == 1
+    assert restarted.get(job_id) is None
+    jobs.shutdown()
+
+
+def test_query_is_refused_with_retry_after_when_saturated(client, monkeypatch):
+    """Test that a full admission queue answers 429 without running the query."""
+    admission = AdmissionController(max_concurrency=1, max_queue=0)
+    admission.active = 1
+    monkeypatch.setattr(server, "_admission", admission)
+
+    response = client.post("/query", json={"query": "Show 10-K filings"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert "edgar_admission_rejected_total" in client.get("/metrics").text
+
+
+def test_query_pages_follow_the_cursor_without_the_llm(client):
+    """Test that rows come back a page at a time through opaque cursors."""
+    server._engine.sql_generator = FakeSQLGenerator(
+        {0.0: "SELECT * FROM filings ORDER BY date_filed LIMIT 10"}
+    )
+    first = client.post(
+        "/query", json={"query": "Show all filings", "page_size": 2}
+    ).json()
+    assert first["columns"][:2] == ["cik", "company_name"]
+    assert [row["date_filed"] for row in first["rows"]] == ["2025-01-15", "2025-02-15"]
+
+    server._engine.sql_generator = None
+    second = client.get("/query/page", params={"cursor": first["next_cursor"]}).json()
+    assert [row["date_filed"] for row in second["rows"]] == ["2025-03-15"]
+    assert second["next_cursor"] is None
+    assert client.get("/query/page", params={"cursor": "bogus"}).status_code == 400
+
+
+def test_export_streams_csv_attachment(client):
+    """Test that an export returns the rows as CSV, past the LIMIT on request."""
+    server._engine.sql_generator = FakeSQLGenerator(
+        {0.0: "SELECT cik, form_type FROM filings ORDER BY cik LIMIT 2"}
+    )
+    response = client.post(
+        "/query/export",
+        json={"query": "Export all filings", "format": "csv", "full_result": True},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "edgar-export.csv" in response.headers["content-disposition"]
+    assert response.text.splitlines() == [
+        "cik,form_type",
+        "111111111,8-K",
+        "123456789,10-K",
+        "987654321,10-Q",
+    ]
+    capped = client.post(
+        "/query/export", json={"query": "Export all filings", "format": "csv"}
+    )
+    assert len(capped.text.splitlines()) == 3
+    bad = client.post("/query/export", json={"query": "x", "format": "xlsx"})
+    assert bad.status_code == 400
+
+
+def test_exports_beyond_the_stream_limit_are_refused(client, monkeypatch):
+    """Test that a busy stream slot refuses exports and each stream frees its slot."""
+    streams = StreamLimiter(max_streams=1)
+    monkeypatch.setattr(server, "_streams", streams)
+    request = {"query": "Export all filings", "format": "csv"}
+
+    held = streams.acquire()
+    refused = client.post("/query/export", json=request)
+    assert refused.status_code == 429
+    assert int(refused.headers["retry-after"]) >= 1
+    streams.release(held)
+
+    assert client.post("/query/export", json=request).status_code == 200
+    assert client.post("/query/export", json=request).status_code == 200
+    bad = client.post("/query/export", json={"query": "x", "format": "xlsx"})
+    assert bad.status_code == 400
+    assert streams.active == 0
@@ -0,0 +1,34 @@
+import copy
+
+from edgar.agents.load_report import peak_rss_bytes
+from edgar.bench import BenchmarkSuite, compare
+
+
+def test_suite_measures_every_layer_and_flags_regressions(temp_data_dir):
+    """Test a tiny benchmark run and the baseline comparison."""
+    suite = BenchmarkSuite(
+        work_dir=temp_data_dir, sizes=(2_000,), query_repeats=2, api_requests=8
+    )
+    results = suite.run()
+    metrics = results["metrics"]
+
+    assert metrics["load/2000/total"]["unit"] == "s"
+    assert "query/2000/cik_lookup/p95" in metrics
+    assert metrics["api/2000/throughput"]["higher_is_better"]
+    assert metrics["api/2000/p99"]["value"] > 0
+    assert compare(results, results) == []
+
+    baseline = copy.deepcopy(results)
+    baseline["metrics"]["api/2000/throughput"]["value"] *= 10
+    regressed = {regression.metric for regression in compare(results, baseline)}
+    assert "api/2000/throughput" in regressed
+
+
+def test_each_build_reports_its_own_peak_rss(temp_data_dir):
+    """Test that a build is not charged the peak this process reached before it."""
+    earlier_peak = b"x" * (300 * 1024 * 1024)
+    del earlier_peak
+    suite = BenchmarkSuite(work_dir=temp_data_dir, sizes=())
+    suite.build(2_000)
+
+    assert suite.metrics["load/2000/peak_rss"]["value"] < peak_rss_bytes()
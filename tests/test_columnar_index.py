@@ -0,0 +1,99 @@
+import sqlite3
+
+import pytest
+
+from edgar.agents import columnar_index
+from edgar.agents.columnar_index import ColumnarMasterIndex, parse_scan_query
+from edgar.agents.sql_executor import SQLExecutorAgent
+
+ROWS = [
+    (1000 + i % 7, name, form, f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}", f"f{i}.txt")
+    for i, (name, form) in enumerate(
+        [("Apple Inc", "10-K"), ("Liberty Media", "8-K"), ("liberty bank", "10-Q")] * 40
+    )
+]
+
+
+@pytest.fixture
+def master_db(tmp_path):
+    conn = sqlite3.connect(tmp_path / "edgar.db", check_same_thread=False)
+    conn.execute(
+        "CREATE TABLE master_index (cik INTEGER, company_name TEXT, "
+        "form_type TEXT, date_filed TEXT, filename TEXT)"
+    )
+    conn.executemany("INSERT INTO master_index VALUES (?, ?, ?, ?, ?)", ROWS)
+    conn.execute("INSERT INTO master_index VALUES (NULL, NULL, NULL, NULL, 'x')")
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def test_columnar_scans_match_sqlite(master_db, monkeypatch):
+    """Filters, ordering and limits give SQLite's rows."""
+    monkeypatch.setattr(columnar_index, "SCAN_BLOCK_ROWS", 16)
+    index = ColumnarMasterIndex.load(master_db, chunk_rows=50)
+    assert len(index) == len(ROWS) + 1
+
+    for sql, params in [
+        (
+            "SELECT * FROM master_index WHERE company_name LIKE ? "
+            "ORDER BY date_filed DESC",
+            ("%LIBERTY%",),
+        ),
+        (
+            "SELECT cik, filename FROM master_index WHERE form_type IN ('10-K', '8-K') "
+            "AND date_filed BETWEEN '2024-03-01' AND '2024-06-30' ORDER BY cik",
+            (),
+        ),
+        ("SELECT cik, filename FROM master_index WHERE company_name LIKE 'apple%'", ()),
+    ]:
+        expected = master_db.execute(sql, params).fetchall()
+        df = index.execute(sql, params)
+        assert df is not None, sql
+        # Rows that tie on the sort key may come back in either order
+        assert sorted(map(tuple, df.itertuples(index=False))) == sorted(expected)
+        if "ORDER BY" in sql:
+            key = sql.split("ORDER BY ")[1].split()[0]
+            assert df[key].tolist() == [
+                row[df.columns.get_loc(key)] for row in expected
+            ]
+
+    # An unordered LIMIT stops at the first matches, as SQLite's scan does
+    df = index.execute(
+        "SELECT filename FROM master_index WHERE date_filed >= '2024-06-01' LIMIT 5"
+    )
+    assert df["filename"].tolist() == [
+        row[0]
+        for row in master_db.execute(
+            "SELECT filename FROM master_index WHERE date_filed >= '2024-06-01' LIMIT 5"
+        )
+    ]
+
+
+def test_unsupported_and_indexed_statements_fall_back(master_db):
+    """Statements outside the scan shape, and cik lookups, return None."""
+    index = ColumnarMasterIndex.load(master_db)
+    for sql in (
+        "SELECT COUNT(*) FROM master_index",
+        "SELECT * FROM master_index WHERE company_name LIKE 'a_c%'",
+        "SELECT * FROM master_index WHERE cik = 3 OR cik = 4",
+        "SELECT * FROM master_index WHERE cik = 1001 ORDER BY date_filed",
+    ):
+        assert index.execute(sql) is None, sql
+    assert parse_scan_query("SELECT * FROM submissions") is None
+
+
+def test_executor_answers_scans_from_the_columnar_index(master_db):
+    """The executor reports the columnar backend for statements it answered."""
+    executor = SQLExecutorAgent(master_db, columnar=ColumnarMasterIndex.load(master_db))
+
+    execution = executor.execute(
+        "SELECT filename FROM master_index WHERE company_name LIKE '%media%'"
+    )
+    assert execution.error is None
+    assert execution.backend == "columnar"
+    assert len(execution.df) == 40
+
+    execution = executor.execute("SELECT COUNT(*) AS n FROM master_index")
+    assert execution.backend == "sqlite"
+    assert int(execution.df.iloc[0]["n"]) == len(ROWS) + 1
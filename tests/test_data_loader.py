@@ -0,0 +1,139 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from edgar.agents import DataLoaderAgent, load_report
+from edgar.agents.load_report import REPORT_TABLE, LoadReport, peak_rss_bytes
+from edgar.agents.parquet_mirror import filing_quarter, form_key
+
+MASTER_HEADER = "\n".join(["Description: Master Index of EDGAR Dissemination Feed"] * 9)
+
+
+def write_sample_files(folder):
+    (folder / "master.idx").write_text(
+        MASTER_HEADER
+        + "\nCIK|Company Name|Form Type|Date Filed|Filename\n"
+        + "0000001750|AAR CORP|10-K|2025-07-17|edgar/data/1750/a.txt\n"
+        + "0000001800|ABBOTT LABORATORIES|8-K|2025-07-18|edgar/data/1800/b.txt\n",
+        encoding="latin-1",
+    )
+    (folder / "sub.txt").write_text(
+        "adsh\tcik\tname\tform\tperiod\tfy\tfp\tfiled\n"
+        "0000001750-25-000001\t1750\tAAR CORP\t10-K\t20250531\t2025\tFY\t20250717\n"
+    )
+    (folder / "pre.txt").write_text(
+        "adsh\treport\tline\tstmt\ttag\n"
+        "0000001750-25-000001\t2\t1\tBS\tAssets\n"
+        "0000001750-25-000001\t2\t2\tBS\tLiabilities\n"
+    )
+
+
+def test_build_records_a_load_report(temp_data_dir):
+    """Test that a build times each stage and persists the report."""
+    write_sample_files(temp_data_dir)
+    loader = DataLoaderAgent(
+        db_path=temp_data_dir / "edgar.db", data_folder=temp_data_dir
+    )
+    conn = loader.init_db()
+
+    stages = {(s.target, s.stage): s for s in loader.load_report.stages}
+    assert stages[("master.idx", "parse")].rows == 2
+    assert stages[("master.idx", "parse")].bytes_read > 0
+    assert stages[("submissions", "insert")].rows == 1
+    assert ("idx_presentation_tag", "index") in stages
+    assert conn.execute("SELECT COUNT(*) FROM master_index").fetchone()[0] == 2
+
+    saved = LoadReport.latest(conn)
+    assert saved.build_id == loader.load_report.build_id
+    assert len(saved.stages) == len(loader.load_report.stages)
+    assert "master.idx" in saved.summary()
+    assert conn.execute(f"SELECT COUNT(*) FROM {REPORT_TABLE}").fetchone()[0] == len(
+        saved.stages
+    )
+    conn.close()
+
+
+def test_build_report_labels_rss_as_the_process_peak_so_far():
+    """Test that RSS is named a running process peak, also in older report tables."""
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        f"CREATE TABLE {REPORT_TABLE} (build_id TEXT NOT NULL, target TEXT NOT NULL, "
+        "stage TEXT NOT NULL, seconds REAL NOT NULL, rows INTEGER, "
+        "rows_per_second REAL, bytes_read INTEGER, peak_memory_bytes INTEGER, "
+        "peak_rss_bytes INTEGER)"
+    )
+    report = LoadReport(trace_memory=False)
+    with report.measure("master.idx", "parse"):
+        pass
+
+    report.save(conn)
+    saved = LoadReport.latest(conn)
+    recorded = report.stages[0].process_peak_rss_bytes
+    assert recorded > 0
+    assert saved.stages[0].process_peak_rss_bytes == recorded
+    assert "process peak rss so far" in saved.summary()
+    conn.close()
+
+
+def test_partition_keys_for_the_parquet_mirror():
+    """Quarters come from either date format and form keys are path-safe."""
+    dates = pd.Series(["2025-07-17", "20250215", None, "n/a"], dtype=object)
+    assert filing_quarter(dates).tolist() == ["2025Q3", "2025Q1", "unknown", "unknown"]
+    forms = pd.Series(["10-K/A", " 8-K", None], dtype=object)
+    assert form_key(forms).tolist() == ["10-K_A", "8-K", "unknown"]
+
+
+def test_build_writes_a_partitioned_parquet_mirror(temp_data_dir):
+    """Test that each table is mirrored by quarter and form with a manifest."""
+    pytest.importorskip("pyarrow")
+    write_sample_files(temp_data_dir)
+    loader = DataLoaderAgent(
+        db_path=temp_data_dir / "edgar.db",
+        data_folder=temp_data_dir,
+        parquet_dir=temp_data_dir / "parquet",
+    )
+    loader.init_db().close()
+
+    manifest = loader.parquet_mirror.manifest()
+    master = manifest["tables"]["master_index"]
+    assert master["rows"] == 2
+    assert master["columns"]["date_filed"]["max"] == "2025-07-18"
+    assert {tuple(file["partition"].values()) for file in master["files"]} == {
+        ("2025Q3", "10-K"),
+        ("2025Q3", "8-K"),
+    }
+    pre = manifest["tables"]["presentation_of_statement"]
+    assert pre["files"][0]["partition"] == {"quarter": "2025Q3", "form_key": "10-K"}
+    assert all(
+        (temp_data_dir / "parquet" / file["path"]).exists() for file in pre["files"]
+    )
+
+
+def test_load_report_memory_without_reset_peak(monkeypatch):
+    """Test tracing stage memory where tracemalloc.reset_peak is missing (3.8)."""
+    monkeypatch.delattr(load_report.tracemalloc, "reset_peak", raising=False)
+    report = LoadReport(trace_memory=True)
+    with report.measure("outer", "parse"):
+        with report.measure("inner", "parse"):
+            data = [str(i) for i in range(10_000)]
+    assert data
+    assert all(stage.peak_memory_bytes > 0 for stage in report.stages)
+
+
+def test_peak_rss_units_follow_the_platform(monkeypatch):
+    """Test that ru_maxrss is read as bytes on macOS and kilobytes elsewhere."""
+
+    class FakeResource:
+        RUSAGE_SELF = 0
+
+        @staticmethod
+        def getrusage(who):
+            return type("Usage", (), {"ru_maxrss": 2048})()
+
+    monkeypatch.setattr(load_report, "_linux_peak_rss", lambda: None)
+    monkeypatch.setattr(load_report, "resource", FakeResource)
+    monkeypatch.setattr(load_report.sys, "platform", "darwin")
+    assert peak_rss_bytes() == 2048
+    monkeypatch.setattr(load_report.sys, "platform", "linux")
+    assert peak_rss_bytes() == 2048 * 1024
@@ -0,0 +1,155 @@
+import pandas as pd
+import pytest
+
+from edgar.agents.duckdb_backend import (
+    BackendRouter,
+    DialectError,
+    DuckDBBackend,
+    translate_sql,
+)
+from edgar.agents.query_guard import GuardDecision
+from edgar.agents.sql_executor import SQLExecutorAgent
+
+
+class RecordingBackend:
+    """Analytical backend that answers from a fixed frame and records its SQL."""
+
+    name = "duckdb"
+
+    def __init__(self, tables, fail=False):
+        self.tables = set(tables)
+        self.fail = fail
+        self.statements = []
+
+    def read(self, sql_query, params=(), timeout_seconds=None):
+        self.statements.append(sql_query)
+        if self.fail:
+            raise RuntimeError("Catalog Error")
+        return pd.DataFrame({"form_type": ["10-K"], "filings": [1]})
+
+
+def test_translate_sql_rewrites_sqlite_dialect():
+    """SQLite-only syntax is rewritten and untranslatable SQL is refused."""
+    sql = translate_sql(
+        "SELECT strftime('%Y', date_filed) AS year, COUNT(*) FROM [master_index] "
+        "WHERE company_name LIKE '%apple%' AND cik IS ? GROUP BY year"
+    )
+    assert "strftime(CAST(date_filed AS TIMESTAMP), '%Y')" in sql
+    assert "ILIKE '%apple%'" in sql
+    assert '"master_index"' in sql
+    assert "cik IS NOT DISTINCT FROM ?" in sql
+    assert "IS NULL" in translate_sql("SELECT * FROM t WHERE x IS NULL")
+    assert "MAX(cik)" in translate_sql("SELECT MAX(cik) FROM master_index")
+
+    for unsupported in (
+        "SELECT rowid FROM master_index",
+        "SELECT julianday(date_filed) FROM master_index",
+        "SELECT strftime('%Y', date_filed, 'start of month') FROM master_index",
+        "SELECT MAX(cik, 10) FROM master_index",
+        "SELECT * FROM master_index WHERE min(cik, (1 + 2)) > 0",
+    ):
+        with pytest.raises(DialectError):
+            translate_sql(unsupported)
+
+
+def test_router_sends_aggregates_over_large_tables_to_duckdb():
+    """Aggregates and large scans are routed; lookups and rowid stay on SQLite."""
+    router = BackendRouter(RecordingBackend({"master_index"}), mode="auto")
+
+    aggregate = GuardDecision(
+        "SELECT form_type, COUNT(*) FROM master_index GROUP BY form_type"
+    )
+    assert router.route(aggregate, ["master_index"]).backend == "duckdb"
+
+    lookup = GuardDecision("SELECT * FROM master_index WHERE cik = ? LIMIT 10")
+    assert router.route(lookup, ["master_index"]).backend == "sqlite"
+
+    scan = GuardDecision(
+        "SELECT * FROM master_index WHERE company_name LIKE ? LIMIT 10",
+        notes=["Full scan of large table master_index"],
+    )
+    assert router.route(scan, ["master_index"]).backend == "duckdb"
+
+    rowid = GuardDecision("SELECT rowid, COUNT(*) FROM master_index GROUP BY rowid")
+    route = router.route(rowid, ["master_index"])
+    assert route.backend == "sqlite"
+    assert "rowid" in route.reason
+
+    missing = GuardDecision("SELECT COUNT(*) FROM submissions")
+    assert router.route(missing, ["submissions"]).backend == "sqlite"
+
+
+def test_executor_runs_routed_sql_on_backend_and_falls_back(temp_db):
+    """Routed statements run on the backend; a backend failure reruns on SQLite."""
+    backend = RecordingBackend({"filings"})
+    executor = SQLExecutorAgent(temp_db, router=BackendRouter(backend, mode="always"))
+
+    execution = executor.execute(
+        "SELECT form_type, COUNT(*) AS filings FROM filings GROUP BY form_type"
+    )
+    assert execution.error is None
+    assert execution.backend == "duckdb"
+    assert backend.statements
+
+    backend.fail = True
+    execution = executor.execute("SELECT COUNT(*) AS filings FROM filings")
+    assert execution.error is None
+    assert execution.backend == "sqlite"
+    assert int(execution.df.iloc[0]["filings"]) == 3
+
+
+def test_duckdb_backend_matches_sqlite(tmp_path):
+    """DuckDB over the attached database gives SQLite's answers."""
+    pytest.importorskip("duckdb")
+    import sqlite3
+
+    db_path = tmp_path / "edgar.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE master_index (cik INTEGER, form_type TEXT)")
+    conn.executemany(
+        "INSERT INTO master_index VALUES (?, ?)",
+        [(1, "10-K"), (2, "10-k"), (3, "8-K"), (7, "10-K")],
+    )
+    conn.commit()
+    sql = (
+        "SELECT COUNT(*) AS filings, SUM(cik) / 2 AS half FROM master_index "
+        "WHERE form_type LIKE '10-k'"
+    )
+    expected = conn.execute(sql).fetchone()
+    conn.close()
+
+    backend = DuckDBBackend(db_path=db_path)
+    try:
+        df = backend.read(translate_sql(sql))
+    finally:
+        backend.close()
+    assert (int(df.iloc[0]["filings"]), int(df.iloc[0]["half"])) == expected
+
+
+def test_duckdb_orders_nulls_like_sqlite(tmp_path):
+    """NULLs sort first ascending and last descending on both backends."""
+    pytest.importorskip("duckdb")
+    import sqlite3
+
+    db_path = tmp_path / "edgar.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE master_index (cik INTEGER, date_filed TEXT)")
+    conn.executemany(
+        "INSERT INTO master_index VALUES (?, ?)",
+        [(1, "2024-03-01"), (2, None), (3, "2024-01-01"), (4, None), (5, "2024-02-01")],
+    )
+    conn.commit()
+    statements = [
+        "SELECT cik FROM master_index ORDER BY date_filed, cik LIMIT 3",
+        "SELECT cik FROM master_index ORDER BY date_filed DESC, cik LIMIT 4",
+    ]
+    expected = [conn.execute(sql).fetchall() for sql in statements]
+    conn.close()
+
+    backend = DuckDBBackend(db_path=db_path)
+    try:
+        for sql, rows in zip(statements, expected):
+            df = backend.read(translate_sql(sql))
+            assert [(int(cik),) for cik in df["cik"]] == rows
+    finally:
+        backend.close()
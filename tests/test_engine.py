@@ -0,0 +1,139 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from edgar.agents.sql_executor import SQLExecutorAgent
+from edgar.agents.sql_templates import parameterize_sql
+from edgar.core import EdgarQueryEngine
+
+
+class FakeSQLGenerator:
+    """Returns canned SQL per temperature so candidate handling can be tested."""
+
+    def __init__(self, candidates, repaired=None):
+        self.candidates = candidates
+        self.repaired = repaired
+        self.repair_errors = []
+
+    def generate_sql_template(self, user_query, temperature=None):
+        sql_query = self.candidates.get(temperature or 0.0)
+        return (parameterize_sql(sql_query) if sql_query else None), "prompt"
+
+    def repair_sql_template(self, user_query, failed_sql, error):
+        self.repair_errors.append(error)
+        return (parameterize_sql(self.repaired) if self.repaired else None), "repair"
+
+
+class SlowSQLGenerator(FakeSQLGenerator):
+    def __init__(self, sql_query):
+        super().__init__({0.0: sql_query})
+        self.calls = 0
+
+    def generate_sql_template(self, user_query, temperature=None):
+        self.calls += 1
+        time.sleep(0.2)
+        return super().generate_sql_template(user_query, temperature)
+
+
+class FakeMarkdownResponder:
+    def generate_markdown_response(self, user_query, sql_query, df):
+        return f"**Answer:** {len(df)} rows", "response prompt"
+
+
+@pytest.fixture
+def make_engine(temp_db):
+    def make(generator, **kwargs):
+        engine = EdgarQueryEngine(**kwargs)
+        engine.sql_generator = generator
+        engine.markdown_responder = FakeMarkdownResponder()
+        engine.sql_executor = SQLExecutorAgent(temp_db)
+        return engine
+
+    return make
+
+
+def test_parallel_mode_picks_a_valid_candidate(make_engine):
+    """Test that invalid candidates are skipped without being executed."""
+    generator = FakeSQLGenerator(
+        {
+            0.0: "SELECT missing_column FROM filings LIMIT 10",
+            0.4: "SELECT * FROM filings WHERE form_type = '8-K' LIMIT 10",
+        }
+    )
+    engine = make_engine(generator, generation_mode="parallel", candidate_count=2)
+
+    result = engine.query("Which 8-K filings were made?")
+    assert result["success"]
+    assert result["generation_mode"] == "parallel"
+    assert result["data"]["company_name"].tolist() == ["Third Company"]
+    assert generator.repair_errors == []
+
+
+def test_parallel_mode_repairs_once_with_the_error(make_engine):
+    """Test that the validation error is fed back into one repair attempt."""
+    generator = FakeSQLGenerator(
+        {0.0: "SELECT missing_column FROM filings LIMIT 10"},
+        repaired="SELECT COUNT(*) AS count FROM filings",
+    )
+    engine = make_engine(generator, generation_mode="parallel", candidate_count=1)
+
+    result = engine.query("How many filings are there?")
+    assert result["success"]
+    assert "missing_column" in generator.repair_errors[0]
+    assert engine.generation_stats()["parallel"]["requests"] >= 1
+
+
+def test_template_cache_skips_generation(make_engine):
+    """Test that a repeated question shape reuses the learned SQL."""
+    generator = FakeSQLGenerator(
+        {0.0: "SELECT * FROM filings WHERE form_type = '10-K' LIMIT 10"}
+    )
+    engine = make_engine(generator)
+
+    assert engine.query("Show 10-K filings")["generation_mode"] == "single"
+    generator.candidates = {}
+    result = engine.query("Show 10-Q filings")
+    assert result["sql_cache_hit"]
+    assert result["data"]["company_name"].tolist() == ["Another Corp"]
+
+
+def test_identical_concurrent_questions_are_coalesced(temp_db):
+    """Test that concurrent identical questions trigger one generation."""
+    db_path = temp_db.execute("PRAGMA database_list").fetchone()[2]
+    generator = SlowSQLGenerator("SELECT * FROM filings LIMIT 10")
+    engine = EdgarQueryEngine()
+    engine.sql_generator = generator
+    engine.markdown_responder = FakeMarkdownResponder()
+    engine.sql_executor = SQLExecutorAgent(
+        connection_factory=lambda: sqlite3.connect(db_path)
+    )
+
+    results = []
+    questions = ["List all filings", "list all  filings?", "List all filings."]
+    threads = [
+        threading.Thread(target=lambda q=q: results.append(engine.query(q)))
+        for q in questions
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert generator.calls == 1
+    assert all(result["success"] for result in results)
+    assert sorted(result["coalesced"] for result in results) == [False, True, True]
+
+
+def test_results_carry_stage_timings(make_engine):
+    """Test that each answered question reports its stage breakdown."""
+    generator = FakeSQLGenerator({0.0: "SELECT * FROM filings LIMIT 10"})
+    engine = make_engine(generator)
+
+    result = engine.query("List the filings")
+    assert {"sql_generation", "sql_execution", "answer_generation"} <= set(
+        result["timings_ms"]
+    )
+    assert result["row_count"] == 3
+    assert result["prompt_tokens"]["answer"] > 0
@@ -0,0 +1,46 @@
+from edgar.agents.index_advisor import IndexAdvisorAgent
+from edgar.agents.slow_query_log import SlowQueryLog
+from edgar.agents.sql_executor import SQLExecutorAgent
+
+
+def test_executor_logs_slow_queries_with_question(temp_db, temp_data_dir):
+    """Test that queries over the threshold are logged with their plan and question."""
+    log = SlowQueryLog(temp_data_dir / "slow.db")
+    executor = SQLExecutorAgent(temp_db, slow_query_log=log, slow_query_ms=0)
+
+    executor.execute(
+        "SELECT * FROM filings WHERE form_type = '10-K' LIMIT 10",
+        question="Which 10-K filings were made?",
+    )
+
+    entries = log.entries()
+    assert len(entries) == 1
+    assert entries[0].question == "Which 10-K filings were made?"
+    assert entries[0].row_count == 1
+    assert entries[0].query_plan == ["SCAN filings"]
+    log.close()
+
+
+def test_advisor_recommends_and_applies_index(temp_db, temp_data_dir):
+    """Test that repeated full scans produce an index proposal that can be applied."""
+    log = SlowQueryLog(temp_data_dir / "slow.db")
+    executor = SQLExecutorAgent(temp_db, slow_query_log=log, slow_query_ms=0)
+    for form_type in ("10-K", "10-Q"):
+        executor.execute(
+            f"SELECT * FROM filings WHERE form_type = '{form_type}' "
+            "ORDER BY date_filed LIMIT 10"
+        )
+    executor.execute("SELECT * FROM filings WHERE cik = 123456789 LIMIT 10")
+
+    # The advisor runs on the writable loader connection, not the executor's
+    temp_db.set_authorizer(None)
+    advisor = IndexAdvisorAgent(temp_db, log)
+    recommendations = advisor.recommend(top=5)
+    assert recommendations[0].columns == ("form_type", "date_filed")
+    assert recommendations[0].occurrences == 2
+
+    advisor.apply(recommendations[0])
+    assert recommendations[0].before_ms is not None
+    assert recommendations[0].after_ms is not None
+    assert advisor.recommend(top=5)[0].columns == ("cik",)
+    log.close()
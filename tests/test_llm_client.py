@@ -0,0 +1,111 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from edgar.agents.llm_client import CircuitOpenError, LLMClient, LLMUnavailableError
+from edgar.agents.markdown_responder import MarkdownResponderAgent
+
+
+def make_stub_server(statuses):
+    """Serve chat completions, answering with the given HTTP statuses in order."""
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers["Content-Length"])
+            requests.append(json.loads(self.rfile.read(length)))
+            status = statuses.pop(0) if statuses else 200
+            body = {"error": {"message": "stub failure"}}
+            if status == 200:
+                body = {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion",
+                    "created": 0,
+                    "model": "stub",
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": "SELECT 1"},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                }
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            if status == 429:
+                self.send_header("Retry-After", "0")
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, requests
+
+
+@pytest.fixture
+def stub_server():
+    servers = []
+
+    def start(statuses):
+        server, requests = make_stub_server(statuses)
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}/v1", requests
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def make_client(base_url, **kwargs):
+    options = {
+        "api_key": "test",
+        "base_url": base_url,
+        "max_retries": 2,
+        "requests_per_second": 100,
+        "timeout_seconds": 5,
+        "breaker_failures": 1,
+        "breaker_reset_seconds": 60,
+    }
+    options.update(kwargs)
+    return LLMClient(**options)
+
+
+def chat(client):
+    return client.chat(messages=[{"role": "user", "content": "hi"}], max_tokens=5)
+
+
+def test_client_retries_rate_limits_then_succeeds(stub_server):
+    """Test that 429 and 5xx responses are retried with backoff."""
+    base_url, requests = stub_server([429, 503])
+    client = make_client(base_url)
+
+    response = chat(client)
+    assert response.choices[0].message.content == "SELECT 1"
+    assert len(requests) == 3
+    assert client.breaker.state == "closed"
+
+
+def test_breaker_opens_and_responder_degrades_locally(stub_server):
+    """Test that exhausted retries open the breaker and answers render locally."""
+    base_url, requests = stub_server([500, 500, 500])
+    client = make_client(base_url)
+
+    with pytest.raises(LLMUnavailableError):
+        chat(client)
+    with pytest.raises(CircuitOpenError):
+        chat(client)
+    assert len(requests) == 3
+
+    responder = MarkdownResponderAgent(llm_client=client)
+    df = pd.DataFrame({"company_name": ["Test Company Inc"], "form_type": ["10-K"]})
+    markdown, _ = responder.generate_markdown_response("Any 10-K?", "SELECT 1", df)
+    assert "returned 1 rows" in markdown
+    assert "Test Company Inc" in markdown
@@ -0,0 +1,138 @@
+import sqlite3
+
+import pytest
+
+from edgar.agents.pagination import (
+    InvalidCursor,
+    Paginator,
+    parse_keyset_query,
+)
+from edgar.agents.sql_executor import SQLExecutorAgent
+
+
+@pytest.fixture
+def executor():
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        "CREATE TABLE master_index (cik INTEGER, company_name TEXT, date_filed TEXT)"
+    )
+    conn.executemany(
+        "INSERT INTO master_index VALUES (?, ?, ?)",
+        [
+            (i % 7, f"Company {i}", None if i % 5 == 0 else f"2024-01-{i % 9 + 1:02d}")
+            for i in range(53)
+        ],
+    )
+    return SQLExecutorAgent(conn)
+
+
+def walk(paginator, executor, sql, params=(), page_size=8, full_result=False):
+    page = paginator.first_page(executor, sql, params, page_size, full_result)
+    rows = list(page.rows)
+    while page.next_cursor:
+        page = paginator.next_page(executor, page.next_cursor)
+        assert page.error is None
+        rows.extend(page.rows)
+    return rows
+
+
+@pytest.mark.parametrize(
+    "order",
+    [
+        "",
+        "ORDER BY date_filed",
+        "ORDER BY date_filed DESC",
+        "ORDER BY cik DESC, date_filed",
+        "ORDER BY cik, date_filed DESC",
+    ],
+)
+def test_pages_cover_the_full_ordered_result(executor, order):
+    """Test that walking the cursors returns every row once, in query order."""
+    sql = f"SELECT * FROM master_index m WHERE cik <> ? {order} LIMIT 10"
+    expected = executor.conn.execute(
+        f"SELECT * FROM master_index m WHERE cik <> 3 {order or ''}"
+        f"{',' if order else ' ORDER BY'} m.rowid"
+        f"{' DESC' if order.endswith('DESC') else ''}"
+    ).fetchall()
+
+    rows = walk(Paginator(secret="test"), executor, sql, (3,), full_result=True)
+    assert [tuple(row.values()) for row in rows] == expected
+
+
+def test_limit_caps_the_pages_unless_the_full_result_is_asked_for(executor):
+    """Test that the query's LIMIT bounds the pages unless full_result lifts it."""
+    sql = "SELECT * FROM master_index LIMIT 10"
+    assert len(walk(Paginator(), executor, sql, (), 4)) == 10
+    assert len(walk(Paginator(), executor, sql, (), 4, full_result=True)) == 53
+    assert (
+        len(walk(Paginator(), executor, "SELECT * FROM master_index LIMIT ?", (20,)))
+        == 20
+    )
+
+
+@pytest.mark.parametrize(
+    "order",
+    ["ORDER BY 2", "ORDER BY name", "ORDER BY cik + 0", "ORDER BY other.cik"],
+)
+def test_order_by_terms_that_are_not_columns_are_not_paged(executor, order):
+    """Test that positions, aliases and expressions in ORDER BY are not paged."""
+    sql = f"SELECT cik, company_name AS name FROM master_index {order}"
+    assert Paginator().first_page(executor, sql, (), 7) is None
+
+
+def test_pages_by_a_named_column_lose_no_rows(executor):
+    """Test that every row comes back once when paging by a text column."""
+    sql = "SELECT cik, company_name FROM master_index ORDER BY company_name DESC"
+    rows = walk(Paginator(), executor, sql, (), page_size=7)
+    assert [row["company_name"] for row in rows] == sorted(
+        (f"Company {i}" for i in range(53)), reverse=True
+    )
+
+
+def test_deep_descending_pages_seek_the_index():
+    """Test that a page deep into a DESC order with NULL keys uses index seeks."""
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE master_index (cik INTEGER, date_filed TEXT)")
+    conn.executemany(
+        "INSERT INTO master_index VALUES (?, ?)",
+        [(i, None if i % 10 == 0 else f"2024-{i % 12 + 1:02d}") for i in range(2000)],
+    )
+    conn.execute("CREATE INDEX idx_date_filed ON master_index (date_filed)")
+    executor = SQLExecutorAgent(conn)
+    sql = "SELECT * FROM master_index ORDER BY date_filed DESC"
+
+    paginator = Paginator()
+    page = paginator.first_page(executor, sql, (), 50)
+    for _ in range(30):
+        page = paginator.next_page(executor, page.next_cursor)
+    query, after, size = paginator.decode(page.next_cursor)
+    page_sql, params = query.page_sql(after, size)
+    plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {page_sql}", params)]
+    assert any(step.startswith("SEARCH master_index") for step in plan)
+    assert not any(step.startswith("SCAN master_index") for step in plan)
+
+    rows = walk(paginator, executor, sql, (), page_size=50)
+    expected = conn.execute(
+        "SELECT * FROM master_index ORDER BY date_filed DESC, rowid DESC"
+    ).fetchall()
+    assert [tuple(row.values()) for row in rows] == expected
+
+
+def test_unpageable_queries_and_tampered_cursors(executor):
+    """Test that joins and aggregates are not paged and cursors are signed."""
+    assert (
+        parse_keyset_query("SELECT cik, COUNT(*) FROM master_index GROUP BY cik")
+        is None
+    )
+    assert (
+        parse_keyset_query("SELECT * FROM master_index a JOIN master_index b") is None
+    )
+    assert parse_keyset_query("SELECT DISTINCT cik FROM master_index") is None
+    assert parse_keyset_query("SELECT * FROM master_index LIMIT 5 OFFSET 5") is None
+
+    paginator = Paginator(secret="one")
+    page = paginator.first_page(executor, "SELECT * FROM master_index", (), 5)
+    with pytest.raises(InvalidCursor):
+        Paginator(secret="two").next_page(executor, page.next_cursor)
+    with pytest.raises(InvalidCursor):
+        paginator.next_page(executor, "not-a-cursor")
@@ -0,0 +1,47 @@
+from edgar.agents.query_guard import QueryCostGuard, has_top_level_limit
+from edgar.agents.sql_executor import SQLExecutorAgent
+
+
+def test_guard_injects_limit_when_missing(temp_db):
+    """Test that a query without LIMIT is wrapped with the row cap."""
+    guard = QueryCostGuard(temp_db, row_limit=2)
+
+    decision = guard.review("SELECT * FROM filings;")
+    assert not decision.rejected
+    assert decision.sql_query == "SELECT * FROM (SELECT * FROM filings) LIMIT 2"
+    assert decision.query_plan == ["SCAN filings"]
+
+
+def test_guard_keeps_existing_limit():
+    """Test that only a top-level LIMIT counts as a limit."""
+    assert has_top_level_limit("SELECT * FROM filings LIMIT 10")
+    assert not has_top_level_limit(
+        "SELECT * FROM filings WHERE cik IN (SELECT cik FROM filings LIMIT 1)"
+    )
+    assert not has_top_level_limit("SELECT * FROM filings WHERE company_name = 'LIMIT'")
+
+
+def test_guard_rejects_nested_scans_of_large_tables(temp_db):
+    """Test that a cartesian scan of large tables is rejected with a reason."""
+    guard = QueryCostGuard(temp_db, large_table_rows=2)
+
+    decision = guard.review("SELECT * FROM filings a, filings b LIMIT 10")
+    assert decision.rejected
+    assert "filings" in decision.rejected_reason
+
+
+def test_executor_reports_plan_and_rejection(temp_db):
+    """Test that the executor surfaces the guard decision."""
+    executor = SQLExecutorAgent(
+        temp_db, cost_guard=QueryCostGuard(temp_db, large_table_rows=2)
+    )
+
+    result = executor.execute("SELECT * FROM filings a JOIN filings b LIMIT 5")
+    assert result.df is None
+    assert "cost guard" in result.error
+    assert result.query_plan
+
+    result = executor.execute("SELECT * FROM filings WHERE form_type = '10-K'")
+    assert result.error is None
+    assert len(result.df) == 1
+    assert "Injected LIMIT" in " ".join(result.guard_notes)
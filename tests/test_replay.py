@@ -0,0 +1,101 @@
+import sqlite3
+import time
+
+import pytest
+
+from edgar.agents import SQLExecutorAgent
+from edgar.agents.query_log import QueryLog, QueryLogEntry
+from edgar.agents.read_only import is_authorization_error
+from edgar.bench import ReplayRunner, format_report
+from edgar.bench.replay import read_only_factory
+
+
+def make_db(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE master_index (cik INTEGER, company_name TEXT, form_type TEXT)"
+    )
+    conn.executemany("INSERT INTO master_index VALUES (?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def test_replay_reports_row_changes_on_candidate(tmp_path):
+    """Test replaying logged SQL against a current and a candidate build."""
+    rows = [(1, "Alpha Inc", "10-K"), (2, "Beta Corp", "8-K")]
+    make_db(tmp_path / "current.db", rows)
+    make_db(tmp_path / "candidate.db", rows + [(3, "Gamma LLC", "10-K")])
+
+    log = QueryLog(tmp_path / "query_log.db")
+    sql = "SELECT * FROM master_index WHERE form_type = ?"
+    for _ in range(3):
+        log.record(
+            QueryLogEntry("Show 10-K filings", True, sql_template=sql, params=("10-K",))
+        )
+    log.record(QueryLogEntry("Show 8-K filings", True, sql, ("8-K",)))
+    log.record(QueryLogEntry("Broken", False, error="no SQL"))
+
+    runner = ReplayRunner(
+        log, tmp_path / "current.db", tmp_path / "candidate.db", repeats=2
+    )
+    assert runner.workload() == [((sql, ("10-K",)), 3), ((sql, ("8-K",)), 1)]
+
+    results = {result.params: result for result in runner.run()}
+    assert results[("10-K",)].occurrences == 3
+    assert (results[("10-K",)].current_rows, results[("10-K",)].candidate_rows) == (
+        1,
+        2,
+    )
+    assert not results[("8-K",)].rows_changed
+
+    report = format_report(list(results.values()))
+    assert "Replayed 2 distinct queries (4 logged requests)" in report
+    assert "1 queries returned a different number of rows" in report
+    log.close()
+
+
+def test_replay_counts_rows_beyond_the_result_cap(tmp_path, monkeypatch):
+    """Test that row changes above EDGAR_MAX_RESULT_ROWS are still reported."""
+    monkeypatch.setenv("EDGAR_MAX_RESULT_ROWS", "5")
+    rows = [(i, f"Company {i}", "10-K") for i in range(20)]
+    make_db(tmp_path / "current.db", rows)
+    make_db(tmp_path / "candidate.db", rows + [(99, "Late Filer", "10-K")])
+
+    # The log holds the SQL as the cost guard ran it, capped at 5 rows
+    log = QueryLog(tmp_path / "query_log.db")
+    sql = "SELECT * FROM (SELECT * FROM master_index WHERE form_type = ?) LIMIT 5"
+    log.record(QueryLogEntry("Show 10-K filings", True, sql, ("10-K",)))
+
+    runner = ReplayRunner(
+        log, tmp_path / "current.db", tmp_path / "candidate.db", repeats=1
+    )
+    try:
+        (result,) = runner.run()
+    finally:
+        runner.close()
+        log.close()
+    assert (result.current_rows, result.candidate_rows) == (20, 21)
+    assert result.rows_changed
+
+
+def test_replay_row_counts_keep_the_authorizer_and_time_budget(tmp_path):
+    """Test that counting rows cannot bypass the read-only checks or hang."""
+    make_db(tmp_path / "current.db", [(i, f"Company {i}", "10-K") for i in range(2000)])
+    executor = SQLExecutorAgent(
+        connection_factory=read_only_factory(tmp_path / "current.db"),
+        timeout_seconds=0.2,
+    )
+    try:
+        assert ReplayRunner._count(executor, "SELECT * FROM master_index", ()) == 2000
+        with pytest.raises(sqlite3.DatabaseError) as refused:
+            ReplayRunner._count(executor, "SELECT * FROM sqlite_master", ())
+        assert is_authorization_error(refused.value)
+
+        # Eight billion rows: far past the 0.2s budget
+        endless = "SELECT a.cik FROM master_index a, master_index b, master_index c"
+        started = time.monotonic()
+        with pytest.raises(sqlite3.OperationalError, match="interrupted"):
+            ReplayRunner._count(executor, endless, ())
+        assert time.monotonic() - started < 5
+    finally:
+        executor.close()
@@ -0,0 +1,108 @@
+import csv
+import io
+import sqlite3
+
+import pytest
+
+from edgar.agents.result_export import (
+    ExportError,
+    ResultExporter,
+    column_kinds,
+    conform,
+    without_limit,
+)
+from edgar.agents.sql_executor import SQLExecutorAgent
+
+
+@pytest.fixture
+def executor(tmp_path):
+    db_path = tmp_path / "export.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE master_index (cik INTEGER, company_name TEXT)")
+    conn.executemany(
+        "INSERT INTO master_index VALUES (?, ?)",
+        [(i, None if i % 10 == 0 else f"Company, {i}") for i in range(250)],
+    )
+    conn.commit()
+    conn.close()
+    return SQLExecutorAgent(connection_factory=lambda: sqlite3.connect(db_path))
+
+
+def export_csv(exporter, sql_query, params=(), full_result=False):
+    prepared = exporter.prepare(sql_query, params, "csv", full_result)
+    return list(csv.reader(io.StringIO(b"".join(exporter.stream(*prepared)).decode())))
+
+
+def test_csv_export_streams_every_row_in_batches(executor):
+    """Test that full_result lifts the LIMIT, batches are joined and caps apply."""
+    exporter = ResultExporter(executor, batch_rows=64)
+    rows = export_csv(exporter, "SELECT * FROM master_index LIMIT 10", (), True)
+    assert rows[0] == ["cik", "company_name"]
+    assert len(rows) == 251
+    assert rows[2] == ["1", "Company, 1"]
+    assert rows[11] == ["10", ""]
+
+    assert len(export_csv(exporter, "SELECT * FROM master_index LIMIT 10")) == 11
+    assert len(export_csv(exporter, "SELECT * FROM master_index LIMIT ?", (5,))) == 6
+    capped = ResultExporter(executor, max_rows=100, batch_rows=64)
+    assert len(export_csv(capped, "SELECT * FROM master_index")) == 101
+    empty = export_csv(exporter, "SELECT * FROM master_index WHERE cik < ?", (0,))
+    assert empty == [["cik", "company_name"]]
+
+
+def test_export_refuses_writes_and_unknown_formats(executor):
+    """Test that exports go through the same guards as answers."""
+    exporter = ResultExporter(executor)
+    with pytest.raises(ExportError, match="forbidden"):
+        exporter.prepare("DELETE FROM master_index")
+    with pytest.raises(ExportError, match="Unknown export format"):
+        exporter.prepare("SELECT * FROM master_index", (), "xlsx")
+    nested = "SELECT * FROM t WHERE x IN (SELECT y LIMIT 10)"
+    assert without_limit(nested) == (nested, ())
+    assert without_limit("SELECT * FROM t WHERE x > ? LIMIT ?", (1, 5)) == (
+        "SELECT * FROM t WHERE x > ?",
+        (1,),
+    )
+
+
+def test_columnar_types_come_from_declared_types_not_the_first_batch():
+    """Test that a NULL or integral first batch does not fix a narrower type."""
+    declared = {"cik": "INTEGER", "value": "NUMERIC", "name": "VARCHAR(150)"}
+    first_batch = [(None, 1, None, 3, None), (None, 2, None, 4, 1.5)]
+    kinds = column_kinds(
+        ["cik", "value", "name", "total", "ratio"], declared, first_batch
+    )
+    assert kinds == ["int64", "float64", "string", "int64", "float64"]
+    assert column_kinds(["n"], {}, []) == ["string"]
+
+    assert conform([7, 2.5, None], "float64") == [7.0, 2.5, None]
+    assert conform([3.0, None], "int64") == [3, None]
+    assert conform([1, 2.5, b"\x01"], "string") == ["1", "2.5", "01"]
+    with pytest.raises(ExportError, match="'cik'"):
+        conform([2.5], "int64", "cik")
+
+
+def test_arrow_and_parquet_exports_round_trip(executor):
+    """Test the columnar formats when pyarrow is installed."""
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    exporter = ResultExporter(executor, batch_rows=64)
+
+    prepared = exporter.prepare("SELECT * FROM master_index", (), "arrow")
+    data = b"".join(exporter.stream(*prepared, fmt="arrow"))
+    table = pa.ipc.open_stream(data).read_all()
+    assert table.num_rows == 250
+
+    prepared = exporter.prepare("SELECT * FROM master_index", (), "parquet")
+    data = b"".join(exporter.stream(*prepared, fmt="parquet"))
+    table = pq.read_table(pa.BufferReader(data))
+    assert table.column_names == ["cik", "company_name"]
+    assert table.num_rows == 250
+
+    # An all-NULL first batch no longer turns an INTEGER column into text
+    sql = "SELECT CASE WHEN cik >= 64 THEN cik END AS cik FROM master_index"
+    prepared = exporter.prepare(sql, (), "parquet")
+    data = b"".join(exporter.stream(*prepared, fmt="parquet"))
+    table = pq.read_table(pa.BufferReader(data))
+    assert table.schema.field("cik").type == pa.int64()
+    assert table.num_rows == 250
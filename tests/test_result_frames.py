@@ -0,0 +1,42 @@
+import pandas as pd
+
+from edgar.agents.result_frames import compact_frame
+from edgar.agents.sql_executor import SQLExecutorAgent
+
+
+def test_compact_frame_shrinks_repetitive_and_integer_columns():
+    """Integers narrow, form types become categorical and values are kept."""
+    df = pd.DataFrame(
+        {
+            "cik": [320193, 789019, None, 1018724] * 50,
+            "form_type": ["10-K", "10-Q", "8-K", "10-Q"] * 50,
+            "date_filed": ["2025-01-15", "2025-02-15", "2025-03-15", "2025-04-15"] * 50,
+            "value": [1.5, 2.25, None, 4.0] * 50,
+        }
+    )
+
+    compacted, report = compact_frame(df, {"cik": "INTEGER"})
+
+    assert str(compacted["cik"].dtype) == "Int32"
+    assert isinstance(compacted["form_type"].dtype, pd.CategoricalDtype)
+    assert compacted["value"].dtype == df["value"].dtype
+    assert report.bytes_saved > 0
+    assert compacted["cik"].iloc[0] == 320193
+    assert compacted["cik"].isna().sum() == 50
+    assert compacted["date_filed"].astype(str).tolist() == df["date_filed"].tolist()
+
+
+def test_executor_returns_compact_frames(temp_db):
+    """The executor narrows result dtypes and reports the memory it saved."""
+    executor = SQLExecutorAgent(temp_db)
+
+    execution = executor.execute("SELECT cik, form_type FROM filings ORDER BY cik")
+
+    assert execution.error is None
+    assert str(execution.df["cik"].dtype) == "Int32"
+    assert isinstance(execution.df["form_type"].dtype, pd.CategoricalDtype)
+    assert execution.memory_bytes > 0
+    assert executor.declared_types("SELECT cik FROM filings")["cik"] == "INTEGER"
+
+    executor.compact_results = False
+    assert executor.execute("SELECT cik FROM filings").df["cik"].dtype == "int64"
@@ -0,0 +1,69 @@
+import pandas as pd
+
+from edgar.agents.result_summarizer import ResultSummarizer, estimate_tokens
+
+
+def make_submissions(rows):
+    return pd.DataFrame(
+        {
+            "adsh": [f"0000000000-25-{i:06d}" for i in range(rows)],
+            "cik": range(rows),
+            "name": [f"COMPANY {i % 7} HOLDINGS" for i in range(rows)],
+            "form": ["10-K" if i % 3 else "10-Q" for i in range(rows)],
+            "filed": [f"2025{1 + i % 12:02d}15" for i in range(rows)],
+            "bas1": ["1 LONG STREET ADDRESS THAT IS NOT RELEVANT"] * rows,
+            "bas2": ["SUITE 100"] * rows,
+            "baph": ["555-0100"] * rows,
+            "countryba": ["US"] * rows,
+            "stprba": ["NY"] * rows,
+            "cityba": ["NEW YORK"] * rows,
+            "zipba": ["10001"] * rows,
+            "former": [None] * rows,
+        }
+    )
+
+
+def test_small_results_are_sent_whole():
+    """Test that a result within budget is passed through in full."""
+    df = make_submissions(3)
+    summary = ResultSummarizer(token_budget=2000).summarize("List filers", df)
+
+    # Columns beyond the eight most relevant are left out, so it is not "full"
+    assert summary.text.startswith("All 3 rows (8 of 13 columns)")
+    assert summary.sampled_rows == 3
+    assert "former" not in summary.columns
+
+
+def test_large_results_fit_the_budget_with_aggregates():
+    """Test that large results are summarized within the token budget."""
+    df = make_submissions(5000)
+    summary = ResultSummarizer(token_budget=400).summarize(
+        "Which form was filed most by each company name?", df
+    )
+
+    assert summary.tokens <= 400
+    assert summary.tokens == estimate_tokens(summary.text)
+    assert summary.total_rows == 5000
+    assert 0 < summary.sampled_rows < 5000
+    assert {"name", "form", "filed"} <= set(summary.columns)
+    assert len(summary.columns) < len(df.columns)
+    assert "from 2025-01-15 to 2025-12-15" in summary.text
+    assert "10-K (3333)" in summary.text
+
+
+def test_full_data_label_only_when_no_values_are_left_out():
+    """Test that dropping only empty columns still counts as the full data."""
+    df = make_submissions(3)[["adsh", "cik", "name", "former"]]
+    summary = ResultSummarizer(token_budget=2000).summarize("List filers", df)
+
+    assert summary.text.startswith("Full data (3 rows)")
+    assert summary.columns == ["adsh", "cik", "name"]
+
+
+def test_summary_never_exceeds_a_tiny_budget():
+    """Test that the aggregates are shortened and then cut off to fit."""
+    df = make_submissions(5000)
+    for budget in (60, 20):
+        summary = ResultSummarizer(token_budget=budget).summarize("filers", df)
+        assert summary.tokens <= budget
+        assert summary.tokens == estimate_tokens(summary.text)
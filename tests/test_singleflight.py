@@ -0,0 +1,59 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from edgar.core.singleflight import COALESCED_TOTAL, SingleFlight
+
+
+def test_concurrent_calls_share_one_computation():
+    """Test that callers with the same key wait for the leader's result."""
+    flight = SingleFlight("test-shared")
+    calls = []
+    results = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait()
+        return {"answer": 42, "data": pd.DataFrame({"cik": [1, 2]})}
+
+    def call():
+        results.append(flight.do("key", compute))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=call) for _ in range(4)]
+    for thread in followers:
+        thread.start()
+    # Followers are counted before they wait, so all four joined the leader's call
+    while COALESCED_TOTAL.value(stage="test-shared", role="follower") < 4:
+        release.wait(0.001)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert {result["answer"] for result, _ in results} == {42}
+
+    # Each follower can change its copy without touching the others
+    results[0][0]["answer"] = 0
+    results[0][0]["data"]["cik"] = 0
+    assert [result["answer"] for result, _ in results[1:]] == [42] * 4
+    assert all(result["data"]["cik"].tolist() == [1, 2] for result, _ in results[1:])
+
+
+def test_errors_propagate_and_key_is_released():
+    """Test that a failure reaches the caller and does not poison the key."""
+    flight = SingleFlight("test")
+
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        flight.do("key", fail)
+    assert flight.do("key", lambda: 42) == (42, False)
@@ -1,9 +1,14 @@
-from edgar.services.sql_executor import SQLExecutorService
+import sqlite3
+import threading
+
+import pytest
+
+from edgar.agents.sql_executor import SQLExecutorAgent
 
 
 def test_sql_executor_forbidden_operations(temp_db):
     """Test that forbidden SQL operations are blocked."""
-    executor = SQLExecutorService(temp_db)
+    executor = SQLExecutorAgent(temp_db)
 
     forbidden_queries = [
         "DROP TABLE filings",
@@ -24,7 +29,7 @@ def test_sql_executor_forbidden_operations(temp_db):
 
 def test_sql_executor_valid_select(temp_db):
     """Test that valid SELECT queries work."""
-    executor = SQLExecutorService(temp_db)
+    executor = SQLExecutorAgent(temp_db)
 
     result, error = executor.execute_sql_query("SELECT COUNT(*) as count FROM filings")
     assert error is None
@@ -35,9 +40,59 @@ def test_sql_executor_valid_select(temp_db):
 
 def test_sql_executor_invalid_syntax(temp_db):
     """Test handling of invalid SQL syntax."""
-    executor = SQLExecutorService(temp_db)
+    executor = SQLExecutorAgent(temp_db)
 
     result, error = executor.execute_sql_query("SELECT * FROM nonexistent_table")
     assert result is None
     assert error is not None
     assert "error executing query" in error.lower()
+
+
+def test_sql_executor_allows_keywords_inside_values(temp_db):
+    """Test that company names containing SQL keywords are not rejected."""
+    executor = SQLExecutorAgent(temp_db)
+
+    result, error = executor.execute_sql_query(
+        "SELECT * FROM filings WHERE UPPER(company_name) LIKE '%UPDATED HOLDINGS%' "
+        "OR company_name = 'CREATED INC' LIMIT 10"
+    )
+    assert error is None
+    assert result is not None
+    assert result.empty
+
+
+def test_sql_executor_authorizer_rejects_unlisted_tables(temp_db):
+    """Test that reads outside the table whitelist are refused and counted."""
+    temp_db.execute("CREATE TABLE secrets (value TEXT)")
+    executor = SQLExecutorAgent(temp_db)
+    executor.authorizer.allowed_tables.discard("secrets")
+
+    result, error = executor.execute_sql_query(
+        "WITH s AS (SELECT value FROM secrets) SELECT * FROM s"
+    )
+    assert result is None
+    assert "forbidden operations" in error.lower()
+    assert executor.authorizer.rejected_queries == 1
+    assert executor.authorizer.rejected_actions["SQLITE_READ"] >= 1
+
+
+def test_sql_executor_close_closes_per_thread_connections(temp_db):
+    """Test that close() closes the connection each thread opened."""
+    db_path = temp_db.execute("PRAGMA database_list").fetchone()[2]
+    opened = []
+
+    def connect():
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        opened.append(conn)
+        return conn
+
+    executor = SQLExecutorAgent(connection_factory=connect)
+    worker = threading.Thread(target=executor.execute, args=("SELECT 1",))
+    worker.start()
+    worker.join()
+    assert len(opened) == 2
+
+    executor.close()
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
@@ -0,0 +1,72 @@
+from edgar.agents.sql_executor import SQLExecutorAgent
+from edgar.agents.sql_templates import SQLTemplateCache, parameterize_sql
+
+
+def test_parameterize_sql_binds_value_literals():
+    """Test that value literals become parameters but positions and limits do not."""
+    template = parameterize_sql(
+        "SELECT * FROM filings WHERE UPPER(company_name) LIKE '%O''NEIL%' "
+        "AND cik = 123 ORDER BY 1 LIMIT 10"
+    )
+
+    assert template.template == (
+        "SELECT * FROM filings WHERE UPPER(company_name) LIKE ? "
+        "AND cik = ? ORDER BY 1 LIMIT 10"
+    )
+    assert template.params == ("%O'NEIL%", 123)
+    assert "'%O''NEIL%'" in template.render()
+
+
+def test_template_cache_reuses_sql_for_a_different_company():
+    """Test that a learned question shape is reused with new bound values."""
+    cache = SQLTemplateCache()
+    cache.learn(
+        "Show me 10-K filings from Apple",
+        parameterize_sql(
+            "SELECT * FROM filings WHERE UPPER(company_name) LIKE '%APPLE%' "
+            "AND form_type LIKE '10-K%' LIMIT 10"
+        ),
+    )
+
+    reused = cache.lookup("show me 10-Q filings from Test Company?")
+    assert reused is not None
+    assert reused.params == ("%TEST COMPANY%", "10-Q%")
+    assert cache.lookup("Show me 10-K filings from Apple in 2024") is None
+
+
+def test_template_cache_misses_values_of_another_kind():
+    """Test that a slot only takes the kind of value it was learned from."""
+    cache = SQLTemplateCache()
+    cache.learn(
+        "Show 10-K filings for Apple",
+        parameterize_sql(
+            "SELECT * FROM filings WHERE form_type LIKE '10-K%' "
+            "AND UPPER(company_name) LIKE '%APPLE%' LIMIT 10"
+        ),
+    )
+
+    assert cache.lookup("Show all filings for Apple") is None
+    assert cache.lookup("Show recent filings for Tesla") is None
+    assert cache.lookup("Show 10-K filings for Apple and Microsoft") is None
+    assert cache.lookup("Show 10-K filings for Apple, Microsoft") is None
+    assert cache.lookup("Show 10-K/A filings for Tesla").params == (
+        "10-K/A%",
+        "%TESLA%",
+    )
+    assert cache.lookup("Show S-1 filings for Johnson & Johnson").params == (
+        "S-1%",
+        "%JOHNSON & JOHNSON%",
+    )
+
+
+def test_executor_binds_parameters(temp_db):
+    """Test that templates run with bound parameters and keep their shape."""
+    executor = SQLExecutorAgent(temp_db)
+    template = parameterize_sql(
+        "SELECT * FROM filings WHERE form_type = '10-Q' LIMIT 10"
+    )
+
+    result = executor.execute(template.template, template.params)
+    assert result.error is None
+    assert result.df["company_name"].tolist() == ["Another Corp"]
+    assert result.sql_query == "SELECT * FROM filings WHERE form_type = ? LIMIT 10"
@@ -0,0 +1,75 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+import uvicorn
+
+from edgar.agents import MarkdownResponderAgent, SQLExecutorAgent, SQLGeneratorAgent
+from edgar.agents.llm_client import LLMClient
+from edgar.api import server
+from edgar.bench import LoadGenerator, StubLLM, start_stub_server
+from edgar.bench.stub_llm import rule_sql
+from edgar.core import EdgarQueryEngine
+
+
+def test_rule_sql_follows_the_question():
+    """Test the keyword rules used for questions without canned SQL."""
+    assert rule_sql("How many 10-K filings for cik 0001750?") == (
+        "SELECT COUNT(*) AS count FROM master_index "
+        "WHERE form_type LIKE '10-K%' AND cik = 1750"
+    )
+    assert rule_sql("Show filings by 'acme'") == (
+        "SELECT * FROM master_index WHERE UPPER(company_name) LIKE '%ACME%' LIMIT 10"
+    )
+
+
+@pytest.fixture
+def api_url(temp_db, monkeypatch):
+    """Run the API over HTTP with its agents pointed at the stub LLM."""
+    stub = StubLLM(
+        latency="uniform:1,5",
+        rate_limit_rate=0.2,
+        seed=1,
+        canned={"Show 10-K filings": "SELECT * FROM filings WHERE form_type = '10-K'"},
+    )
+    stub_server, base_url = start_stub_server(stub)
+    client = LLMClient(base_url=base_url, max_retries=5, requests_per_second=1000)
+
+    db_path = temp_db.execute("PRAGMA database_list").fetchone()[2]
+    engine = EdgarQueryEngine()
+    engine.sql_generator = SQLGeneratorAgent(llm_client=client)
+    engine.markdown_responder = MarkdownResponderAgent(llm_client=client)
+    engine.sql_executor = SQLExecutorAgent(
+        connection_factory=lambda: sqlite3.connect(db_path)
+    )
+    monkeypatch.setattr(server, "_engine", engine)
+
+    api = uvicorn.Server(
+        uvicorn.Config(server.app, host="127.0.0.1", port=0, log_level="error")
+    )
+    thread = threading.Thread(target=api.run, daemon=True)
+    thread.start()
+    while not api.started:
+        time.sleep(0.01)
+    port = api.servers[0].sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}", stub
+
+    api.should_exit = True
+    thread.join()
+    stub_server.shutdown()
+
+
+def test_load_generator_drives_the_api_through_the_stub(api_url):
+    """Test an end-to-end run: loadgen -> /query -> agents -> stub LLM."""
+    url, stub = api_url
+    generator = LoadGenerator(
+        url=url, rps=40, duration_seconds=0.5, questions=["Show 10-K filings"]
+    )
+    result = generator.run()
+
+    summary = result.summary()
+    assert summary["sent"] == 20
+    assert summary["error_rate"] == 0
+    assert summary["p50_ms"] <= summary["p99_ms"]
+    assert stub.calls >= 2
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+from edgar.agents import DataLoaderAgent
+from edgar.bench import SyntheticConfig, generate_dataset, synthetic
+from edgar.bench.synthetic import MASTER_FORMS
+
+
+def test_synthetic_dataset_loads_and_is_reproducible(temp_data_dir):
+    """Test that generated files load as-is and a seed reproduces them exactly."""
+    config = SyntheticConfig(master_rows=2_000, companies=50, tags=40, seed=7)
+    first = generate_dataset(temp_data_dir / "a", config)
+    second = generate_dataset(temp_data_dir / "b", config)
+    for name, path in first.files.items():
+        assert path.read_bytes() == second.files[name].read_bytes()
+
+    loader = DataLoaderAgent(
+        db_path=temp_data_dir / "edgar.db", data_folder=first.folder
+    )
+    conn = loader.init_db()
+    counts = {
+        table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        for table in ("master_index", "submissions", "presentation_of_statement")
+    }
+    assert counts == {
+        "master_index": 2_000,
+        "submissions": config.sub_rows,
+        "presentation_of_statement": config.pre_rows,
+    }
+    assert (
+        conn.execute("SELECT COUNT(DISTINCT cik) FROM master_index").fetchone()[0] <= 50
+    )
+    # Every presentation line belongs to a submission
+    orphans = conn.execute(
+        "SELECT COUNT(*) FROM presentation_of_statement p "
+        "LEFT JOIN submissions s ON s.adsh = p.adsh WHERE s.adsh IS NULL"
+    ).fetchone()[0]
+    assert orphans == 0
+    conn.close()
+
+
+def read_forms(dataset):
+    master = pd.read_csv(
+        dataset.files["master.idx"], sep="|", skiprows=10, header=None, dtype=str
+    )
+    return master[2]
+
+
+def test_form_type_cardinality_is_configurable(temp_data_dir):
+    """Test a form-type count beyond the real forms, and an explicit distribution."""
+    many = generate_dataset(
+        temp_data_dir / "many",
+        SyntheticConfig(master_rows=20_000, form_types=60, seed=1),
+    )
+    forms = read_forms(many)
+    assert forms.nunique() > len(MASTER_FORMS)
+    assert forms.str.startswith("FORM-").any()
+    # The real forms stay the most common
+    assert forms.value_counts().index[0] == "4"
+
+    two = generate_dataset(
+        temp_data_dir / "two",
+        SyntheticConfig(master_rows=1_000, form_types={"10-K": 3, "8-K": 1}),
+    )
+    counts = read_forms(two).value_counts()
+    assert set(counts.index) == {"10-K", "8-K"}
+    assert counts["10-K"] > counts["8-K"]
+
+    few = generate_dataset(
+        temp_data_dir / "few", SyntheticConfig(master_rows=1_000, form_types=3)
+    )
+    assert set(read_forms(few)) == {"4", "8-K", "424B2"}
+
+
+def test_accession_numbers_stay_unique_past_the_sequence_wrap(
+    temp_data_dir, monkeypatch
+):
+    """Test that a busy filer's submissions never repeat an accession number."""
+    sequence = np.arange(1_200_000)
+    ciks = np.full(len(sequence), 320193)
+    assert pd.Series(synthetic._submission_accessions(ciks, sequence, 2025)).is_unique
+
+    # Wrap after 1,000 filings so a small dataset crosses it several times
+    monkeypatch.setattr(synthetic, "CHUNK_ROWS", 700)
+    monkeypatch.setattr(synthetic, "ACCESSION_SEQUENCES", 1_000)
+    dataset = generate_dataset(
+        temp_data_dir,
+        SyntheticConfig(
+            master_rows=1_000, sub_rows=3_500, pre_rows=7_000, companies=3, seed=2
+        ),
+    )
+    sub = pd.read_csv(dataset.files["sub.txt"], sep="\t", dtype=str)
+    pre = pd.read_csv(dataset.files["pre.txt"], sep="\t", dtype=str)
+    assert len(sub) == 3_500
+    assert sub["adsh"].is_unique
+    assert set(pre["adsh"]) <= set(sub["adsh"])
@@ -0,0 +1,79 @@
+import contextvars
+import json
+import threading
+
+from edgar.agents import sql_executor
+from edgar.agents.sql_executor import SQLExecutorAgent
+from edgar.observability import (
+    JsonlSink,
+    NoopSink,
+    RingBufferSink,
+    Tracer,
+    set_tracer,
+)
+from edgar.observability.tracing import NOOP_SPAN
+
+
+def test_noop_sink_records_nothing():
+    """Test that spans are inert while tracing is off."""
+    tracer = Tracer(NoopSink())
+    with tracer.span("engine.query", rows=3) as span:
+        span.set_attribute("coalesced", False)
+    assert span is NOOP_SPAN
+
+
+def test_sql_hash_is_only_computed_while_recording(temp_db, monkeypatch):
+    """Test that a disabled tracer skips the per-query SQL hash."""
+    hashed = []
+    monkeypatch.setattr(sql_executor, "sql_hash", lambda sql: hashed.append(sql))
+    executor = SQLExecutorAgent(temp_db)
+
+    sink = RingBufferSink(capacity=10)
+    try:
+        set_tracer(Tracer(NoopSink()))
+        executor.execute("SELECT cik FROM filings")
+        assert hashed == []
+
+        set_tracer(Tracer(sink))
+        executor.execute("SELECT cik FROM filings")
+    finally:
+        set_tracer(None)
+    assert len(hashed) == 1
+    assert "sql_hash" in sink.spans()[-1].attributes
+
+
+def test_child_spans_inherit_trace_across_threads():
+    """Test parent/child links, including from a thread that is handed the context."""
+    sink = RingBufferSink(capacity=10)
+    tracer = Tracer(sink)
+    with tracer.span("root", trace_id="trace-1") as root:
+        context = contextvars.copy_context()
+
+        def work():
+            with tracer.span("child", sql_hash="abc"):
+                pass
+
+        thread = threading.Thread(target=context.run, args=(work,))
+        thread.start()
+        thread.join()
+
+    child, parent = sink.spans("trace-1")
+    assert parent is root
+    assert child.parent_id == root.span_id
+    assert child.attributes == {"sql_hash": "abc"}
+    assert root.duration_ms >= child.duration_ms
+
+
+def test_jsonl_sink_writes_one_line_per_span(tmp_path):
+    """Test that finished spans, including failures, are appended as JSON."""
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(JsonlSink(path))
+    try:
+        with tracer.span("sql_executor.execute"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert records[0]["name"] == "sql_executor.execute"
+    assert records[0]["error"] == "ValueError: boom"